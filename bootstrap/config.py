@@ -66,6 +66,11 @@ class Config:
         )
         self.TG_PROXY_GITHUB_URLS = [x.strip() for x in raw_proxy_urls.split(",") if x.strip()]
 
+        # Лимиты отправки в Telegram (Bot API: ~30 сообщений в секунду на бота, ~1 в секунду в чат, 20 в минуту в группу)
+        self.TELEGRAM_GLOBAL_RATE_PER_SECOND = float(os.environ.get("TELEGRAM_GLOBAL_RATE_PER_SECOND", "25"))
+        self.TELEGRAM_CHAT_RATE_PER_SECOND = float(os.environ.get("TELEGRAM_CHAT_RATE_PER_SECOND", "1"))
+        self.TELEGRAM_GROUP_RATE_PER_MINUTE = float(os.environ.get("TELEGRAM_GROUP_RATE_PER_MINUTE", "20"))
+
         # Email transport
         self.EMAIL_ENABLED = os.environ.get("EMAIL_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
         self.EMAIL_FROM = os.environ.get("EMAIL_FROM", "")
@@ -94,11 +99,36 @@ class Config:
         self.EVENT_STORE_AUTH_TOKEN = os.environ.get("EVENT_STORE_AUTH_TOKEN", "").strip()
         self.EVENT_STORE_TIMEOUT_SECONDS = float(os.environ.get("EVENT_STORE_TIMEOUT_SECONDS", "20"))
 
+        # Двухфазная доставка CDR: карточка сразу, транскрибация/PDF/ссылка — ответом позже
+        self.CALL_NOTIFY_TWO_PHASE = os.environ.get("CALL_NOTIFY_TWO_PHASE", "1").strip().lower() not in {"0", "false", "no", "off"}
+        # В двухфазном режиме: как часто (сек) обновлять в Telegram текст транскрибации по ходу распознавания (0 — отключено)
+        self.CALL_NOTIFY_PROGRESS_INTERVAL_SECONDS = float(os.environ.get("CALL_NOTIFY_PROGRESS_INTERVAL_SECONDS", "15"))
+
+        # Очередь обработки групп CDR (транскрибация не блокирует чтение Master.csv)
+        self.CDR_JOB_QUEUE_SIZE = int(os.environ.get("CDR_JOB_QUEUE_SIZE", "16"))
+        self.CDR_JOB_WORKERS = int(os.environ.get("CDR_JOB_WORKERS", "2"))
+        # Контрольная точка чтения Master.csv (offset + inode + size), переживает перезапуски
+        self.CDR_CHECKPOINT_FILE = Path(os.environ.get("CDR_CHECKPOINT_FILE", "/opt/sms/var/cdr_offset.json"))
+
         self.CALL_TRANSCRIBE_ENABLED = os.environ.get("CALL_TRANSCRIBE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
         self.CALL_TRANSCRIBE_MODEL = os.environ.get("CALL_TRANSCRIBE_MODEL", "small").strip() or "small"
         self.CALL_TRANSCRIBE_DEVICE = os.environ.get("CALL_TRANSCRIBE_DEVICE", "cpu").strip() or "cpu"
         self.CALL_TRANSCRIBE_COMPUTE_TYPE = os.environ.get("CALL_TRANSCRIBE_COMPUTE_TYPE", "int8").strip() or "int8"
         self.CALL_TRANSCRIBE_BEAM_SIZE = int(os.environ.get("CALL_TRANSCRIBE_BEAM_SIZE", "5"))
+        # Потоки CTranslate2 (0 — по умолчанию библиотеки) и параллельная транскрибация левого/правого канала
+        self.CALL_TRANSCRIBE_CPU_THREADS = int(os.environ.get("CALL_TRANSCRIBE_CPU_THREADS", "0"))
+        self.CALL_TRANSCRIBE_NUM_WORKERS = int(os.environ.get("CALL_TRANSCRIBE_NUM_WORKERS", "1"))
+        self.CALL_TRANSCRIBE_PARALLEL_CHANNELS = os.environ.get("CALL_TRANSCRIBE_PARALLEL_CHANNELS", "0").strip().lower() in {"1", "true", "yes", "on"}
+        # Отправлять в Whisper только участки речи (энергия + ZCR), полностью тихий канал не распознаётся.
+        # Выключено по умолчанию: порог ограничен сверху -35 dBFS, и тихо записанный канал целиком считается тишиной
+        self.CALL_TRANSCRIBE_SILENCE_TRIM = os.environ.get("CALL_TRANSCRIBE_SILENCE_TRIM", "0").strip().lower() in {"1", "true", "yes", "on"}
+        # Пакетное распознавание (BatchedInferencePipeline): отрезки речи до 30 с декодируются по CALL_TRANSCRIBE_BATCH_SIZE за проход
+        self.CALL_TRANSCRIBE_BATCHED = os.environ.get("CALL_TRANSCRIBE_BATCHED", "0").strip().lower() in {"1", "true", "yes", "on"}
+        self.CALL_TRANSCRIBE_BATCH_SIZE = int(os.environ.get("CALL_TRANSCRIBE_BATCH_SIZE", "8"))
+        # Длинные записи (от 1.5 окна) режутся на окна по тишине и распознаются пулом процессов (0 — отключено)
+        self.CALL_TRANSCRIBE_WINDOW_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_WINDOW_SECONDS", "0"))
+        self.CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS", "4"))
+        self.CALL_TRANSCRIBE_WINDOW_WORKERS = int(os.environ.get("CALL_TRANSCRIBE_WINDOW_WORKERS", "0"))
         self.CALL_TRANSCRIBE_MERGE_GAP = float(os.environ.get("CALL_TRANSCRIBE_MERGE_GAP", "0.15"))
         self.CALL_TRANSCRIBE_SPLIT_GAP_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_SPLIT_GAP_SECONDS", "0.8"))
         self.CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS", "0.35"))
@@ -110,6 +140,43 @@ class Config:
         self.CALL_TRANSCRIBE_ARTIFACTS_DIR = Path(
             os.environ.get("CALL_TRANSCRIBE_ARTIFACTS_DIR", "/opt/sms/var/transcriptions")
         )
+        # PDF длинных разговоров (от CALL_TRANSCRIBE_PDF_STREAMING_ROWS фраз, 0 — никогда) рисуется постранично;
+        # CALL_TRANSCRIBE_PDF_MAX_PAGES (0 — без ограничения) обрезает его, полный текст сохраняется в JSON рядом;
+        # reportlab держит страницы в памяти до сохранения, лимит ограничивает и её
+        self.CALL_TRANSCRIBE_PDF_STREAMING_ROWS = int(os.environ.get("CALL_TRANSCRIBE_PDF_STREAMING_ROWS", "300"))
+        self.CALL_TRANSCRIBE_PDF_MAX_PAGES = int(os.environ.get("CALL_TRANSCRIBE_PDF_MAX_PAGES", "200"))
+        # Распознавание в отдельном долгоживущем процессе (модель не делит GIL и память с ботом)
+        self.CALL_TRANSCRIBE_WORKER_PROCESS = os.environ.get("CALL_TRANSCRIBE_WORKER_PROCESS", "1").strip().lower() not in {"0", "false", "no", "off"}
+        # Кэш результатов транскрибации в CALL_TRANSCRIBE_ARTIFACTS_DIR/cache
+        self.CALL_TRANSCRIBE_CACHE_ENABLED = os.environ.get("CALL_TRANSCRIBE_CACHE_ENABLED", "1").strip().lower() not in {"0", "false", "no", "off"}
+        self.CALL_TRANSCRIBE_CACHE_MAX_MB = float(os.environ.get("CALL_TRANSCRIBE_CACHE_MAX_MB", "100"))
+        self.CALL_TRANSCRIBE_CACHE_MAX_AGE_DAYS = float(os.environ.get("CALL_TRANSCRIBE_CACHE_MAX_AGE_DAYS", "30"))
+        # Выгрузка модели Whisper после простоя и при превышении бюджета памяти процесса (0 — отключено)
+        self.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS", "600"))
+        self.CALL_TRANSCRIBE_RSS_BUDGET_MB = float(os.environ.get("CALL_TRANSCRIBE_RSS_BUDGET_MB", "0"))
+        # Начинать распознавание, как только Asterisk закрыл файл записи, а не после закрытия группы CDR
+        self.CALL_TRANSCRIBE_SPECULATIVE = os.environ.get("CALL_TRANSCRIBE_SPECULATIVE", "1").strip().lower() not in {"0", "false", "no", "off"}
+        self.CALL_TRANSCRIBE_SPECULATIVE_MAX_JOBS = int(os.environ.get("CALL_TRANSCRIBE_SPECULATIVE_MAX_JOBS", "1"))
+        # Результат `python -m integrations.transcription autotune`; явно заданные переменные окружения важнее файла
+        self.CALL_TRANSCRIBE_TUNING_FILE = Path(
+            os.environ.get("CALL_TRANSCRIBE_TUNING_FILE", "/opt/sms/var/transcription_tuning.json")
+        )
+        # Быстрый профиль при очереди записей (пусто — всегда полное качество): модель и beam size,
+        # порог очереди и длительность записи, с которой она распознаётся быстро, если её кто-то ждёт.
+        # Модель быстрого профиля загружается в том же процессе вместо основной, а не рядом с ней
+        self.CALL_TRANSCRIBE_FAST_MODEL = os.environ.get("CALL_TRANSCRIBE_FAST_MODEL", "").strip()
+        self.CALL_TRANSCRIBE_FAST_BEAM_SIZE = int(os.environ.get("CALL_TRANSCRIBE_FAST_BEAM_SIZE", "1"))
+        self.CALL_TRANSCRIBE_FAST_BACKLOG = int(os.environ.get("CALL_TRANSCRIBE_FAST_BACKLOG", "3"))
+        self.CALL_TRANSCRIBE_FAST_LONG_SECONDS = float(os.environ.get("CALL_TRANSCRIBE_FAST_LONG_SECONDS", "900"))
+        # Повторно распознать в полном качестве в простое и прислать ответом на карточку звонка
+        self.CALL_TRANSCRIBE_FULL_QUALITY_RERUN = os.environ.get("CALL_TRANSCRIBE_FULL_QUALITY_RERUN", "0").strip().lower() in {"1", "true", "yes", "on"}
+        # Очистка локальных артефактов (workers/housekeeping.py), 0 в интервале — отключить:
+        # бюджеты размера и возраста для PDF/JSON в CALL_TRANSCRIBE_ARTIFACTS_DIR и логов команд в /tmp
+        self.HOUSEKEEPING_INTERVAL_SECONDS = float(os.environ.get("HOUSEKEEPING_INTERVAL_SECONDS", "3600"))
+        self.HOUSEKEEPING_ARTIFACTS_MAX_MB = float(os.environ.get("HOUSEKEEPING_ARTIFACTS_MAX_MB", "500"))
+        self.HOUSEKEEPING_ARTIFACTS_MAX_AGE_DAYS = float(os.environ.get("HOUSEKEEPING_ARTIFACTS_MAX_AGE_DAYS", "90"))
+        self.HOUSEKEEPING_TMP_LOGS_MAX_MB = float(os.environ.get("HOUSEKEEPING_TMP_LOGS_MAX_MB", "50"))
+        self.HOUSEKEEPING_TMP_LOGS_MAX_AGE_DAYS = float(os.environ.get("HOUSEKEEPING_TMP_LOGS_MAX_AGE_DAYS", "7"))
 
 
 CONFIG = Config()
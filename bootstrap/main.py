@@ -15,6 +15,7 @@ from services.command_service import CommandService
 from services.delivery_service import DeliveryHub
 from services.event_router import send_startup_notification, start_cdr_monitor
 from services.system_ops import get_app_version_text
+from workers.housekeeping import Housekeeper
 
 configure_logging()
 logger = logging.getLogger(__name__)
@@ -24,17 +25,25 @@ async def async_main() -> None:
     ys = YeastarSMSClient(CONFIG.TG_HOST, CONFIG.TG_PORT, CONFIG.TG_USER, CONFIG.TG_PASS)
     delivery = DeliveryHub(CONFIG)
     event_store = EventStoreClient(CONFIG)
-    command_service = CommandService(ys)
+    housekeeper = Housekeeper.from_config(CONFIG, in_use=delivery.pending_attachment_paths)
     transcriber = StereoCallTranscriber(CONFIG)
     transcription_pdf_renderer = TranscriptionPdfRenderer(CONFIG)
 
     await start_ys_reader(ys, delivery, event_store)
-    await start_cdr_monitor(delivery, event_store, transcriber, transcription_pdf_renderer)
+    cdr_jobs = await start_cdr_monitor(delivery, event_store, transcriber, transcription_pdf_renderer)
+    command_service = CommandService(ys, housekeeper, delivery, cdr_jobs)
 
     tasks = [
         asyncio.create_task(run_telegram_transport(ys, delivery, command_service), name="telegram-transport"),
+        asyncio.create_task(delivery.run_queue_drainer(), name="telegram-queue-drainer"),
+        asyncio.create_task(delivery.run_queue_maintenance(), name="telegram-queue-maintenance"),
     ]
 
+    if housekeeper.is_enabled():
+        tasks.append(asyncio.create_task(housekeeper.run_forever(), name="housekeeping"))
+    else:
+        logger.info("Housekeeping is disabled")
+
     if delivery.is_imap_enabled():
         mail_gateway = MailGateway(CONFIG, delivery, command_service)
         tasks.append(asyncio.create_task(mail_gateway.run_forever(), name="mail-gateway"))
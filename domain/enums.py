@@ -9,3 +9,10 @@ class ResponseItemKind(str, Enum):
 class DeliveryChannel(str, Enum):
     TELEGRAM = "telegram"
     EMAIL = "email"
+
+
+class DeliveryPriority(int, Enum):
+    """Класс срочности отправки: меньшее значение обгоняет большее между сообщениями одного чата."""
+    INTERACTIVE = 0  # ответы на команды администратора
+    ALERT = 1  # уведомления в реальном времени (SMS, запуск бота)
+    BULK = 2  # записи, PDF, транскрибации, разбор очереди неотправленных
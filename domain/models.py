@@ -11,9 +11,18 @@ class ResponseItem:
     caption: str | None = None
     attachment_paths: list[str] | None = None
     attachment_names: list[str | None] | None = None
+    reply_to_message_id: int | None = None
 
 
 @dataclass
 class CommandResult:
     items: list[ResponseItem]
     post_action: str | None = None
+
+
+@dataclass
+class DeliveryReceipt:
+    telegram_chat_id: int | None = None
+    telegram_message_id: int | None = None
+    email_message_id: str | None = None
+    email_subject: str | None = None
@@ -1,25 +1,74 @@
 import csv
 import os
 import asyncio
+import logging
 from pathlib import Path
-from typing import Callable, Optional, List, Dict
+from typing import Awaitable, BinaryIO, Callable, Optional, List, Dict, Tuple
 from datetime import datetime
 
+from integrations.asterisk.file_watch import (
+    IN_CLOSE_WRITE,
+    IN_CREATE,
+    IN_MODIFY,
+    IN_MOVED_TO,
+    DirectoryWatcher,
+    FileCheckpoint,
+    OffsetCheckpointStore,
+)
+
+logger = logging.getLogger(__name__)
+
+_CDR_FIELDNAMES = [
+    "accountcode", "src", "dst", "dcontext", "clid", "channel", "dstchannel",
+    "lastapp", "lastdata", "start", "answer", "end", "duration", "billsec",
+    "disposition", "amaflags", "uniqueid", "userfield"
+]
+
+
 class CDRMonitor:
     """
     Мониторинг файла CDR Asterisk в формате CSV с группировкой близких вызовов.
     При появлении новых записей собирает их в группы и вызывает callback с группой.
+
+    Файл читается по событиям inotify (с откатом на опрос раз в check_interval),
+    позиция чтения сохраняется в checkpoint_path, поэтому после перезапуска бота
+    чтение продолжается с того же места. Ротация и усечение файла отслеживаются
+    по inode и размеру.
+
+    Группа, переданная в callback, считается необработанной, пока не вызван group_done(group):
+    контрольная точка не уходит дальше начала самой старой такой группы, поэтому после
+    перезапуска группы из очереди обработчика читаются заново (возможна повторная доставка,
+    но не потеря).
+
+    on_group_started — необязательная асинхронная функция, которая вызывается с первой
+    записью новой группы (например, чтобы заранее загрузить модель транскрибации).
     """
-    def __init__(self, cdr_path: str, callback: Callable[[List[Dict]], None], 
-                 check_interval: float = 5.0, group_timeout: float = 30.0):
+    def __init__(self, cdr_path: str, callback: Callable[[List[Dict]], None],
+                 check_interval: float = 5.0, group_timeout: float = 30.0,
+                 checkpoint_path: Optional[str | Path] = None,
+                 on_group_started: Optional[Callable[[Dict], Awaitable[None]]] = None):
         self.cdr_path = Path(cdr_path)
         self.callback = callback          # асинхронная функция, принимающая список словарей
         self.interval = check_interval
         self.group_timeout = group_timeout
+        self.on_group_started = on_group_started
         self.last_position = 0
         self._task: Optional[asyncio.Task] = None
         self._current_group: List[Dict] = []          # текущая собираемая группа
         self._last_group_time: Optional[float] = None  # время последней записи в группе
+        self._group_start_position: Optional[int] = None  # смещение первой строки текущей группы
+        # Переданные в callback и ещё не обработанные группы: (поколение файла, смещение начала, группа)
+        self._pending_groups: List[Tuple[int, int, List[Dict]]] = []
+        # Увеличивается при ротации и усечении: смещения прежних поколений к текущему файлу не относятся
+        self._generation = 0
+        self._file: Optional[BinaryIO] = None
+        self._inode: Optional[int] = None
+        self._checkpoint = OffsetCheckpointStore(checkpoint_path) if checkpoint_path else None
+        self._last_saved_checkpoint: Optional[FileCheckpoint] = None
+        self._watcher = DirectoryWatcher(
+            self.cdr_path.parent,
+            IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO,
+        )
 
     async def start(self):
         """Запускает мониторинг файла."""
@@ -27,45 +76,104 @@ class CDRMonitor:
         while not self.cdr_path.exists():
             await asyncio.sleep(self.interval)
 
-        # Сразу переходим в конец файла, чтобы не читать старые записи
-        with open(self.cdr_path, 'r', encoding='utf-8') as f:
-            f.seek(0, os.SEEK_END)
-            self.last_position = f.tell()
-
+        self._open_file()
+        self.last_position = self._resolve_start_position()
+        logger.info("CDRMonitor started for %s at offset %s", self.cdr_path, self.last_position)
+        self._watcher.start()
         self._task = asyncio.create_task(self._run())
 
+    def _resolve_start_position(self) -> int:
+        size = os.fstat(self._file.fileno()).st_size
+        checkpoint = self._checkpoint.load() if self._checkpoint else None
+        if checkpoint is None:
+            # Первый запуск без контрольной точки: не читаем старые записи
+            return size
+        if checkpoint.inode != self._inode:
+            logger.warning("CDR file was rotated while the bot was stopped; reading %s from the start", self.cdr_path)
+            return 0
+        if size < checkpoint.offset:
+            logger.warning("CDR file was truncated while the bot was stopped; reading %s from the start", self.cdr_path)
+            return 0
+        return checkpoint.offset
+
+    def _open_file(self) -> None:
+        if self._file:
+            self._file.close()
+        self._file = open(self.cdr_path, 'rb')
+        self._inode = os.fstat(self._file.fileno()).st_ino
+
     async def _run(self):
-        """Основной цикл проверки новых строк и таймаута группы."""
+        """Основной цикл: ожидание событий файла, чтение новых строк и проверка таймаута группы."""
         while True:
-            await asyncio.sleep(self.interval)
+            await self._watcher.wait(self.interval)
             try:
                 await self._check_new_cdrs()
                 await self._check_group_timeout()
-            except Exception as e:
+            except Exception:
                 # Логируем ошибку, но не останавливаем цикл
-                print(f"CDRMonitor error: {e}")
+                logger.exception("CDRMonitor error")
 
     async def _check_new_cdrs(self):
         """Проверяет, появились ли новые строки в файле, и добавляет их в группу."""
-        if not self.cdr_path.exists():
+        if self._file is None:
             return
 
-        with open(self.cdr_path, 'r', encoding='utf-8') as f:
-            f.seek(self.last_position)
-            new_lines = f.readlines()
-            if not new_lines:
-                return
-            self.last_position = f.tell()
-
-        # Парсим CSV. Предполагается, что в файле нет заголовка.
-        fieldnames = [
-            "accountcode", "src", "dst", "dcontext", "clid", "channel", "dstchannel",
-            "lastapp", "lastdata", "start", "answer", "end", "duration", "billsec",
-            "disposition", "amaflags", "uniqueid", "userfield"
-        ]
-        reader = csv.DictReader(new_lines, fieldnames=fieldnames)
-
-        for row in reader:
+        # Сначала дочитываем текущий дескриптор: после ротации он указывает на старый файл
+        await self._consume_lines(self._read_complete_lines())
+        if self._reopen_if_rotated():
+            await self._consume_lines(self._read_complete_lines())
+        self._save_checkpoint()
+
+    def _read_complete_lines(self) -> List[Tuple[int, str]]:
+        """Читает только завершённые строки; возвращает пары (смещение строки, текст)."""
+        self._file.seek(self.last_position)
+        data = self._file.read()
+        end = data.rfind(b'\n')
+        if end < 0:
+            return []
+
+        entries = []
+        position = self.last_position
+        for raw in data[:end + 1].split(b'\n')[:-1]:
+            entries.append((position, raw.decode('utf-8', errors='replace')))
+            position += len(raw) + 1
+        self.last_position = position
+        return entries
+
+    def _reopen_if_rotated(self) -> bool:
+        try:
+            st = os.stat(self.cdr_path)
+        except FileNotFoundError:
+            return False
+
+        if st.st_ino != self._inode:
+            logger.info("CDR file rotation detected: %s", self.cdr_path)
+            self._open_file()
+            if self._current_group:
+                # Строки группы остались в прежнем файле, но её продолжение придёт уже из нового
+                self._group_start_position = 0
+        elif st.st_size < self.last_position:
+            logger.warning("CDR file truncation detected: %s", self.cdr_path)
+            if self._current_group:
+                # Строк группы в файле больше нет: ни дособрать, ни перечитать её нельзя
+                logger.warning("Dropping an unfinished CDR group of %s records after truncation", len(self._current_group))
+                self._reset_group()
+        else:
+            return False
+
+        self.last_position = 0
+        self._generation += 1
+        return True
+
+    async def _consume_lines(self, entries: List[Tuple[int, str]]):
+        for position, line in entries:
+            if not line.strip():
+                continue
+            # Парсим CSV. Предполагается, что в файле нет заголовка.
+            row = next(csv.DictReader([line], fieldnames=_CDR_FIELDNAMES), None)
+            if not row:
+                continue
+
             # Пропускаем технические вызовы без src/dst
             if not row.get('src') or not row.get('dst'):
                 continue
@@ -85,12 +193,59 @@ class CDRMonitor:
                 else:
                     # Запись не подходит – отправляем старую группу и начинаем новую
                     await self._flush_group()
-                    self._current_group = [row]
-                    self._last_group_time = asyncio.get_event_loop().time()
+                    self._start_group(row, position)
             else:
                 # Группа пуста – начинаем новую
-                self._current_group = [row]
-                self._last_group_time = asyncio.get_event_loop().time()
+                self._start_group(row, position)
+
+    def _start_group(self, row: Dict, position: int):
+        self._current_group = [row]
+        self._group_start_position = position
+        self._last_group_time = asyncio.get_event_loop().time()
+        if self.on_group_started:
+            asyncio.create_task(self._notify_group_started(row))
+
+    async def _notify_group_started(self, row: Dict):
+        try:
+            await self.on_group_started(row)
+        except Exception:
+            logger.exception("CDR group start hook failed")
+
+    def group_done(self, group: List[Dict]):
+        """Отмечает группу, переданную в callback, обработанной и сдвигает контрольную точку."""
+        if self._forget_group(group):
+            self._save_checkpoint()
+
+    def _forget_group(self, group: List[Dict]) -> bool:
+        for index, (_, _, pending) in enumerate(self._pending_groups):
+            if pending is group:
+                del self._pending_groups[index]
+                return True
+        return False
+
+    def _checkpoint_offset(self) -> int:
+        offsets = [self.last_position]
+        if self._current_group and self._group_start_position is not None:
+            # Незавершённая группа будет собрана заново из файла
+            offsets.append(self._group_start_position)
+        # Необработанные группы будут прочитаны заново; группы прежних поколений из файла не вернуть
+        offsets.extend(offset for generation, offset, _ in self._pending_groups if generation == self._generation)
+        return min(offsets)
+
+    def _save_checkpoint(self):
+        """Сохраняет позицию, с которой нужно продолжить чтение после перезапуска."""
+        if not self._checkpoint or self._file is None:
+            return
+        offset = self._checkpoint_offset()
+        checkpoint = FileCheckpoint(
+            inode=self._inode,
+            size=os.fstat(self._file.fileno()).st_size,
+            offset=offset,
+        )
+        if checkpoint == self._last_saved_checkpoint:
+            return
+        self._checkpoint.save(checkpoint)
+        self._last_saved_checkpoint = checkpoint
 
     def _time_diff(self, row1: Dict, row2: Dict) -> float:
         """
@@ -113,10 +268,23 @@ class CDRMonitor:
             now = asyncio.get_event_loop().time()
             if now - self._last_group_time > self.group_timeout:
                 await self._flush_group()
+                self._save_checkpoint()
 
     async def _flush_group(self):
         """Отправляет текущую группу через callback и очищает её."""
         if self._current_group:
-            await self.callback(self._current_group)
-            self._current_group = []
-            self._last_group_time = None
+            group = self._current_group
+            start_position = self._group_start_position if self._group_start_position is not None else self.last_position
+            self._pending_groups.append((self._generation, start_position, group))
+            self._reset_group()
+            try:
+                await self.callback(group)
+            except Exception:
+                # Группа не принята обработчиком, и group_done для неё не будет
+                self._forget_group(group)
+                raise
+
+    def _reset_group(self):
+        self._current_group = []
+        self._last_group_time = None
+        self._group_start_position = None
@@ -0,0 +1,142 @@
+import asyncio
+import ctypes
+import ctypes.util
+import json
+import logging
+import os
+import struct
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+
+_EVENT_HEADER = struct.Struct('iIII')
+_READ_SIZE = 64 * 1024
+
+
+class DirectoryWatcher:
+    """
+    Наблюдение за каталогом через inotify (Linux) с откатом на опрос.
+    wait() возвращается при событии в каталоге или по таймауту, поэтому
+    вызывающий код работает одинаково и с inotify, и без него.
+    """
+
+    def __init__(self, directory: str | Path, mask: int):
+        self.directory = Path(directory)
+        self.mask = mask
+        self._fd: int | None = None
+        self._event = asyncio.Event()
+        self._pending: list[tuple[int, str]] = []
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+    @property
+    def uses_inotify(self) -> bool:
+        return self._fd is not None
+
+    def start(self) -> None:
+        if self._fd is not None:
+            return
+        try:
+            libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+            fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+            if fd < 0:
+                raise OSError(ctypes.get_errno(), 'inotify_init1 failed')
+            wd = libc.inotify_add_watch(fd, os.fsencode(str(self.directory)), ctypes.c_uint32(self.mask))
+            if wd < 0:
+                errno = ctypes.get_errno()
+                os.close(fd)
+                raise OSError(errno, f'inotify_add_watch failed for {self.directory}')
+            self._loop = asyncio.get_running_loop()
+            self._loop.add_reader(fd, self._on_readable)
+            self._fd = fd
+            logger.info('inotify watch started for %s', self.directory)
+        except (AttributeError, OSError) as exc:
+            logger.warning('inotify is unavailable for %s, falling back to polling: %s', self.directory, exc)
+            self._fd = None
+
+    def close(self) -> None:
+        if self._fd is None:
+            return
+        try:
+            if self._loop:
+                self._loop.remove_reader(self._fd)
+        finally:
+            os.close(self._fd)
+            self._fd = None
+
+    async def wait(self, timeout: float) -> list[tuple[int, str]]:
+        """Ждёт событий не дольше timeout секунд и возвращает список (mask, имя файла)."""
+        if self._fd is None:
+            await asyncio.sleep(timeout)
+            return []
+        if not self._event.is_set():
+            try:
+                await asyncio.wait_for(self._event.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+        self._event.clear()
+        events, self._pending = self._pending, []
+        return events
+
+    def _on_readable(self) -> None:
+        try:
+            data = os.read(self._fd, _READ_SIZE)
+        except BlockingIOError:
+            return
+        except OSError:
+            logger.exception('Failed to read inotify events for %s', self.directory)
+            return
+
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            _wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].split(b'\0', 1)[0].decode(errors='ignore')
+            offset += name_len
+            self._pending.append((mask, name))
+        self._event.set()
+
+
+@dataclass
+class FileCheckpoint:
+    inode: int
+    size: int
+    offset: int
+
+
+class OffsetCheckpointStore:
+    """Атомарно сохраняет позицию чтения файла (offset + inode + size) на диск."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+
+    def load(self) -> FileCheckpoint | None:
+        try:
+            payload = json.loads(self.path.read_text(encoding='utf-8'))
+            return FileCheckpoint(
+                inode=int(payload['inode']),
+                size=int(payload['size']),
+                offset=int(payload['offset']),
+            )
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception('Failed to read checkpoint %s', self.path)
+            return None
+
+    def save(self, checkpoint: FileCheckpoint) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_name(f'{self.path.name}.tmp')
+            tmp_path.write_text(json.dumps(asdict(checkpoint)), encoding='utf-8')
+            os.replace(tmp_path, self.path)
+        except Exception:
+            logger.exception('Failed to store checkpoint %s', self.path)
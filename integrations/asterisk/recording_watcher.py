@@ -0,0 +1,110 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from pathlib import Path
+
+from integrations.asterisk.file_watch import IN_CLOSE_WRITE, IN_MOVED_TO, IN_Q_OVERFLOW, DirectoryWatcher
+
+logger = logging.getLogger(__name__)
+
+_WAV_HEADER_SIZE = 44
+_REMEMBERED_RECORDINGS = 1000
+
+
+class RecordingWatcher:
+    """
+    Сообщает о записях разговоров, которые Asterisk закончил писать: по inotify
+    IN_CLOSE_WRITE / IN_MOVED_TO, а без inotify — когда размер файла не меняется
+    stable_seconds секунд. Каждая запись передаётся в on_recording один раз;
+    файлы, существовавшие до запуска, пропускаются.
+    """
+
+    def __init__(
+        self,
+        directory: str | Path,
+        on_recording: Callable[[Path], None],
+        poll_interval: float = 2.0,
+        stable_seconds: float = 3.0,
+        suffix: str = '.wav',
+    ):
+        self.directory = Path(directory)
+        self.on_recording = on_recording
+        self.poll_interval = poll_interval
+        self.stable_seconds = stable_seconds
+        self.suffix = suffix
+        self._watcher = DirectoryWatcher(self.directory, IN_CLOSE_WRITE | IN_MOVED_TO)
+        self._task: asyncio.Task | None = None
+        self._started_at = 0.0
+        self._sizes: dict[str, int] = {}
+        self._seen: OrderedDict[str, None] = OrderedDict()
+
+    def start(self) -> None:
+        if self._task is not None:
+            return
+        self._started_at = time.time()
+        self._watcher.start()
+        self._task = asyncio.create_task(self._run(), name='recording-watcher')
+        logger.info('Recording watcher started for %s', self.directory)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._watcher.close()
+
+    async def _run(self) -> None:
+        while True:
+            events = await self._watcher.wait(self.poll_interval)
+            try:
+                if not self._watcher.uses_inotify or any(mask & IN_Q_OVERFLOW for mask, _ in events):
+                    self._scan_stable_files()
+                    continue
+                for mask, name in events:
+                    if mask & (IN_CLOSE_WRITE | IN_MOVED_TO) and name.endswith(self.suffix):
+                        self._emit(self.directory / name)
+            except Exception:
+                logger.exception('Recording watcher failed to process events in %s', self.directory)
+
+    def _scan_stable_files(self) -> None:
+        now = time.time()
+        sizes: dict[str, int] = {}
+        try:
+            entries = list(os.scandir(self.directory))
+        except FileNotFoundError:
+            return
+        for entry in entries:
+            if not entry.name.endswith(self.suffix) or entry.name in self._seen:
+                continue
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            if stat.st_mtime < self._started_at:
+                continue
+            if self._sizes.get(entry.name) == stat.st_size and now - stat.st_mtime >= self.stable_seconds:
+                self._emit(Path(entry.path))
+            else:
+                sizes[entry.name] = stat.st_size
+        self._sizes = sizes
+
+    def _emit(self, path: Path) -> None:
+        if path.name in self._seen:
+            return
+        try:
+            if path.stat().st_size <= _WAV_HEADER_SIZE:
+                return
+        except FileNotFoundError:
+            return
+        self._seen[path.name] = None
+        while len(self._seen) > _REMEMBERED_RECORDINGS:
+            self._seen.popitem(last=False)
+        logger.info('Recording closed: %s', path)
+        try:
+            self.on_recording(path)
+        except Exception:
+            logger.exception('Recording callback failed for %s', path)
@@ -4,6 +4,7 @@ import mimetypes
 import os
 import smtplib
 from email.message import EmailMessage
+from email.utils import make_msgid, parseaddr
 from typing import Iterable
 
 from services.formatters.email_html import html_to_plain_text
@@ -22,11 +23,20 @@ class EmailSender:
         body: str,
         attachments: list[tuple[str, str]],
         body_html: str | None = None,
-    ) -> None:
+        in_reply_to: str | None = None,
+    ) -> str | None:
         recipient_list = [x for x in recipients if x]
         if not recipient_list:
-            return
-        await asyncio.to_thread(self._send_blocking, recipient_list, subject, body, attachments, body_html)
+            return None
+        return await asyncio.to_thread(
+            self._send_blocking,
+            recipient_list,
+            subject,
+            body,
+            attachments,
+            body_html,
+            in_reply_to,
+        )
 
     def _send_blocking(
         self,
@@ -35,11 +45,17 @@ class EmailSender:
         body: str,
         attachments: list[tuple[str, str]],
         body_html: str | None = None,
-    ) -> None:
+        in_reply_to: str | None = None,
+    ) -> str:
         msg = EmailMessage()
+        message_id = make_msgid(domain=self._message_id_domain())
         msg["From"] = self.config.EMAIL_FROM
         msg["To"] = ", ".join(recipients)
         msg["Subject"] = subject
+        msg["Message-ID"] = message_id
+        if in_reply_to:
+            msg["In-Reply-To"] = in_reply_to
+            msg["References"] = in_reply_to
         msg.set_content(html_to_plain_text(body_html) if body_html else body)
         if body_html:
             msg.add_alternative(body_html, subtype="html")
@@ -66,6 +82,13 @@ class EmailSender:
                     smtp.ehlo()
                 self._login_if_needed(smtp)
                 smtp.send_message(msg)
+        return message_id
+
+    def _message_id_domain(self) -> str | None:
+        address = parseaddr(self.config.EMAIL_FROM or "")[1]
+        if "@" not in address:
+            return None
+        return address.rsplit("@", 1)[1] or None
 
     def _login_if_needed(self, smtp) -> None:
         if self.config.EMAIL_SMTP_USER:
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Бенчмарк очереди неотправленных сообщений Telegram.
+
+    python -m integrations.telegram.queue_bench --items 10000
+    python -m integrations.telegram.queue_bench --items 10000 --legacy-items 2000
+
+Наполняет очередь и разбирает её так же, как DeliveryHub после восстановления связи (без сети):
+журнал (дозапись подтверждения на каждое сообщение) против прежней схемы, где после каждого
+отправленного сообщения файл очереди переписывался целиком. Прежняя схема квадратична,
+поэтому по умолчанию замеряется на меньшем числе сообщений (--legacy-items).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import tempfile
+import time
+from dataclasses import asdict
+from pathlib import Path
+
+from domain.models import ResponseItem
+from integrations.telegram.queue_store import QueuedTelegramMessage, TelegramQueueJournal
+
+
+def _item(index: int) -> ResponseItem:
+    return ResponseItem(kind='text', text=f'SMS #{index}: код подтверждения {index:06d}, не сообщайте его никому')
+
+
+def bench_journal(path: Path, items: int) -> tuple[float, float, int]:
+    journal = TelegramQueueJournal(path)
+    started = time.perf_counter()
+    for index in range(items):
+        journal.append(123456789, _item(index), 'NetworkError: bench')
+    enqueue_seconds = time.perf_counter() - started
+
+    journal = TelegramQueueJournal(path)
+    started = time.perf_counter()
+    journal.load()
+    for queued in journal.pending():
+        journal.ack(queued.entry_id)
+    journal.sync()
+    if journal.needs_compaction():
+        journal.compact()
+    drain_seconds = time.perf_counter() - started
+    journal.close()
+    return enqueue_seconds, drain_seconds, path.stat().st_size if path.exists() else 0
+
+
+def bench_legacy(path: Path, items: int) -> tuple[float, float]:
+    """Прежний алгоритм: чтение и перезапись всей очереди на каждую постановку и каждое подтверждение."""
+    def store(queue: list[QueuedTelegramMessage]) -> None:
+        with path.open('w', encoding='utf-8') as f:
+            for queued in queue:
+                f.write(json.dumps({'chat_id': queued.chat_id, 'item': asdict(queued.item), 'created_at': queued.created_at, 'last_error': queued.last_error}, ensure_ascii=False))
+                f.write('\n')
+
+    def load() -> list[QueuedTelegramMessage]:
+        if not path.exists():
+            return []
+        queue = []
+        for line in path.read_text(encoding='utf-8').splitlines():
+            payload = json.loads(line)
+            queue.append(QueuedTelegramMessage(payload['chat_id'], ResponseItem(**payload['item']), payload['created_at'], payload['last_error']))
+        return queue
+
+    started = time.perf_counter()
+    for index in range(items):
+        queue = load()
+        queue.append(QueuedTelegramMessage(123456789, _item(index), 'bench', 'NetworkError: bench'))
+        store(queue)
+    enqueue_seconds = time.perf_counter() - started
+
+    started = time.perf_counter()
+    remaining = load()
+    while remaining:
+        remaining.pop(0)
+        store(remaining)
+    drain_seconds = time.perf_counter() - started
+    return enqueue_seconds, drain_seconds
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark the Telegram retry queue: journal vs rewrite-whole-file.')
+    parser.add_argument('--items', type=int, default=10000, help='Backlog size for the journal. Default: 10000')
+    parser.add_argument('--legacy-items', type=int, default=1000, help='Backlog size for the old rewrite-per-item queue (0 — skip). Default: 1000')
+    parser.add_argument('--dir', default=None, help='Directory for the queue files, e.g. on the SD card. Default: system temp dir')
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    with tempfile.TemporaryDirectory(prefix='tg_queue_bench_', dir=args.dir) as tmp_dir_str:
+        tmp_dir = Path(tmp_dir_str)
+        print(f'{"queue":<10} {"items":>7} {"enqueue s":>10} {"drain s":>9} {"drain/item ms":>14}')
+        enqueue, drain, size_after = bench_journal(tmp_dir / 'journal.queue', args.items)
+        print(f'{"journal":<10} {args.items:>7} {enqueue:>10.2f} {drain:>9.2f} {drain / max(1, args.items) * 1000:>14.3f}')
+        if args.legacy_items:
+            enqueue, drain = bench_legacy(tmp_dir / 'legacy.queue', args.legacy_items)
+            print(f'{"legacy":<10} {args.legacy_items:>7} {enqueue:>10.2f} {drain:>9.2f} {drain / args.legacy_items * 1000:>14.3f}')
+        print(f'Journal size after drain and compaction: {size_after} bytes', flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -1,5 +1,6 @@
 import json
 import logging
+import os
 import re
 from dataclasses import asdict, dataclass
 from datetime import datetime
@@ -13,7 +14,7 @@ FAILED_TG_QUEUE = Path("/opt/sms/failed_telegram.queue")
 LEGACY_QUEUE_BLOCK_RE = re.compile(
     r"(?ms)^--- (?P<created_at>.+?) ---\n"
     r"chat_id=(?P<chat_id>\d+)\n"
-    r"(?:last_error=.*\n)?"
+    r"(?:last_error=[^\n]*\n)?"
     r"(?P<text>.*?)(?=^--- .+? ---\n|\Z)"
 )
 
@@ -24,69 +25,222 @@ class QueuedTelegramMessage:
     item: ResponseItem
     created_at: str
     last_error: str | None = None
+    entry_id: int = 0
 
 
-def append_failed_message(chat_id: int, item: ResponseItem, last_error: str | None) -> None:
-    queue = load_failed_queue()
-    queue.append(
-        QueuedTelegramMessage(
+class TelegramQueueJournal:
+    """
+    Очередь неотправленных сообщений Telegram в виде журнала: постановка в очередь и подтверждение
+    отправки дописываются в конец файла строками {"op": "enqueue" | "ack", "id": ...}, поэтому разбор
+    очереди из N сообщений стоит N коротких дозаписей, а не N перезаписей всего файла.
+    Постановка сразу сбрасывается на диск (fsync), подтверждения — пачками по sync_every и в sync();
+    потерянное при сбое подтверждение означает лишь повторную отправку. Файл переписывается
+    одними живыми записями в compact(), когда подтверждённых записей становится больше живых.
+
+    Файл читается один раз в load(); дальше источником правды служит копия очереди в памяти,
+    а журнал только дописывается (write-through), поэтому len() и pending() не трогают диск.
+    """
+
+    def __init__(self, path: str | Path = FAILED_TG_QUEUE, sync_every: int = 64, compact_min_records: int = 256):
+        self.path = Path(path)
+        self.sync_every = max(1, int(sync_every))
+        self.compact_min_records = max(1, int(compact_min_records))
+        self._handle = None
+        self._loaded = False
+        self._next_id = 1
+        self._pending: dict[int, QueuedTelegramMessage] = {}
+        self._records = 0
+        self._unsynced = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def load(self) -> list[QueuedTelegramMessage]:
+        """Восстанавливает очередь из журнала при первом вызове (старые форматы файла переписываются в журнал)."""
+        if self._loaded:
+            return self.pending()
+        queue, migrated = self._replay()
+        self._pending = {queued.entry_id: queued for queued in queue}
+        self._loaded = True
+        if queue:
+            logger.info('Telegram queue %s loaded: %s item(s)', self.path, len(queue))
+        if migrated:
+            logger.info('Converting Telegram queue %s to the journal format: %s item(s)', self.path, len(queue))
+            self._rewrite(queue)
+        return queue
+
+    def pending(self) -> list[QueuedTelegramMessage]:
+        return list(self._pending.values())
+
+    def append(self, chat_id: int, item: ResponseItem, last_error: str | None) -> QueuedTelegramMessage:
+        if not self._loaded:
+            self.load()
+        queued = QueuedTelegramMessage(
             chat_id=chat_id,
             item=item,
             created_at=datetime.now().isoformat(timespec="seconds"),
             last_error=last_error,
+            entry_id=self._next_id,
         )
-    )
-    store_failed_queue(queue)
-
-
-def load_failed_queue() -> list[QueuedTelegramMessage]:
-    if not FAILED_TG_QUEUE.exists():
-        return []
-    raw = FAILED_TG_QUEUE.read_text(encoding="utf-8").strip()
-    if not raw:
-        return []
-    if raw.startswith("{"):
-        return _parse_json_queue(raw)
-    return _parse_legacy_queue(raw)
-
-
-def store_failed_queue(queue: list[QueuedTelegramMessage]) -> None:
-    if not queue:
-        if FAILED_TG_QUEUE.exists():
-            FAILED_TG_QUEUE.unlink()
-        return
-    FAILED_TG_QUEUE.parent.mkdir(parents=True, exist_ok=True)
-    with FAILED_TG_QUEUE.open("w", encoding="utf-8") as f:
-        for queued in queue:
-            payload = {
-                "chat_id": queued.chat_id,
-                "item": asdict(queued.item),
-                "created_at": queued.created_at,
-                "last_error": queued.last_error,
-            }
-            f.write(json.dumps(payload, ensure_ascii=False))
-            f.write("\n")
+        self._next_id += 1
+        self._pending[queued.entry_id] = queued
+        try:
+            self._write(_enqueue_record(queued))
+            self.sync()
+        except OSError:
+            # Сообщение остаётся в памяти и уйдёт при следующей отправке, но перезапуск не переживёт
+            logger.exception('Failed to persist Telegram queue item to %s', self.path)
+        return queued
 
+    def ack(self, entry_id: int) -> None:
+        if self._pending.pop(entry_id, None) is None:
+            return
+        try:
+            self._write({"op": "ack", "id": entry_id})
+            if self._unsynced >= self.sync_every:
+                self.sync()
+        except OSError:
+            logger.exception('Failed to persist Telegram queue ack to %s', self.path)
 
-def _parse_json_queue(raw: str) -> list[QueuedTelegramMessage]:
-    queue = []
-    for line in raw.splitlines():
-        line = line.strip()
-        if not line:
-            continue
+    def sync(self) -> None:
+        if self._handle is None or not self._unsynced:
+            return
+        self._handle.flush()
+        os.fsync(self._handle.fileno())
+        self._unsynced = 0
+
+    def needs_compaction(self) -> bool:
+        dead = self._records - len(self._pending)
+        return dead >= self.compact_min_records and dead > len(self._pending)
+
+    def compact(self) -> int:
+        """Переписывает журнал одними неподтверждёнными записями; возвращает число выброшенных строк."""
+        self.sync()
+        queue = self.pending()
+        before = self._records
+        self._rewrite(queue)
+        dropped = before - self._records
+        logger.info('Telegram queue journal compacted: %s live item(s), %s record(s) dropped', len(queue), dropped)
+        return dropped
+
+    def close(self) -> None:
+        self.sync()
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+
+    def _write(self, record: dict) -> None:
+        if self._handle is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = self.path.open("a", encoding="utf-8")
+            if self._ends_with_torn_line():
+                # Иначе следующая запись склеится с обрезанной строкой и тоже потеряется
+                self._handle.write("\n")
+        self._handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # После flush запись переживает падение процесса и без fsync (но не отключение питания)
+        self._handle.flush()
+        self._records += 1
+        self._unsynced += 1
+
+    def _ends_with_torn_line(self) -> bool:
         try:
-            payload = json.loads(line)
-            queue.append(
-                QueuedTelegramMessage(
-                    chat_id=int(payload["chat_id"]),
-                    item=ResponseItem(**payload["item"]),
-                    created_at=payload.get("created_at") or datetime.now().isoformat(timespec="seconds"),
-                    last_error=payload.get("last_error"),
-                )
-            )
-        except Exception:
-            logger.exception("Failed to parse Telegram queue line: %s", line)
-    return queue
+            with self.path.open("rb") as f:
+                f.seek(-1, os.SEEK_END)
+                return f.read(1) != b"\n"
+        except OSError:
+            # Пустой файл: seek за начало невозможен
+            return False
+
+    def _replay(self) -> tuple[list[QueuedTelegramMessage], bool]:
+        if not self.path.exists():
+            self._records = 0
+            return [], False
+        raw = self.path.read_text(encoding="utf-8").strip()
+        if not raw:
+            self._records = 0
+            return [], False
+        if not raw.startswith("{"):
+            queue = _parse_legacy_queue(raw)
+            self._assign_ids(queue)
+            return queue, True
+
+        live: dict[int, QueuedTelegramMessage] = {}
+        migrated = False
+        records = 0
+        for line in raw.splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                payload = json.loads(line)
+                op = payload.get("op")
+                if op == "ack":
+                    live.pop(int(payload["id"]), None)
+                elif op == "enqueue":
+                    queued = _queued_from_payload(payload)
+                    queued.entry_id = int(payload["id"])
+                    live[queued.entry_id] = queued
+                    self._next_id = max(self._next_id, queued.entry_id + 1)
+                else:
+                    # Строка прежнего формата (одно сообщение без op/id)
+                    queued = _queued_from_payload(payload)
+                    queued.entry_id = self._take_id()
+                    live[queued.entry_id] = queued
+                    migrated = True
+                records += 1
+            except Exception:
+                # Обрезанная последняя строка после сбоя питания — не повод терять остальную очередь
+                logger.exception("Failed to parse Telegram queue line: %s", line)
+        self._records = records
+        return list(live.values()), migrated
+
+    def _take_id(self) -> int:
+        entry_id = self._next_id
+        self._next_id += 1
+        return entry_id
+
+    def _assign_ids(self, queue: list[QueuedTelegramMessage]) -> None:
+        for queued in queue:
+            queued.entry_id = self._take_id()
+
+    def _rewrite(self, queue: list[QueuedTelegramMessage]) -> None:
+        if self._handle is not None:
+            self._handle.close()
+            self._handle = None
+        self._unsynced = 0
+        self._records = len(queue)
+        if not queue:
+            if self.path.exists():
+                self.path.unlink()
+            return
+        tmp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with tmp_path.open("w", encoding="utf-8") as f:
+            for queued in queue:
+                f.write(json.dumps(_enqueue_record(queued), ensure_ascii=False))
+                f.write("\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+
+def _enqueue_record(queued: QueuedTelegramMessage) -> dict:
+    return {
+        "op": "enqueue",
+        "id": queued.entry_id,
+        "chat_id": queued.chat_id,
+        "item": asdict(queued.item),
+        "created_at": queued.created_at,
+        "last_error": queued.last_error,
+    }
+
+
+def _queued_from_payload(payload: dict) -> QueuedTelegramMessage:
+    return QueuedTelegramMessage(
+        chat_id=int(payload["chat_id"]),
+        item=ResponseItem(**payload["item"]),
+        created_at=payload.get("created_at") or datetime.now().isoformat(timespec="seconds"),
+        last_error=payload.get("last_error"),
+    )
 
 
 def _parse_legacy_queue(raw: str) -> list[QueuedTelegramMessage]:
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+# Telegram допускает короткие всплески в одном чате, если в среднем выдерживается лимит
+_CHAT_BURST = 3.0
+
+
+class TokenBucket:
+    """
+    Ведро токенов: rate токенов в секунду, не больше capacity подряд. reserve() сразу списывает токены
+    (баланс может уйти в минус) и возвращает, сколько ждать, поэтому ожидающие обслуживаются по очереди.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(0.001, float(rate))
+        self.capacity = max(1.0, float(capacity))
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+
+    def reserve(self, cost: float = 1.0) -> float:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+        self._tokens -= cost
+        return max(0.0, -self._tokens / self.rate)
+
+    async def acquire(self, cost: float = 1.0) -> float:
+        wait = self.reserve(cost)
+        if wait:
+            await asyncio.sleep(wait)
+        return wait
+
+
+class TelegramRateLimiter:
+    """
+    Лимиты Bot API: общий на бота (около 30 сообщений в секунду) и на чат — около одного сообщения
+    в секунду в личном чате и 20 в минуту в группе (chat_id < 0).
+    """
+
+    def __init__(self, global_rate: float = 25.0, chat_rate: float = 1.0, group_rate_per_minute: float = 20.0):
+        self.global_bucket = TokenBucket(global_rate, global_rate)
+        self.chat_rate = chat_rate
+        self.group_rate = group_rate_per_minute / 60.0
+        self._chat_buckets: dict[int, TokenBucket] = {}
+
+    @classmethod
+    def from_config(cls, config) -> 'TelegramRateLimiter':
+        return cls(
+            global_rate=config.TELEGRAM_GLOBAL_RATE_PER_SECOND,
+            chat_rate=config.TELEGRAM_CHAT_RATE_PER_SECOND,
+            group_rate_per_minute=config.TELEGRAM_GROUP_RATE_PER_MINUTE,
+        )
+
+    async def acquire(self, chat_id: int, cost: int = 1) -> float:
+        """Ждёт, пока отправка cost сообщений в чат укладывается в оба лимита; возвращает время ожидания."""
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            bucket = TokenBucket(self.group_rate if chat_id < 0 else self.chat_rate, _CHAT_BURST)
+            self._chat_buckets[chat_id] = bucket
+        # Один вызов API (группа документов) не делится: дороже ёмкости ведра он ждёт как полное ведро
+        waited = await bucket.acquire(min(cost, bucket.capacity))
+        waited += await self.global_bucket.acquire(min(cost, self.global_bucket.capacity))
+        return waited
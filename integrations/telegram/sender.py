@@ -1,16 +1,31 @@
 import asyncio
 import logging
 import os
+import time
+from collections.abc import Awaitable, Callable
 
 from domain.models import ResponseItem
 from services.retry_policy import TELEGRAM_RETRY_DELAYS
 from telegram import InputMediaDocument
-from telegram.error import NetworkError, RetryAfter, TimedOut
+from telegram.error import BadRequest, NetworkError, RetryAfter, TimedOut
 
 logger = logging.getLogger(__name__)
 
 _TELEGRAM_TEXT_LIMIT = 4000
 _TELEGRAM_CAPTION_LIMIT = 1000
+# Дольше этого отправка не ждёт окончания RetryAfter сама, а возвращает retryable-ошибку:
+# сообщение попадёт в очередь, и его отправит фоновый разборщик очереди
+_FLOOD_WAIT_INLINE_LIMIT = 5.0
+
+# Ожидание лимита отправки перед каждым вызовом API; аргумент — сколько сообщений он отправит
+Throttle = Callable[[int], Awaitable[object]]
+
+# RetryAfter относится ко всему боту (лимиты Telegram считаются на токен), поэтому пауза общая для всех отправок
+_flood_wait_until = 0.0
+
+
+def telegram_flood_wait_remaining() -> float:
+    return max(0.0, _flood_wait_until - time.monotonic())
 
 
 async def send_tg_safe(app, chat_id: int, text: str, parse_mode: str | None = None, reply_markup=None) -> bool:
@@ -24,20 +39,41 @@ async def send_tg_safe(app, chat_id: int, text: str, parse_mode: str | None = No
     return delivered
 
 
-async def send_tg_item_direct(app, chat_id: int, item: ResponseItem) -> tuple[bool, str | None]:
+async def send_tg_item_direct(
+    app,
+    chat_id: int,
+    item: ResponseItem,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     if item.kind == 'file_group':
-        return await send_tg_document_group_direct(app, chat_id, item)
+        return await send_tg_document_group_direct(app, chat_id, item, sent_message_ids, retry_delays=retry_delays, throttle=throttle)
     if item.kind == 'file':
-        return await send_tg_document_direct(app, chat_id, item)
+        return await send_tg_document_direct(app, chat_id, item, sent_message_ids, retry_delays=retry_delays, throttle=throttle)
     return await send_tg_text_direct(
         app=app,
         chat_id=chat_id,
         text=item.text or '',
         parse_mode=item.parse_mode,
+        reply_to_message_id=item.reply_to_message_id,
+        sent_message_ids=sent_message_ids,
+        retry_delays=retry_delays,
+        throttle=throttle,
     )
 
 
-async def send_tg_text_direct(app, chat_id: int, text: str, parse_mode: str | None = None, reply_markup=None) -> tuple[bool, str | None]:
+async def send_tg_text_direct(
+    app,
+    chat_id: int,
+    text: str,
+    parse_mode: str | None = None,
+    reply_markup=None,
+    reply_to_message_id: int | None = None,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     chunks = split_telegram_text(text or '', _TELEGRAM_TEXT_LIMIT)
     if not chunks:
         chunks = ['']
@@ -50,13 +86,55 @@ async def send_tg_text_direct(app, chat_id: int, text: str, parse_mode: str | No
             text=chunk,
             parse_mode=parse_mode,
             reply_markup=chunk_reply_markup,
+            reply_to_message_id=reply_to_message_id if index == 0 else None,
+            sent_message_ids=sent_message_ids,
+            retry_delays=retry_delays,
+            throttle=throttle,
         )
         if not delivered:
             return False, error_text
     return True, None
 
 
-async def send_tg_document_direct(app, chat_id: int, item: ResponseItem) -> tuple[bool, str | None]:
+async def edit_tg_text_direct(
+    app,
+    chat_id: int,
+    message_id: int,
+    text: str,
+    parse_mode: str | None = None,
+) -> tuple[bool, str | None]:
+    # Одна попытка без повторов: промежуточные правки сообщения не критичны, следующая их заменит
+    if telegram_flood_wait_remaining():
+        return False, 'RetryAfter: flood control'
+    try:
+        await app.bot.edit_message_text(
+            chat_id=chat_id,
+            message_id=message_id,
+            text=(text or '')[:_TELEGRAM_TEXT_LIMIT],
+            parse_mode=parse_mode,
+        )
+        return True, None
+    except RetryAfter as exc:
+        _note_retry_after(exc)
+        return False, f'{type(exc).__name__}: {exc}'
+    except BadRequest as exc:
+        if 'message is not modified' in str(exc).lower():
+            return True, None
+        logger.warning('Telegram message edit rejected for chat_id=%s message_id=%s: %s', chat_id, message_id, exc)
+        return False, f'{type(exc).__name__}: {exc}'
+    except Exception as exc:
+        logger.warning('Telegram message edit failed for chat_id=%s message_id=%s: %s', chat_id, message_id, exc)
+        return False, f'{type(exc).__name__}: {exc}'
+
+
+async def send_tg_document_direct(
+    app,
+    chat_id: int,
+    item: ResponseItem,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     if not item.attachment_path:
         logger.error('Telegram document send skipped: attachment_path is empty')
         return False, 'attachment_path is empty'
@@ -77,16 +155,36 @@ async def send_tg_document_direct(app, chat_id: int, item: ResponseItem) -> tupl
         attachment_name=item.attachment_name,
         caption=caption or None,
         parse_mode=item.parse_mode if not extra_text else None,
+        reply_to_message_id=item.reply_to_message_id,
+        sent_message_ids=sent_message_ids,
+        retry_delays=retry_delays,
+        throttle=throttle,
     )
     if not delivered:
         return False, error_text
 
     if extra_text:
-        return await send_tg_text_direct(app, chat_id, extra_text, parse_mode=item.parse_mode)
+        return await send_tg_text_direct(
+            app,
+            chat_id,
+            extra_text,
+            parse_mode=item.parse_mode,
+            reply_to_message_id=item.reply_to_message_id,
+            sent_message_ids=sent_message_ids,
+            retry_delays=retry_delays,
+            throttle=throttle,
+        )
     return True, None
 
 
-async def send_tg_document_group_direct(app, chat_id: int, item: ResponseItem) -> tuple[bool, str | None]:
+async def send_tg_document_group_direct(
+    app,
+    chat_id: int,
+    item: ResponseItem,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     attachment_paths = [path for path in (item.attachment_paths or []) if path]
     attachment_names = list(item.attachment_names or [])
     if len(attachment_paths) < 2:
@@ -111,32 +209,62 @@ async def send_tg_document_group_direct(app, chat_id: int, item: ResponseItem) -
         attachment_names=attachment_names,
         caption=caption or None,
         parse_mode=item.parse_mode if not extra_text else None,
+        reply_to_message_id=item.reply_to_message_id,
+        sent_message_ids=sent_message_ids,
+        retry_delays=retry_delays,
+        throttle=throttle,
     )
     if not delivered:
         return False, error_text
 
     if extra_text:
-        return await send_tg_text_direct(app, chat_id, extra_text, parse_mode=item.parse_mode)
+        return await send_tg_text_direct(
+            app,
+            chat_id,
+            extra_text,
+            parse_mode=item.parse_mode,
+            reply_to_message_id=item.reply_to_message_id,
+            sent_message_ids=sent_message_ids,
+            retry_delays=retry_delays,
+            throttle=throttle,
+        )
     return True, None
 
 
-async def _send_single_text_message(app, chat_id: int, text: str, parse_mode: str | None = None, reply_markup=None) -> tuple[bool, str | None]:
+async def _send_single_text_message(
+    app,
+    chat_id: int,
+    text: str,
+    parse_mode: str | None = None,
+    reply_markup=None,
+    reply_to_message_id: int | None = None,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     last_exc = None
-    for delay in TELEGRAM_RETRY_DELAYS:
+    for delay in retry_delays:
         if delay:
             await asyncio.sleep(delay)
+        if throttle is not None:
+            await throttle(1)
+        flood_error = await _wait_flood_gate()
+        if flood_error:
+            return False, flood_error
         try:
-            await app.bot.send_message(
+            message = await app.bot.send_message(
                 chat_id=chat_id,
                 text=text,
                 parse_mode=parse_mode,
                 reply_markup=reply_markup,
+                reply_to_message_id=reply_to_message_id,
+                allow_sending_without_reply=True,
             )
+            _remember_message_id(sent_message_ids, message)
             return True, None
         except RetryAfter as exc:
             last_exc = exc
-            retry_after = int(getattr(exc, 'retry_after', 5))
-            await asyncio.sleep(max(1, retry_after))
+            _note_retry_after(exc)
         except (TimedOut, NetworkError) as exc:
             last_exc = exc
         except Exception as exc:
@@ -149,25 +277,43 @@ async def _send_single_text_message(app, chat_id: int, text: str, parse_mode: st
     return False, error_text
 
 
-async def _send_single_document(app, chat_id: int, attachment_path: str, attachment_name: str | None, caption: str | None, parse_mode: str | None) -> tuple[bool, str | None]:
+async def _send_single_document(
+    app,
+    chat_id: int,
+    attachment_path: str,
+    attachment_name: str | None,
+    caption: str | None,
+    parse_mode: str | None,
+    reply_to_message_id: int | None = None,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
+) -> tuple[bool, str | None]:
     last_exc = None
-    for delay in TELEGRAM_RETRY_DELAYS:
+    for delay in retry_delays:
         if delay:
             await asyncio.sleep(delay)
+        if throttle is not None:
+            await throttle(1)
+        flood_error = await _wait_flood_gate()
+        if flood_error:
+            return False, flood_error
         try:
             with open(attachment_path, 'rb') as f:
-                await app.bot.send_document(
+                message = await app.bot.send_document(
                     chat_id=chat_id,
                     document=f,
                     filename=attachment_name or os.path.basename(attachment_path),
                     caption=caption,
                     parse_mode=parse_mode,
+                    reply_to_message_id=reply_to_message_id,
+                    allow_sending_without_reply=True,
                 )
+            _remember_message_id(sent_message_ids, message)
             return True, None
         except RetryAfter as exc:
             last_exc = exc
-            retry_after = int(getattr(exc, 'retry_after', 5))
-            await asyncio.sleep(max(1, retry_after))
+            _note_retry_after(exc)
         except (TimedOut, NetworkError) as exc:
             last_exc = exc
         except Exception as exc:
@@ -187,11 +333,20 @@ async def _send_document_group(
     attachment_names: list[str | None],
     caption: str | None,
     parse_mode: str | None,
+    reply_to_message_id: int | None = None,
+    sent_message_ids: list[int] | None = None,
+    retry_delays: list[float] = TELEGRAM_RETRY_DELAYS,
+    throttle: Throttle | None = None,
 ) -> tuple[bool, str | None]:
     last_exc = None
-    for delay in TELEGRAM_RETRY_DELAYS:
+    for delay in retry_delays:
         if delay:
             await asyncio.sleep(delay)
+        if throttle is not None:
+            await throttle(len(attachment_paths))
+        flood_error = await _wait_flood_gate()
+        if flood_error:
+            return False, flood_error
         files = []
         try:
             media = []
@@ -206,12 +361,17 @@ async def _send_document_group(
                         parse_mode=parse_mode if index == 0 else None,
                     )
                 )
-            await app.bot.send_media_group(chat_id=chat_id, media=media)
+            messages = await app.bot.send_media_group(
+                chat_id=chat_id,
+                media=media,
+                reply_to_message_id=reply_to_message_id,
+                allow_sending_without_reply=True,
+            )
+            _remember_message_id(sent_message_ids, messages[0] if messages else None)
             return True, None
         except RetryAfter as exc:
             last_exc = exc
-            retry_after = int(getattr(exc, 'retry_after', 5))
-            await asyncio.sleep(max(1, retry_after))
+            _note_retry_after(exc)
         except (TimedOut, NetworkError) as exc:
             last_exc = exc
         except Exception as exc:
@@ -230,6 +390,33 @@ async def _send_document_group(
     return False, error_text
 
 
+async def _wait_flood_gate() -> str | None:
+    remaining = telegram_flood_wait_remaining()
+    if remaining > _FLOOD_WAIT_INLINE_LIMIT:
+        return f'RetryAfter: flood control, sending is paused for another {remaining:.0f}s'
+    if remaining:
+        await asyncio.sleep(remaining)
+    return None
+
+
+def _note_retry_after(exc: RetryAfter) -> None:
+    global _flood_wait_until
+    retry_after = getattr(exc, 'retry_after', 5)
+    if hasattr(retry_after, 'total_seconds'):
+        retry_after = retry_after.total_seconds()
+    retry_after = max(1.0, float(retry_after))
+    _flood_wait_until = max(_flood_wait_until, time.monotonic() + retry_after)
+    logger.warning('Telegram flood control: all sends are paused for %.0fs', retry_after)
+
+
+def _remember_message_id(sent_message_ids: list[int] | None, message) -> None:
+    if sent_message_ids is None or message is None:
+        return
+    message_id = getattr(message, 'message_id', None)
+    if message_id is not None:
+        sent_message_ids.append(int(message_id))
+
+
 def split_telegram_text(text: str, limit: int) -> list[str]:
     value = (text or '').strip()
     if value == '':
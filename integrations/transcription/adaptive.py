@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from types import SimpleNamespace
+from typing import Any
+
+FULL_PROFILE = 'full'
+FAST_PROFILE = 'fast'
+
+
+@dataclass
+class QualityProfile:
+    """Выбранное для задания качество распознавания; попадает в итоговый JSON как 'quality'."""
+    name: str
+    model: str
+    beam_size: int
+    reason: str
+    backlog: int
+    duration_seconds: float | None
+
+    @property
+    def is_fast(self) -> bool:
+        return self.name == FAST_PROFILE
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+
+def adaptive_quality_enabled(config) -> bool:
+    return bool(config.CALL_TRANSCRIBE_FAST_MODEL)
+
+
+def choose_quality_profile(config, duration_seconds: float | None, backlog: int) -> QualityProfile:
+    """
+    Быстрый профиль (CALL_TRANSCRIBE_FAST_MODEL / _FAST_BEAM_SIZE) включается, когда впереди
+    накопилось не меньше CALL_TRANSCRIBE_FAST_BACKLOG записей, или когда запись длиннее
+    CALL_TRANSCRIBE_FAST_LONG_SECONDS и её ждёт хотя бы одна другая.
+    """
+    reason = None
+    if adaptive_quality_enabled(config):
+        backlog_threshold = int(config.CALL_TRANSCRIBE_FAST_BACKLOG or 0)
+        long_seconds = float(config.CALL_TRANSCRIBE_FAST_LONG_SECONDS or 0)
+        if backlog_threshold and backlog >= backlog_threshold:
+            reason = f'backlog {backlog} >= {backlog_threshold}'
+        elif long_seconds and backlog and duration_seconds and duration_seconds >= long_seconds:
+            reason = f'{duration_seconds:.0f}s recording with backlog {backlog}'
+
+    if reason is None:
+        return full_quality_profile(config, duration_seconds, backlog, 'idle' if not backlog else f'backlog {backlog}')
+    return QualityProfile(
+        name=FAST_PROFILE,
+        model=config.CALL_TRANSCRIBE_FAST_MODEL,
+        beam_size=int(config.CALL_TRANSCRIBE_FAST_BEAM_SIZE),
+        reason=reason,
+        backlog=backlog,
+        duration_seconds=duration_seconds,
+    )
+
+
+def full_quality_profile(config, duration_seconds: float | None, backlog: int, reason: str) -> QualityProfile:
+    return QualityProfile(
+        name=FULL_PROFILE,
+        model=config.CALL_TRANSCRIBE_MODEL,
+        beam_size=int(config.CALL_TRANSCRIBE_BEAM_SIZE),
+        reason=reason,
+        backlog=backlog,
+        duration_seconds=duration_seconds,
+    )
+
+
+def fast_profile_config(config) -> SimpleNamespace:
+    values = {name: getattr(config, name) for name in dir(config) if name.startswith('CALL_TRANSCRIBE_')}
+    values.update(
+        CALL_TRANSCRIBE_MODEL=config.CALL_TRANSCRIBE_FAST_MODEL,
+        CALL_TRANSCRIBE_BEAM_SIZE=int(config.CALL_TRANSCRIBE_FAST_BEAM_SIZE),
+        CALL_TRANSCRIBE_FAST_MODEL='',
+        CALL_TRANSCRIBE_TUNING_FILE=None,
+        # Быстрый профиль работает в том же процессе, что и полный, и не поднимает
+        # ни второй процесс-воркер, ни второй пул процессов для оконного режима
+        CALL_TRANSCRIBE_WORKER_PROCESS=False,
+        CALL_TRANSCRIBE_WINDOW_SECONDS=0,
+    )
+    return SimpleNamespace(**values)
@@ -0,0 +1,304 @@
+from __future__ import annotations
+
+import logging
+import mmap
+import os
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+WHISPER_SAMPLE_RATE = 16000
+
+_WAVE_FORMAT_PCM = 0x0001
+_WAVE_FORMAT_IEEE_FLOAT = 0x0003
+_WAVE_FORMAT_EXTENSIBLE = 0xFFFE
+
+# dtype и делитель для приведения к float32 в диапазоне [-1, 1]
+_PCM_DTYPES = {
+    (_WAVE_FORMAT_PCM, 8): (np.dtype('u1'), 128.0, 128.0),
+    (_WAVE_FORMAT_PCM, 16): (np.dtype('<i2'), 0.0, 32768.0),
+    (_WAVE_FORMAT_PCM, 32): (np.dtype('<i4'), 0.0, 2147483648.0),
+    (_WAVE_FORMAT_IEEE_FLOAT, 32): (np.dtype('<f4'), 0.0, 1.0),
+    (_WAVE_FORMAT_IEEE_FLOAT, 64): (np.dtype('<f8'), 0.0, 1.0),
+}
+
+
+@dataclass
+class WavLayout:
+    audio_format: int
+    channels: int
+    sample_rate: int
+    bits_per_sample: int
+    data_offset: int
+    data_size: int
+
+    @property
+    def frame_count(self) -> int:
+        return self.data_size // (self.channels * (self.bits_per_sample // 8))
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.frame_count / self.sample_rate if self.sample_rate else 0.0
+
+
+def read_wav_layout(buffer, total_size: int | None = None) -> WavLayout | None:
+    """
+    Разбирает RIFF/WAVE-заголовок; None, если это не WAV.
+    total_size — полный размер файла, если buffer содержит только его начало.
+    """
+    total_size = len(buffer) if total_size is None else total_size
+    if len(buffer) < 12 or buffer[0:4] != b'RIFF' or buffer[8:12] != b'WAVE':
+        return None
+
+    fmt = None
+    offset = 12
+    while offset + 8 <= len(buffer):
+        chunk_id = bytes(buffer[offset:offset + 4])
+        chunk_size = struct.unpack_from('<I', buffer, offset + 4)[0]
+        body = offset + 8
+        if chunk_id == b'fmt ' and chunk_size >= 16:
+            audio_format, channels, sample_rate, _byte_rate, _block_align, bits = struct.unpack_from('<HHIIHH', buffer, body)
+            if audio_format == _WAVE_FORMAT_EXTENSIBLE and chunk_size >= 40:
+                # Первые два байта SubFormat GUID совпадают с кодом формата
+                audio_format = struct.unpack_from('<H', buffer, body + 24)[0]
+            fmt = (audio_format, channels, sample_rate, bits)
+        elif chunk_id == b'data' and fmt is not None:
+            # Asterisk может оставить размер 0/0xFFFFFFFF, если запись оборвалась
+            data_size = min(chunk_size, total_size - body) if chunk_size else total_size - body
+            audio_format, channels, sample_rate, bits = fmt
+            return WavLayout(audio_format, channels, sample_rate, bits, body, data_size)
+        offset = body + chunk_size + (chunk_size & 1)
+    return None
+
+
+def wav_duration_seconds(wav_path: str | Path) -> float | None:
+    """Длительность WAV по заголовку, без чтения аудиоданных."""
+    try:
+        with Path(wav_path).open('rb') as f:
+            header = f.read(64 * 1024)
+            file_size = os.fstat(f.fileno()).st_size
+    except OSError:
+        return None
+    layout = read_wav_layout(header, total_size=file_size)
+    if layout is None or not layout.channels or not layout.bits_per_sample:
+        return None
+    return layout.duration_seconds
+
+
+def load_stereo_channels(wav_path: str | Path) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Читает стерео PCM WAV за один проход (mmap) и возвращает левый и правый каналы
+    как float32 16 кГц, готовые для WhisperModel.transcribe.
+    Возвращает None для форматов, которые нужно декодировать через ffmpeg.
+    """
+    path = Path(wav_path)
+    with path.open('rb') as f:
+        try:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            return None
+    try:
+        layout = read_wav_layout(mm)
+        if layout is None or layout.channels != 2:
+            return None
+        spec = _PCM_DTYPES.get((layout.audio_format, layout.bits_per_sample))
+        if spec is None:
+            return None
+        dtype, bias, scale = spec
+
+        frames = interleaved = None
+        try:
+            frames = np.frombuffer(mm, dtype=dtype, count=layout.frame_count * layout.channels, offset=layout.data_offset)
+            interleaved = frames.reshape(-1, layout.channels)
+            # interleaved[:, i] — strided view без копирования; копия появляется только при переводе в float32
+            left = _to_float32(interleaved[:, 0], bias, scale)
+            right = _to_float32(interleaved[:, 1], bias, scale)
+        finally:
+            # Представления держат буфер mmap: пока они живы, mm.close() бросает BufferError
+            del frames, interleaved
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # Представление ещё держит кадр трассировки летящего исключения; mmap закроет сборщик мусора,
+            # а наружу уйдёт исходная ошибка
+            pass
+
+    return (
+        resample(left, layout.sample_rate, WHISPER_SAMPLE_RATE),
+        resample(right, layout.sample_rate, WHISPER_SAMPLE_RATE),
+    )
+
+
+@dataclass
+class SpeechTimeline:
+    """Соответствие времени в сжатом аудио (только участки речи) времени исходной записи."""
+    compact_starts: np.ndarray
+    original_starts: np.ndarray
+    durations: np.ndarray
+
+    @property
+    def speech_seconds(self) -> float:
+        return float(self.durations.sum())
+
+    def to_original(self, seconds: float) -> float:
+        index = max(0, int(np.searchsorted(self.compact_starts, seconds, side='right')) - 1)
+        # Время внутри вставленной паузы между участками прижимается к концу участка
+        offset = min(max(0.0, seconds - float(self.compact_starts[index])), float(self.durations[index]))
+        return float(self.original_starts[index]) + offset
+
+
+def detect_speech_regions(
+    samples: np.ndarray,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    frame_ms: int = 30,
+    noise_margin_db: float = 10.0,
+    min_threshold_db: float = -50.0,
+    max_threshold_db: float = -35.0,
+    max_zcr: float = 0.4,
+    padding_ms: int = 300,
+    min_gap_ms: int = 800,
+) -> np.ndarray:
+    """
+    Находит участки речи по энергии и числу переходов через ноль в кадрах frame_ms.
+    Порог — уровень шума (10-й перцентиль энергии кадров) + noise_margin_db в пределах
+    [min_threshold_db, max_threshold_db]; кадры с ZCR выше max_zcr считаются шумом/шипением.
+    Возвращает массив (N, 2) с границами участков в отсчётах.
+    """
+    frame = max(1, sample_rate * frame_ms // 1000)
+    frame_count = samples.size // frame
+    if frame_count == 0:
+        return np.empty((0, 2), dtype=np.int64)
+
+    frames = samples[:frame_count * frame].reshape(frame_count, frame)
+    energy_db = 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float32), axis=1) + 1e-10)
+    zcr = np.count_nonzero(np.diff(np.signbit(frames), axis=1), axis=1) / frame
+
+    threshold = np.clip(np.percentile(energy_db, 10) + noise_margin_db, min_threshold_db, max_threshold_db)
+    speech = (energy_db > threshold) & (zcr < max_zcr)
+    if not speech.any():
+        return np.empty((0, 2), dtype=np.int64)
+
+    # Расширяем участки на padding_ms, чтобы не обрезать начала и концы слов
+    padding = padding_ms // frame_ms
+    if padding:
+        speech = np.convolve(speech.astype(np.int8), np.ones(2 * padding + 1, dtype=np.int8), mode='same') > 0
+
+    edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+    starts = np.flatnonzero(edges == 1)
+    ends = np.flatnonzero(edges == -1)
+
+    # Короткие паузы внутри реплики не разрывают участок
+    keep_gap = (starts[1:] - ends[:-1]) * frame_ms >= min_gap_ms
+    starts = starts[np.concatenate(([True], keep_gap))]
+    ends = ends[np.concatenate((keep_gap, [True]))]
+
+    regions = np.stack((starts, ends), axis=1).astype(np.int64) * frame
+    if ends[-1] == frame_count:
+        # Хвост короче кадра относится к последнему участку
+        regions[-1, 1] = samples.size
+    return regions
+
+
+def compact_speech(
+    samples: np.ndarray,
+    regions: np.ndarray,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    separator_ms: int = 400,
+) -> tuple[np.ndarray, SpeechTimeline]:
+    """
+    Склеивает участки речи, разделяя их короткой тишиной (чтобы Whisper видел паузу),
+    и возвращает сжатое аудио вместе с отображением времени на исходную запись.
+    """
+    separator = sample_rate * separator_ms // 1000
+    lengths = regions[:, 1] - regions[:, 0]
+    compact_offsets = np.concatenate(([0], np.cumsum(lengths + separator)[:-1]))
+    compact = np.zeros(int(lengths.sum() + separator * max(0, len(regions) - 1)), dtype=np.float32)
+    for (start, end), offset in zip(regions, compact_offsets):
+        compact[offset:offset + end - start] = samples[start:end]
+    timeline = SpeechTimeline(
+        compact_starts=compact_offsets / sample_rate,
+        original_starts=regions[:, 0] / sample_rate,
+        durations=lengths / sample_rate,
+    )
+    return compact, timeline
+
+
+def pack_speech_clips(
+    samples: np.ndarray,
+    regions: np.ndarray,
+    max_seconds: float = 30.0,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+    frame_ms: int = 30,
+) -> list[dict[str, float]]:
+    """
+    Собирает участки речи в отрезки не длиннее max_seconds (окно Whisper) для clip_timestamps
+    пакетного распознавания: соседние участки объединяются, слишком длинные режутся в самом
+    тихом кадре последней четверти отрезка. Границы — в секундах исходной записи.
+    """
+    limit = int(max_seconds * sample_rate)
+    frame = max(1, sample_rate * frame_ms // 1000)
+    clips: list[tuple[int, int]] = []
+    for start, end in regions:
+        start, end = int(start), int(end)
+        if clips and end - clips[-1][0] <= limit:
+            clips[-1] = (clips[-1][0], end)
+            continue
+        while end - start > limit:
+            cut = quietest_sample(samples, start + limit * 3 // 4, start + limit, frame)
+            clips.append((start, cut))
+            start = cut
+        clips.append((start, end))
+    return [{'start': start / sample_rate, 'end': end / sample_rate} for start, end in clips]
+
+
+def quietest_sample(samples: np.ndarray, low: int, high: int, frame: int) -> int:
+    """Середина кадра с наименьшей энергией в [low, high) — место для разреза, не попадающее на слово."""
+    frame_count = max(1, (high - low) // frame)
+    frames = samples[low:low + frame_count * frame].reshape(frame_count, -1)
+    energy = np.mean(np.square(frames, dtype=np.float32), axis=1)
+    return low + int(np.argmin(energy)) * frame + frame // 2
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int = WHISPER_SAMPLE_RATE) -> np.ndarray:
+    if source_rate == target_rate or samples.size == 0:
+        return samples.astype(np.float32, copy=False)
+    if source_rate > target_rate and source_rate % target_rate == 0:
+        # Целочисленное понижение частоты: усреднение блоков работает как простой ФНЧ
+        factor = source_rate // target_rate
+        usable = samples.size - samples.size % factor
+        return samples[:usable].reshape(-1, factor).mean(axis=1, dtype=np.float32)
+    if target_rate % source_rate == 0:
+        # Целочисленное повышение (8 кГц -> 16 кГц): линейная интерполяция через broadcasting
+        factor = target_rate // source_rate
+        fractions = np.arange(factor, dtype=np.float32) / factor
+        steps = np.diff(samples, append=samples[-1:]).astype(np.float32, copy=False)
+        return (samples[:, None] + steps[:, None] * fractions[None, :]).reshape(-1).astype(np.float32, copy=False)
+    if source_rate > target_rate:
+        # Дробное понижение (44,1 кГц -> 16 кГц): без ФНЧ частоты выше новой Найквиста
+        # отразились бы в речевую полосу
+        samples = _low_pass(samples, 0.45 * target_rate / source_rate)
+    target_size = int(round(samples.size * target_rate / source_rate))
+    positions = np.arange(target_size, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(samples.size, dtype=np.float64), samples).astype(np.float32)
+
+
+def _low_pass(samples: np.ndarray, cutoff: float, taps: int = 101) -> np.ndarray:
+    """КИХ-фильтр windowed-sinc (окно Блэкмана); cutoff — частота среза в долях частоты дискретизации."""
+    n = np.arange(taps, dtype=np.float64) - (taps - 1) / 2
+    kernel = 2 * cutoff * np.sinc(2 * cutoff * n) * np.blackman(taps)
+    kernel /= kernel.sum()
+    return np.convolve(samples, kernel.astype(np.float32), mode='same')
+
+
+def _to_float32(view: np.ndarray, bias: float, scale: float) -> np.ndarray:
+    samples = view.astype(np.float32)
+    if bias:
+        samples -= bias
+    if scale != 1.0:
+        samples /= scale
+    return samples
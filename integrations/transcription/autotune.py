@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Подбор настроек транскрибации под конкретную машину.
+
+    python -m integrations.transcription autotune --target-rtf 0.5
+    python -m integrations.transcription autotune call.wav --model small --beam-sizes 5 --output /opt/sms/var/transcription_tuning.json
+
+Перебирает сочетания compute type, cpu_threads, num_workers (2 — каналы распознаются одновременно)
+и beam size, замеряет RTF (время распознавания / длительность записи) и записывает самое быстрое
+сочетание, укладывающееся в --target-rtf, в файл настроек. StereoCallTranscriber читает этот файл
+при запуске (CALL_TRANSCRIBE_TUNING_FILE). Синтетическая запись (тон + шум) нагружает в основном
+энкодер; для точных цифр лучше передать настоящую запись разговора.
+"""
+from __future__ import annotations
+
+import argparse
+import gc
+import itertools
+import os
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from integrations.transcription.audio import wav_duration_seconds
+from integrations.transcription.bench import _time_call, write_synthetic_stereo_wav
+from integrations.transcription.cli import build_cli_config, parse_args as parse_cli_args
+from integrations.transcription.stereo import StereoCallTranscriber
+from integrations.transcription.tuning import DEFAULT_TUNING_FILE, write_tuning_file
+
+
+@dataclass
+class Candidate:
+    compute_type: str
+    cpu_threads: int
+    num_workers: int
+    beam_size: int
+    elapsed: float | None = None
+    rtf: float | None = None
+    error: str | None = None
+
+    @property
+    def settings(self) -> dict[str, Any]:
+        return {
+            'CALL_TRANSCRIBE_COMPUTE_TYPE': self.compute_type,
+            'CALL_TRANSCRIBE_CPU_THREADS': self.cpu_threads,
+            'CALL_TRANSCRIBE_NUM_WORKERS': self.num_workers,
+            'CALL_TRANSCRIBE_PARALLEL_CHANNELS': self.num_workers > 1,
+            'CALL_TRANSCRIBE_BEAM_SIZE': self.beam_size,
+        }
+
+    def describe(self) -> str:
+        return f'{self.compute_type:<13} threads={self.cpu_threads:<3} workers={self.num_workers} beam={self.beam_size}'
+
+
+def supported_compute_types(device: str, requested: list[str]) -> list[str]:
+    try:
+        import ctranslate2
+
+        supported = ctranslate2.get_supported_compute_types(device)
+    except Exception:
+        return requested
+    skipped = [item for item in requested if item not in supported]
+    if skipped:
+        print(f'Skipping compute types not supported on {device}: {", ".join(skipped)}', file=sys.stderr)
+    return [item for item in requested if item in supported]
+
+
+def _base_config(args: argparse.Namespace):
+    return build_cli_config(parse_cli_args([
+        'autotune.wav',
+        '--model', args.model,
+        '--device', args.device,
+        '--no-cache',
+    ]))
+
+
+def run_candidates(args: argparse.Namespace, wav_path: Path, duration: float) -> list[Candidate]:
+    candidates: list[Candidate] = []
+    # Модель перезагружается только при смене compute type / потоков / воркеров; beam size меняется на лету
+    for compute_type, cpu_threads, num_workers in itertools.product(args.compute_types, args.threads, args.num_workers):
+        config = _base_config(args)
+        config.CALL_TRANSCRIBE_COMPUTE_TYPE = compute_type
+        config.CALL_TRANSCRIBE_CPU_THREADS = cpu_threads
+        config.CALL_TRANSCRIBE_NUM_WORKERS = num_workers
+        config.CALL_TRANSCRIBE_PARALLEL_CHANNELS = num_workers > 1
+        group = [Candidate(compute_type, cpu_threads, num_workers, beam_size) for beam_size in args.beam_sizes]
+        transcriber = None
+        try:
+            transcriber = StereoCallTranscriber(config)
+            started = time.perf_counter()
+            transcriber._get_model()
+            load_seconds = time.perf_counter() - started
+            print(f'{compute_type} threads={cpu_threads} workers={num_workers}: model loaded in {load_seconds:.1f}s', file=sys.stderr)
+            for candidate in group:
+                transcriber.config.CALL_TRANSCRIBE_BEAM_SIZE = candidate.beam_size
+                candidate.elapsed = _time_call(lambda: transcriber._transcribe_blocking(wav_path), args.repeat)
+                candidate.rtf = candidate.elapsed / duration
+                print(f'  {candidate.describe()}: {candidate.elapsed:7.2f}s  RTF {candidate.rtf:.3f}', file=sys.stderr)
+        except Exception as exc:
+            for candidate in group:
+                if candidate.rtf is None:
+                    candidate.error = f'{type(exc).__name__}: {exc}'
+            print(f'  {group[0].describe()}: FAILED {type(exc).__name__}: {exc}', file=sys.stderr)
+        finally:
+            # Следующая группа загружает свою модель: предыдущая не должна занимать память и ядра
+            transcriber = None
+            gc.collect()
+        candidates.extend(group)
+    return candidates
+
+
+def choose_candidate(candidates: list[Candidate], target_rtf: float) -> Candidate | None:
+    passing = [candidate for candidate in candidates if candidate.rtf is not None and candidate.rtf <= target_rtf]
+    return min(passing, key=lambda candidate: candidate.rtf) if passing else None
+
+
+def run_autotune(args: argparse.Namespace) -> int:
+    args.compute_types = supported_compute_types(args.device, args.compute_types)
+    if not args.compute_types:
+        print('No candidate compute types left to try', file=sys.stderr)
+        return 2
+
+    with tempfile.TemporaryDirectory(prefix='autotune_') as tmp_dir_str:
+        if args.input_wav:
+            wav_path = Path(args.input_wav).expanduser()
+            if not wav_path.exists():
+                print(f'Input file not found: {wav_path}', file=sys.stderr)
+                return 2
+        else:
+            wav_path = write_synthetic_stereo_wav(Path(tmp_dir_str) / 'call.wav', args.seconds)
+        duration = wav_duration_seconds(wav_path) or 0.0
+        if not duration:
+            print(f'Cannot read duration of {wav_path}', file=sys.stderr)
+            return 2
+
+        total = len(args.compute_types) * len(args.threads) * len(args.num_workers) * len(args.beam_sizes)
+        print(
+            f'Benchmarking {total} combination(s) of model {args.model} on {duration:.1f}s of '
+            f'{"recorded" if args.input_wav else "synthetic"} audio, target RTF {args.target_rtf}',
+            file=sys.stderr,
+        )
+        candidates = run_candidates(args, wav_path, duration)
+
+    best = choose_candidate(candidates, args.target_rtf)
+    if best is None:
+        measured = [candidate for candidate in candidates if candidate.rtf is not None]
+        if measured:
+            fastest = min(measured, key=lambda candidate: candidate.rtf)
+            print(f'No combination meets RTF {args.target_rtf}; fastest was {fastest.describe()} at RTF {fastest.rtf:.3f}', file=sys.stderr)
+        else:
+            print('Every combination failed', file=sys.stderr)
+        print('Try a smaller --model or a higher --target-rtf; the tuning file was not changed', file=sys.stderr)
+        return 1
+
+    print(f'Fastest within target: {best.describe()} at RTF {best.rtf:.3f}', file=sys.stderr)
+    if args.dry_run:
+        return 0
+    output_path = write_tuning_file(
+        Path(args.output).expanduser(),
+        best.settings,
+        model=args.model,
+        device=args.device,
+        cpu_count=os.cpu_count(),
+        rtf=round(best.rtf, 4),
+        target_rtf=args.target_rtf,
+        sample=str(Path(args.input_wav).expanduser()) if args.input_wav else f'synthetic:{args.seconds:g}s',
+        tuned_at=datetime.now(timezone.utc).isoformat(timespec='seconds'),
+    )
+    print(f'Wrote {output_path}; restart the bot to apply it', file=sys.stderr)
+    return 0
+
+
+def _default_threads() -> list[int]:
+    cores = os.cpu_count() or 1
+    return sorted({max(1, cores // 2), cores})
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Benchmark transcription settings and write the fastest one that meets a target RTF.')
+    parser.add_argument('input_wav', nargs='?', default=None, help='Stereo WAV to benchmark on. Default: synthetic recording')
+    parser.add_argument('--seconds', type=float, default=30.0, help='Length of the synthetic recording. Default: 30')
+    parser.add_argument('--model', default=os.environ.get('CALL_TRANSCRIBE_MODEL', 'small'), help='Whisper model to tune for. Default: $CALL_TRANSCRIBE_MODEL or small')
+    parser.add_argument('--device', default=os.environ.get('CALL_TRANSCRIBE_DEVICE', 'cpu'), help='Inference device. Default: $CALL_TRANSCRIBE_DEVICE or cpu')
+    parser.add_argument('--compute-types', nargs='+', default=['int8', 'int8_float32', 'float32'], help='Compute types to try. Default: int8 int8_float32 float32')
+    parser.add_argument('--threads', type=int, nargs='+', default=_default_threads(), help='Total CPU threads to try. Default: half and all cores')
+    parser.add_argument('--num-workers', type=int, nargs='+', default=[1, 2], help='CTranslate2 workers to try; 2 transcribes both channels at once. Default: 1 2')
+    parser.add_argument('--beam-sizes', type=int, nargs='+', default=[1, 5], help='Beam sizes to try. Default: 1 5')
+    parser.add_argument('--target-rtf', type=float, default=0.5, help='Required real-time factor (processing time / audio length). Default: 0.5')
+    parser.add_argument('--repeat', type=int, default=1, help='Best-of-N repetitions per combination. Default: 1')
+    parser.add_argument(
+        '--output',
+        default=os.environ.get('CALL_TRANSCRIBE_TUNING_FILE', DEFAULT_TUNING_FILE),
+        help=f'Tuning file to write. Default: $CALL_TRANSCRIBE_TUNING_FILE or {DEFAULT_TUNING_FILE}',
+    )
+    parser.add_argument('--dry-run', action='store_true', help='Only print the results, do not write the tuning file.')
+    args = parser.parse_args(argv)
+    if min(args.threads) < 1 or min(args.num_workers) < 1 or min(args.beam_sizes) < 1:
+        parser.error('--threads, --num-workers and --beam-sizes must be at least 1')
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    try:
+        return run_autotune(parse_args(argv))
+    except KeyboardInterrupt:
+        print('Interrupted; the tuning file was not changed', file=sys.stderr)
+        return 130
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
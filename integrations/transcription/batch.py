@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Пакетная транскрибация записей (например, дозаполнение архива /var/spool/asterisk/monitor).
+
+    python -m integrations.transcription batch /var/spool/asterisk/monitor --jobs 4 --output-dir out/
+    python -m integrations.transcription batch '/var/spool/asterisk/monitor/2024*.wav' --jsonl calls.jsonl
+
+Каждый процесс пула загружает модель один раз. Повторный запуск продолжает с места остановки:
+записи, для которых уже есть результат (файл в --output-dir и/или успешная строка в --jsonl), пропускаются.
+В --output-dir повторяется структура каталогов относительно источника (каталога или неизменяемой части
+glob-шаблона), поэтому одноимённые записи из разных подкаталогов не перезаписывают друг друга.
+"""
+from __future__ import annotations
+
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+from typing import Any
+
+from integrations.transcription.audio import wav_duration_seconds
+from integrations.transcription.cli import add_transcription_arguments, build_cli_config
+
+_GLOB_CHARS = set('*?[')
+
+_worker_transcriber = None
+
+
+def collect_inputs(sources: list[str], pattern: str = '*.wav', recursive: bool = False) -> list[tuple[Path, Path]]:
+    """
+    Разворачивает каталоги и glob-шаблоны в отсортированный список файлов без повторов.
+    Для каждого файла возвращает и его путь относительно источника — по нему строится имя результата.
+    """
+    found: dict[Path, Path] = {}
+    for source in sources:
+        source = os.path.expanduser(source)
+        if _GLOB_CHARS & set(source):
+            root = _glob_root(source)
+            candidates = [Path(item) for item in glob.glob(source, recursive=True)]
+        elif Path(source).is_dir():
+            root = Path(source)
+            candidates = list(root.rglob(pattern) if recursive else root.glob(pattern))
+        else:
+            root = Path(source).parent
+            candidates = [Path(source)]
+        for candidate in candidates:
+            if candidate.is_file():
+                found.setdefault(candidate.resolve(), _relative_to(candidate, root))
+    return sorted(found.items())
+
+
+def _glob_root(pattern: str) -> Path:
+    """Неизменяемая часть glob-шаблона: каталоги до первого компонента со спецсимволами."""
+    root_parts = []
+    for part in Path(pattern).parts[:-1]:
+        if _GLOB_CHARS & set(part):
+            break
+        root_parts.append(part)
+    return Path(*root_parts) if root_parts else Path('.')
+
+
+def _relative_to(path: Path, root: Path) -> Path:
+    try:
+        return path.relative_to(root)
+    except ValueError:
+        return Path(path.name)
+
+
+def load_completed_from_jsonl(jsonl_path: Path) -> set[str]:
+    completed: set[str] = set()
+    try:
+        with jsonl_path.open('r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # Последняя строка могла оборваться при прерывании
+                    continue
+                if record.get('transcription') is not None:
+                    completed.add(record['input_file'])
+    except FileNotFoundError:
+        pass
+    return completed
+
+
+def output_path_for(output_dir: Path, relative_path: Path) -> Path:
+    """Путь результата в output_dir для записи с путём relative_path относительно источника (см. collect_inputs)."""
+    return output_dir / relative_path.with_suffix('.json')
+
+
+def _init_worker(config) -> None:
+    global _worker_transcriber
+    from integrations.transcription.stereo import StereoCallTranscriber
+
+    _worker_transcriber = StereoCallTranscriber(config)
+
+
+def _transcribe_file(wav_path: str) -> dict[str, Any]:
+    started = time.perf_counter()
+    try:
+        payload = _worker_transcriber._transcribe_blocking(Path(wav_path))
+        error = None
+    except Exception as exc:
+        payload = None
+        error = f'{type(exc).__name__}: {exc}'
+    elapsed = time.perf_counter() - started
+    duration = wav_duration_seconds(wav_path)
+    return {
+        'input_file': wav_path,
+        'duration_seconds': round(duration, 3) if duration is not None else None,
+        'elapsed_seconds': round(elapsed, 3),
+        'rtf': round(elapsed / duration, 4) if duration else None,
+        'transcription': payload,
+        'error': error,
+    }
+
+
+class _ResultWriter:
+    def __init__(self, output_dir: Path | None, jsonl_path: Path | None, indent: int):
+        self.output_dir = output_dir
+        self.jsonl_path = jsonl_path
+        self.indent = indent
+        self._jsonl = None
+
+    def __enter__(self) -> _ResultWriter:
+        if self.output_dir is not None:
+            self.output_dir.mkdir(parents=True, exist_ok=True)
+        if self.jsonl_path is not None:
+            self.jsonl_path.parent.mkdir(parents=True, exist_ok=True)
+            self._jsonl = self.jsonl_path.open('a+', encoding='utf-8')
+            # Дописываем с новой строки, если предыдущий запуск оборвался посреди записи
+            if self._jsonl.tell() > 0:
+                self._jsonl.seek(self._jsonl.tell() - 1)
+                if self._jsonl.read(1) != '\n':
+                    self._jsonl.write('\n')
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._jsonl is not None:
+            self._jsonl.close()
+
+    def write(self, record: dict[str, Any], relative_path: Path) -> None:
+        if self._jsonl is not None:
+            self._jsonl.write(json.dumps(record, ensure_ascii=False))
+            self._jsonl.write('\n')
+            self._jsonl.flush()
+        if self.output_dir is not None and record['transcription'] is not None:
+            output_path = output_path_for(self.output_dir, relative_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = output_path.with_name(f'{output_path.name}.tmp')
+            tmp_path.write_text(json.dumps(record['transcription'], ensure_ascii=False, indent=self.indent) + '\n', encoding='utf-8')
+            os.replace(tmp_path, output_path)
+
+
+def _format_progress(index: int, total: int, record: dict[str, Any]) -> str:
+    name = Path(record['input_file']).name
+    if record['error']:
+        return f'[{index}/{total}] {name}: FAILED {record["error"]}'
+    duration = record['duration_seconds']
+    rtf = f'{record["rtf"]:.3f}' if record['rtf'] is not None else 'n/a'
+    audio = f'{duration:.1f}s' if duration is not None else '?'
+    return f'[{index}/{total}] {name}: {audio} audio in {record["elapsed_seconds"]:.1f}s, RTF {rtf}'
+
+
+def run_batch(args: argparse.Namespace) -> int:
+    output_dir = Path(args.output_dir).expanduser() if args.output_dir else None
+    jsonl_path = Path(args.jsonl).expanduser() if args.jsonl else None
+
+    inputs = collect_inputs(args.inputs, pattern=args.pattern, recursive=args.recursive)
+    if output_dir is not None:
+        # Одноимённые файлы из разных источников (например, двух каталогов) дали бы один и тот же результат
+        owners: dict[Path, Path] = {}
+        for wav_path, relative_path in inputs:
+            owner = owners.setdefault(relative_path.with_suffix('.json'), wav_path)
+            if owner != wav_path:
+                print(f'Both {owner} and {wav_path} map to {output_path_for(output_dir, relative_path)}; pass their common parent directory with --recursive instead', file=sys.stderr)
+                return 2
+    relative_paths = {str(wav_path): relative_path for wav_path, relative_path in inputs}
+    completed = load_completed_from_jsonl(jsonl_path) if jsonl_path else set()
+    pending = []
+    for wav_path, relative_path in inputs:
+        in_jsonl = jsonl_path is None or str(wav_path) in completed
+        in_output_dir = output_dir is None or output_path_for(output_dir, relative_path).exists()
+        if not (in_jsonl and in_output_dir):
+            pending.append(wav_path)
+    skipped = len(inputs) - len(pending)
+    print(f'Found {len(inputs)} recording(s), {skipped} already done, {len(pending)} to transcribe with {args.jobs} job(s)', file=sys.stderr)
+    if not pending:
+        return 0
+
+    config = build_cli_config(args)
+    if not config.CALL_TRANSCRIBE_CPU_THREADS:
+        # Без явного значения делим ядра между процессами пула, чтобы они не вытесняли друг друга
+        config.CALL_TRANSCRIBE_CPU_THREADS = max(1, (os.cpu_count() or 1) // args.jobs)
+
+    failed = 0
+    total_audio = 0.0
+    started = time.perf_counter()
+    queue = [str(wav_path) for wav_path in reversed(pending)]
+    in_flight: set[Future] = set()
+    with _ResultWriter(output_dir, jsonl_path, args.indent) as writer, ProcessPoolExecutor(
+        max_workers=args.jobs,
+        initializer=_init_worker,
+        initargs=(config,),
+    ) as pool:
+        try:
+            done_count = 0
+            while queue or in_flight:
+                # Держим в очереди пула не больше двух записей на процесс: список архива может быть длинным
+                while queue and len(in_flight) < args.jobs * 2:
+                    in_flight.add(pool.submit(_transcribe_file, queue.pop()))
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    record = future.result()
+                    done_count += 1
+                    writer.write(record, relative_paths[record['input_file']])
+                    if record['error']:
+                        failed += 1
+                    elif record['duration_seconds']:
+                        total_audio += record['duration_seconds']
+                    print(_format_progress(done_count, len(pending), record), file=sys.stderr)
+        except BrokenProcessPool:
+            print('A worker process died (out of memory?); rerun the same command to resume', file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            print('Interrupted; rerun the same command to resume', file=sys.stderr)
+            pool.shutdown(wait=False, cancel_futures=True)
+            return 130
+
+    elapsed = time.perf_counter() - started
+    rtf = f'{elapsed / total_audio:.3f}' if total_audio else 'n/a'
+    print(
+        f'Done: {len(pending) - failed} transcribed, {failed} failed, {total_audio:.1f}s audio in {elapsed:.1f}s (wall-clock RTF {rtf})',
+        file=sys.stderr,
+    )
+    return 1 if failed else 0
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Transcribe many stereo WAV recordings with a pool of worker processes.')
+    parser.add_argument('inputs', nargs='+', help='WAV files, directories or glob patterns (quote globs to keep the shell from expanding them).')
+    parser.add_argument('--output-dir', default=None, help='Write one <recording>.json per input into this directory, mirroring subdirectories of the input directory or glob.')
+    parser.add_argument('--jsonl', default=None, help='Append one JSON line per recording (with timing and errors) to this file.')
+    parser.add_argument('--jobs', type=int, default=1, help='Worker processes; each loads its own model. Default: 1')
+    parser.add_argument('--pattern', default='*.wav', help='File pattern inside directories. Default: *.wav')
+    parser.add_argument('--recursive', action=argparse.BooleanOptionalAction, default=False, help='Search directories recursively. Default: disabled')
+    add_transcription_arguments(parser)
+    parser.add_argument('--indent', type=int, default=2, help='JSON indentation for --output-dir files. Default: 2')
+    args = parser.parse_args(argv)
+    if not args.output_dir and not args.jsonl:
+        parser.error('at least one of --output-dir or --jsonl is required')
+    if args.jobs < 1:
+        parser.error('--jobs must be at least 1')
+    return args
+
+
+def main(argv: list[str] | None = None) -> int:
+    return run_batch(parse_args(argv))
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Бенчмарки конвейера транскрибации.
+
+    python -m integrations.transcription.bench split --minutes 1 10 60
+    python -m integrations.transcription bench channels call.wav --threads 4
+    python -m integrations.transcription bench batched --seconds 1800 --batch-sizes 8 16
+    python -m integrations.transcription bench merge --rows 10000
+    python -m integrations.transcription bench pdf --rows 100 1000 10000
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+import wave
+from pathlib import Path
+from types import SimpleNamespace
+
+import numpy as np
+
+from integrations.transcription.audio import load_stereo_channels, wav_duration_seconds
+from integrations.transcription.stereo import (
+    ChannelResult,
+    ConversationRow,
+    StereoCallTranscriber,
+    build_output_json,
+    ensure_ffmpeg,
+    merge_adjacent_segments,
+    run_ffmpeg_extract_channel,
+)
+
+
+def write_synthetic_stereo_wav(path: Path, seconds: float, sample_rate: int = 8000, seed: int = 0) -> Path:
+    """Пишет 16-битный стерео WAV, похожий на запись Asterisk: тон + шум, каналы различаются."""
+    rng = np.random.default_rng(seed)
+    total_frames = int(seconds * sample_rate)
+    chunk_frames = sample_rate * 60
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        written = 0
+        while written < total_frames:
+            count = min(chunk_frames, total_frames - written)
+            t = (np.arange(count) + written) / sample_rate
+            left = 0.3 * np.sin(2 * np.pi * 440 * t) + 0.05 * rng.standard_normal(count)
+            right = 0.3 * np.sin(2 * np.pi * 660 * t) + 0.05 * rng.standard_normal(count)
+            frames = np.empty((count, 2), dtype='<i2')
+            frames[:, 0] = np.clip(left, -1, 1) * 32767
+            frames[:, 1] = np.clip(right, -1, 1) * 32767
+            wav.writeframes(frames.tobytes())
+            written += count
+    return path
+
+
+def _time_call(func, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(max(1, repeat)):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def _split_with_ffmpeg(wav_path: Path, tmp_dir: Path) -> None:
+    from faster_whisper.audio import decode_audio
+
+    for channel_index in (0, 1):
+        mono_path = tmp_dir / f'channel_{channel_index}.wav'
+        run_ffmpeg_extract_channel(wav_path, mono_path, channel_index)
+        # Так WhisperModel.transcribe читает файл, переданный по пути
+        decode_audio(str(mono_path), sampling_rate=16000)
+
+
+def bench_split(args: argparse.Namespace) -> int:
+    try:
+        ensure_ffmpeg()
+        has_ffmpeg = True
+    except RuntimeError:
+        has_ffmpeg = False
+        print('ffmpeg not found: only the in-process path is measured', file=sys.stderr)
+
+    print(f'{"minutes":>8} {"in-process, s":>14} {"ffmpeg, s":>10} {"speedup":>8}')
+    with tempfile.TemporaryDirectory(prefix='bench_split_') as tmp_dir_str:
+        tmp_dir = Path(tmp_dir_str)
+        for minutes in args.minutes:
+            wav_path = write_synthetic_stereo_wav(tmp_dir / f'call_{minutes}m.wav', minutes * 60, args.sample_rate)
+            in_process = _time_call(lambda: load_stereo_channels(wav_path), args.repeat)
+            if has_ffmpeg:
+                ffmpeg = _time_call(lambda: _split_with_ffmpeg(wav_path, tmp_dir), args.repeat)
+                print(f'{minutes:>8g} {in_process:>14.3f} {ffmpeg:>10.3f} {ffmpeg / in_process:>7.1f}x')
+            else:
+                print(f'{minutes:>8g} {in_process:>14.3f} {"n/a":>10} {"n/a":>8}')
+            wav_path.unlink()
+    return 0
+
+
+def _bench_transcriber_config(args: argparse.Namespace, *, parallel_channels: bool):
+    from integrations.transcription.cli import build_cli_config, parse_args as parse_cli_args
+
+    cli_args = parse_cli_args([
+        'bench.wav',
+        '--model', args.model,
+        '--compute-type', args.compute_type,
+        '--beam-size', str(args.beam_size),
+        '--cpu-threads', str(args.threads),
+        # Иначе повторы и сравниваемые режимы отдаются из кэша, а не распознаются
+        '--no-cache',
+    ])
+    config = build_cli_config(cli_args)
+    config.CALL_TRANSCRIBE_PARALLEL_CHANNELS = parallel_channels
+    return config
+
+
+def bench_channels(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory(prefix='bench_channels_') as tmp_dir_str:
+        wav_path = Path(args.input_wav) if args.input_wav else write_synthetic_stereo_wav(Path(tmp_dir_str) / 'call.wav', args.seconds)
+        duration = wav_duration_seconds(wav_path) or 0.0
+
+        results = {}
+        for label, parallel_channels in (('sequential', False), ('concurrent', True)):
+            transcriber = StereoCallTranscriber(_bench_transcriber_config(args, parallel_channels=parallel_channels))
+            transcriber._get_model()
+            results[label] = _time_call(lambda: transcriber._transcribe_blocking(wav_path), args.repeat)
+
+    print(f'recording: {duration:.1f}s, threads: {args.threads}, model: {args.model}/{args.compute_type}, beam: {args.beam_size}')
+    for label, seconds in results.items():
+        rtf = seconds / duration if duration else 0.0
+        print(f'{label:>11}: {seconds:8.2f}s  RTF {rtf:.3f}')
+    print(f'{"speedup":>11}: {results["sequential"] / results["concurrent"]:.2f}x')
+    return 0
+
+
+def bench_batched(args: argparse.Namespace) -> int:
+    with tempfile.TemporaryDirectory(prefix='bench_batched_') as tmp_dir_str:
+        wav_path = Path(args.input_wav) if args.input_wav else write_synthetic_stereo_wav(Path(tmp_dir_str) / 'call.wav', args.seconds)
+        duration = wav_duration_seconds(wav_path) or 0.0
+
+        config = _bench_transcriber_config(args, parallel_channels=False)
+        transcriber = StereoCallTranscriber(config)
+        transcriber._get_model()
+        results = {}
+        rows = {}
+        for label, batch_size in [('sequential', 0), *((f'batch {size}', size) for size in args.batch_sizes)]:
+            config.CALL_TRANSCRIBE_BATCHED = bool(batch_size)
+            config.CALL_TRANSCRIBE_BATCH_SIZE = batch_size
+            payload = {}
+
+            def run() -> None:
+                payload.update(transcriber._transcribe_blocking(wav_path))
+
+            results[label] = _time_call(run, args.repeat)
+            rows[label] = len(payload['conversation'])
+
+    print(f'recording: {duration:.1f}s, threads: {args.threads}, model: {args.model}/{args.compute_type}, beam: {args.beam_size}')
+    for label, seconds in results.items():
+        rtf = seconds / duration if duration else 0.0
+        speedup = results['sequential'] / seconds if seconds else 0.0
+        print(f'{label:>11}: {seconds:8.2f}s  RTF {rtf:.3f}  {speedup:5.2f}x  rows {rows[label]}')
+    return 0
+
+
+def _synthetic_channel_rows(rows: int, seed: int) -> tuple[list[ConversationRow], list[ConversationRow]]:
+    """Чередующиеся реплики двух каналов; часть пауз короче merge_gap, чтобы склейка тоже работала."""
+    rng = np.random.default_rng(seed)
+    left: list[ConversationRow] = []
+    right: list[ConversationRow] = []
+    position = 0.0
+    for index in range(rows):
+        start = position + float(rng.choice([0.05, 0.1, 0.5, 1.5]))
+        end = start + float(rng.uniform(0.4, 4.0))
+        channel, speaker, target = ('left', 'SPEAKER_1', left) if rng.random() < 0.5 else ('right', 'SPEAKER_2', right)
+        text = f'фраза номер {index}' + ('.' if rng.random() < 0.3 else '')
+        target.append(ConversationRow(speaker, channel, start, end, text))
+        position = end
+    return left, right
+
+
+def _legacy_conversation(left: list[ConversationRow], right: list[ConversationRow], merge_gap: float) -> list[dict]:
+    conversation = [row.to_dict() for row in left] + [row.to_dict() for row in right]
+    conversation.sort(key=lambda x: (x['start'], x['end'], x['speaker'], x['channel']))
+    return merge_adjacent_segments(conversation, merge_gap)
+
+
+def bench_merge(args: argparse.Namespace) -> int:
+    print(f'{"rows":>8} {"sort+merge, ms":>15} {"heap merge, ms":>15} {"speedup":>8}')
+    for rows in args.rows:
+        left, right = _synthetic_channel_rows(rows, seed=rows)
+        left_result = ChannelResult('SPEAKER_1', 'left', 'ru', 1.0, left)
+        right_result = ChannelResult('SPEAKER_2', 'right', 'ru', 1.0, right)
+
+        def streaming() -> list[dict]:
+            return build_output_json(
+                input_wav=Path('bench.wav'),
+                model_name='bench',
+                device='cpu',
+                compute_type='int8',
+                language='ru',
+                vad_filter=False,
+                vad_min_silence_ms=0,
+                merge_gap=args.merge_gap,
+                left=left_result,
+                right=right_result,
+            )['conversation']
+
+        if streaming() != _legacy_conversation(left, right, args.merge_gap):
+            print(f'{rows:>8}: results differ', file=sys.stderr)
+            return 1
+        legacy = _time_call(lambda: _legacy_conversation(left, right, args.merge_gap), args.repeat)
+        heap = _time_call(streaming, args.repeat)
+        print(f'{rows:>8} {legacy * 1000:>15.2f} {heap * 1000:>15.2f} {legacy / heap:>7.2f}x')
+    return 0
+
+
+def _synthetic_pdf_conversation(rows: int, seed: int) -> list[dict]:
+    rng = np.random.default_rng(seed)
+    words = ['алло', 'да', 'слушаю', 'заказ', 'номер', 'доставка', 'завтра', 'спасибо', 'хорошо', 'уточните', 'адрес', 'пожалуйста']
+    conversation = []
+    start = 0.0
+    for index in range(rows):
+        end = start + float(rng.uniform(0.5, 8.0))
+        row = ConversationRow(
+            speaker='SPEAKER_1' if index % 2 == 0 else 'SPEAKER_2',
+            channel='left' if index % 2 == 0 else 'right',
+            start=start,
+            end=end,
+            text=' '.join(rng.choice(words, size=int(rng.integers(2, 40)))).capitalize() + '.',
+        )
+        conversation.append(row.to_dict())
+        start = end + float(rng.uniform(0.1, 2.0))
+    return conversation
+
+
+def _measure(func) -> tuple[float, int]:
+    # tracemalloc сильно замедляет reportlab, поэтому время и пик памяти снимаются разными прогонами
+    started = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - started
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return elapsed, peak
+
+
+def bench_pdf(args: argparse.Namespace) -> int:
+    from integrations.transcription.pdf import TranscriptionPdfRenderer, _ensure_unicode_font
+    from integrations.transcription.pdf_stream import render_streaming_pdf
+
+    renderer = TranscriptionPdfRenderer(SimpleNamespace())
+    font_name = _ensure_unicode_font()
+    print(f'{"rows":>8} {"flowables s":>12} {"peak MB":>8} {"streaming s":>12} {"peak MB":>8} {"pages":>6} {"speedup":>8}')
+    with tempfile.TemporaryDirectory(prefix='bench_pdf_') as tmp_dir_str:
+        tmp_dir = Path(tmp_dir_str)
+        for rows in args.rows:
+            conversation = _synthetic_pdf_conversation(rows, seed=rows)
+            flowables, flowables_peak = _measure(lambda: renderer._build_pdf(tmp_dir / 'flowables.pdf', 'call.wav', conversation))
+            result = None
+
+            def streaming() -> None:
+                nonlocal result
+                result = render_streaming_pdf(
+                    tmp_dir / 'streaming.pdf',
+                    'call.wav',
+                    conversation,
+                    total_rows=rows,
+                    font_name=font_name,
+                    max_pages=args.max_pages,
+                    trailer_text='Показаны {written} из {total} фраз.',
+                )
+
+            stream, stream_peak = _measure(streaming)
+            print(
+                f'{rows:>8} {flowables:>12.2f} {flowables_peak / 2**20:>8.1f} {stream:>12.2f} {stream_peak / 2**20:>8.1f} '
+                f'{result.pages:>6} {flowables / stream:>7.1f}x'
+            )
+    return 0
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Transcription pipeline benchmarks.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    split = subparsers.add_parser('split', help='Compare in-process WAV channel split against the ffmpeg path.')
+    split.add_argument('--minutes', type=float, nargs='+', default=[1, 10, 60], help='Recording lengths in minutes. Default: 1 10 60')
+    split.add_argument('--sample-rate', type=int, default=8000, help='Sample rate of the synthetic recording. Default: 8000')
+    split.add_argument('--repeat', type=int, default=3, help='Best-of-N repetitions. Default: 3')
+    split.set_defaults(handler=bench_split)
+
+    channels = subparsers.add_parser('channels', help='Compare sequential and concurrent left/right channel transcription.')
+    channels.add_argument('input_wav', nargs='?', default=None, help='Stereo WAV to transcribe. Default: synthetic recording')
+    channels.add_argument('--seconds', type=float, default=60.0, help='Length of the synthetic recording. Default: 60')
+    channels.add_argument('--model', default='small', help='Whisper model. Default: small')
+    channels.add_argument('--compute-type', default='int8', help='Compute type. Default: int8')
+    channels.add_argument('--beam-size', type=int, default=5, help='Beam size. Default: 5')
+    channels.add_argument('--threads', type=int, default=os.cpu_count() or 4, help='Total CPU threads for both modes. Default: all cores')
+    channels.add_argument('--repeat', type=int, default=1, help='Best-of-N repetitions. Default: 1')
+    channels.set_defaults(handler=bench_channels)
+
+    batched = subparsers.add_parser('batched', help='Compare sequential decoding against BatchedInferencePipeline on a long recording.')
+    batched.add_argument('input_wav', nargs='?', default=None, help='Stereo WAV to transcribe. Default: synthetic recording')
+    batched.add_argument('--seconds', type=float, default=600.0, help='Length of the synthetic recording. Default: 600')
+    batched.add_argument('--model', default='small', help='Whisper model. Default: small')
+    batched.add_argument('--compute-type', default='int8', help='Compute type. Default: int8')
+    batched.add_argument('--beam-size', type=int, default=5, help='Beam size. Default: 5')
+    batched.add_argument('--threads', type=int, default=os.cpu_count() or 4, help='CPU threads. Default: all cores')
+    batched.add_argument('--batch-sizes', type=int, nargs='+', default=[4, 8, 16], help='Batch sizes to try. Default: 4 8 16')
+    batched.add_argument('--repeat', type=int, default=1, help='Best-of-N repetitions. Default: 1')
+    batched.set_defaults(handler=bench_batched)
+
+    pdf = subparsers.add_parser('pdf', help='Compare the flowable PDF layout against the streaming canvas renderer.')
+    pdf.add_argument('--rows', type=int, nargs='+', default=[100, 1000, 10000], help='Conversation sizes. Default: 100 1000 10000')
+    pdf.add_argument('--max-pages', type=int, default=0, help='Page limit for the streaming renderer. Default: 0 (no limit)')
+    pdf.set_defaults(handler=bench_pdf)
+
+    merge = subparsers.add_parser('merge', help='Compare concatenate+sort channel merge against the streaming heap merge.')
+    merge.add_argument('--rows', type=int, nargs='+', default=[1000, 10000], help='Conversation sizes. Default: 1000 10000')
+    merge.add_argument('--merge-gap', type=float, default=0.15, help='Adjacent phrase merge gap. Default: 0.15')
+    merge.add_argument('--repeat', type=int, default=5, help='Best-of-N repetitions. Default: 5')
+    merge.set_defaults(handler=bench_merge)
+
+    return parser.parse_args(argv)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = parse_args(argv)
+    return args.handler(args)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from threading import Lock
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class TranscriptionCache:
+    """
+    Кэш результатов транскрибации на диске.
+    Ключ — SHA-256 содержимого WAV и параметров распознавания, значение — JSON из build_output_json.
+    Вытеснение: сначала по возрасту, затем самые давно использованные файлы до укладки в лимит размера.
+    """
+
+    def __init__(self, directory: str | Path, max_bytes: int = 0, max_age_seconds: float = 0):
+        self.directory = Path(directory)
+        self.max_bytes = max(0, int(max_bytes))
+        self.max_age_seconds = max(0.0, float(max_age_seconds))
+        self._lock = Lock()
+
+    @classmethod
+    def from_config(cls, config) -> TranscriptionCache | None:
+        if not config.CALL_TRANSCRIBE_CACHE_ENABLED:
+            return None
+        return cls(
+            Path(config.CALL_TRANSCRIBE_ARTIFACTS_DIR) / 'cache',
+            max_bytes=int(config.CALL_TRANSCRIBE_CACHE_MAX_MB * 1024 * 1024),
+            max_age_seconds=config.CALL_TRANSCRIBE_CACHE_MAX_AGE_DAYS * 86400,
+        )
+
+    def key_for(self, wav_path: str | Path, params: dict[str, Any]) -> str:
+        digest = hashlib.sha256()
+        with Path(wav_path).open('rb') as f:
+            for chunk in iter(lambda: f.read(_HASH_CHUNK_SIZE), b''):
+                digest.update(chunk)
+        digest.update(b'\0')
+        digest.update(json.dumps(params, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        return digest.hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        path = self._path_for(key)
+        try:
+            payload = json.loads(path.read_text(encoding='utf-8'))
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.exception('Failed to read transcription cache entry %s', path)
+            return None
+        if self.max_age_seconds and time.time() - path.stat().st_mtime > self.max_age_seconds:
+            self._remove(path)
+            return None
+        # mtime — время последнего использования для LRU
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return payload
+
+    def put(self, key: str, payload: dict[str, Any]) -> None:
+        path = self._path_for(key)
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f'{path.name}.tmp')
+            tmp_path.write_text(json.dumps(payload, ensure_ascii=False), encoding='utf-8')
+            os.replace(tmp_path, path)
+        except Exception:
+            logger.exception('Failed to store transcription cache entry %s', path)
+            return
+        self.evict()
+
+    def evict(self) -> int:
+        """Удаляет устаревшие и лишние записи; возвращает число освобождённых байт."""
+        with self._lock:
+            try:
+                entries = [(entry.stat(), entry) for entry in self.directory.glob('*.json')]
+            except OSError:
+                return 0
+            now = time.time()
+            reclaimed = 0
+            alive = []
+            for stat, entry in entries:
+                if self.max_age_seconds and now - stat.st_mtime > self.max_age_seconds:
+                    reclaimed += self._remove(entry, stat.st_size)
+                else:
+                    alive.append((stat, entry))
+
+            if self.max_bytes:
+                total = sum(stat.st_size for stat, _ in alive)
+                for stat, entry in sorted(alive, key=lambda item: item[0].st_mtime):
+                    if total <= self.max_bytes:
+                        break
+                    reclaimed += self._remove(entry, stat.st_size)
+                    total -= stat.st_size
+
+            if reclaimed:
+                logger.info('Transcription cache eviction reclaimed %s bytes in %s', reclaimed, self.directory)
+            return reclaimed
+
+    def _path_for(self, key: str) -> Path:
+        return self.directory / f'{key}.json'
+
+    @staticmethod
+    def _remove(path: Path, size: int = 0) -> int:
+        try:
+            path.unlink()
+            return size
+        except FileNotFoundError:
+            return 0
+        except OSError:
+            logger.exception('Failed to remove transcription cache entry %s', path)
+            return 0
@@ -2,6 +2,9 @@
 from __future__ import annotations
 
 import argparse
+import contextlib
+import io
+import os
 import sys
 from pathlib import Path
 from types import SimpleNamespace
@@ -9,16 +12,27 @@ from types import SimpleNamespace
 from integrations.transcription.stereo import StereoCallTranscriber
 
 
-def parse_args() -> argparse.Namespace:
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
     parser = argparse.ArgumentParser(
-        description='Transcribe stereo WAV into JSON conversation. By default prints JSON to stdout.'
+        description='Transcribe stereo WAV into JSON conversation. By default prints JSON to stdout. '
+        'Run "batch --help" to transcribe many recordings, "bench --help" for pipeline benchmarks '
+        'and "autotune --help" to pick the fastest settings for this machine.'
     )
     parser.add_argument('input_wav', help='Path to input stereo WAV file.')
     parser.add_argument('-o', '--output', default=None, help='Optional output JSON file. If omitted, JSON is printed to stdout.')
+    add_transcription_arguments(parser)
+    parser.add_argument('--indent', type=int, default=2, help='JSON indentation. Default: 2')
+    return parser.parse_args(argv)
+
+
+def add_transcription_arguments(parser: argparse.ArgumentParser) -> None:
     parser.add_argument('--model', default='small', help='Whisper model size or local CTranslate2 model. Default: small')
     parser.add_argument('--device', default='cpu', help='Inference device. Default: cpu')
     parser.add_argument('--compute-type', default='int8', help='Compute type. Default: int8')
     parser.add_argument('--beam-size', type=int, default=5, help='Beam size. Default: 5')
+    parser.add_argument('--cpu-threads', type=int, default=0, help='CTranslate2 CPU threads (total when --parallel-channels is on). 0 means library default. Default: 0')
+    parser.add_argument('--num-workers', type=int, default=1, help='CTranslate2 workers. Default: 1')
+    parser.add_argument('--parallel-channels', action=argparse.BooleanOptionalAction, default=False, help='Transcribe left and right channels concurrently. Default: disabled')
     parser.add_argument('--merge-gap', type=float, default=0.15, help='Merge adjacent segments gap in seconds. Default: 0.15')
     parser.add_argument('--split-gap-seconds', type=float, default=0.8, help='Split phrase when pause is at least this many seconds. Default: 0.8')
     parser.add_argument('--punctuation-gap-seconds', type=float, default=0.35, help='Split after punctuation when pause is at least this many seconds. Default: 0.35')
@@ -27,8 +41,26 @@ def parse_args() -> argparse.Namespace:
     parser.add_argument('--right-label', default='SPEAKER_2', help='Label for right channel speaker. Default: SPEAKER_2')
     parser.add_argument('--vad-filter', action=argparse.BooleanOptionalAction, default=True, help='Enable or disable VAD filter. Default: enabled')
     parser.add_argument('--vad-min-silence-ms', type=int, default=500, help='Minimum silence duration for VAD. Default: 500')
-    parser.add_argument('--indent', type=int, default=2, help='JSON indentation. Default: 2')
-    return parser.parse_args()
+    parser.add_argument('--silence-trim', action=argparse.BooleanOptionalAction, default=False, help='Send only energy-detected speech regions to Whisper and skip silent channels. Quietly recorded channels (below about -40 dBFS) may be skipped entirely. Default: disabled')
+    parser.add_argument('--batched', action=argparse.BooleanOptionalAction, default=False, help='Decode up to 30 s speech clips in batches with faster-whisper BatchedInferencePipeline. Default: disabled')
+    parser.add_argument('--batch-size', type=int, default=8, help='Clips per batch in --batched mode. Default: 8')
+    parser.add_argument('--window-seconds', type=float, default=0.0, help='Split recordings of at least 1.5 windows into silence-aligned windows transcribed by a process pool. 0 disables. Default: 0')
+    parser.add_argument('--window-overlap-seconds', type=float, default=4.0, help='Overlap between adjacent windows. Default: 4')
+    parser.add_argument('--window-workers', type=int, default=0, help='Processes for windowed transcription. 0 means all cores. Default: 0')
+    parser.add_argument('--cache', action=argparse.BooleanOptionalAction, default=True, help='Reuse cached results for identical recordings and settings. Default: enabled')
+    artifacts_dir = default_artifacts_dir()
+    parser.add_argument('--cache-dir', default=str(artifacts_dir), help=f'Artifacts directory; the cache lives in its "cache" subdirectory. Default: CALL_TRANSCRIBE_ARTIFACTS_DIR of the bot ({artifacts_dir})')
+
+
+def default_artifacts_dir() -> Path:
+    """Каталог артефактов бота, чтобы CLI и бот пользовались одним кэшем."""
+    try:
+        # bootstrap.config завершает процесс, если нет обязательных переменных бота (BOT_TOKEN и т.д.)
+        with contextlib.redirect_stderr(io.StringIO()):
+            from bootstrap.config import CONFIG
+    except SystemExit:
+        return Path(os.environ.get('CALL_TRANSCRIBE_ARTIFACTS_DIR', '/opt/sms/var/transcriptions'))
+    return Path(CONFIG.CALL_TRANSCRIBE_ARTIFACTS_DIR)
 
 
 def build_cli_config(args: argparse.Namespace) -> SimpleNamespace:
@@ -38,20 +70,55 @@ def build_cli_config(args: argparse.Namespace) -> SimpleNamespace:
         CALL_TRANSCRIBE_DEVICE=args.device,
         CALL_TRANSCRIBE_COMPUTE_TYPE=args.compute_type,
         CALL_TRANSCRIBE_BEAM_SIZE=args.beam_size,
+        CALL_TRANSCRIBE_CPU_THREADS=args.cpu_threads,
+        CALL_TRANSCRIBE_NUM_WORKERS=args.num_workers,
+        CALL_TRANSCRIBE_PARALLEL_CHANNELS=args.parallel_channels,
         CALL_TRANSCRIBE_MERGE_GAP=args.merge_gap,
         CALL_TRANSCRIBE_SPLIT_GAP_SECONDS=args.split_gap_seconds,
         CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS=args.punctuation_gap_seconds,
         CALL_TRANSCRIBE_MAX_PHRASE_SECONDS=args.max_phrase_seconds,
         CALL_TRANSCRIBE_VAD_FILTER=args.vad_filter,
         CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS=args.vad_min_silence_ms,
+        CALL_TRANSCRIBE_SILENCE_TRIM=args.silence_trim,
+        CALL_TRANSCRIBE_BATCHED=args.batched,
+        CALL_TRANSCRIBE_BATCH_SIZE=args.batch_size,
+        CALL_TRANSCRIBE_WINDOW_SECONDS=args.window_seconds,
+        CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS=args.window_overlap_seconds,
+        CALL_TRANSCRIBE_WINDOW_WORKERS=args.window_workers,
         CALL_TRANSCRIBE_LEFT_LABEL=args.left_label,
         CALL_TRANSCRIBE_RIGHT_LABEL=args.right_label,
-        CALL_TRANSCRIBE_ARTIFACTS_DIR=Path('/tmp/sip-bridge-bot-transcriptions'),
+        CALL_TRANSCRIBE_ARTIFACTS_DIR=Path(args.cache_dir).expanduser(),
+        CALL_TRANSCRIBE_WORKER_PROCESS=False,
+        CALL_TRANSCRIBE_CACHE_ENABLED=args.cache,
+        CALL_TRANSCRIBE_CACHE_MAX_MB=100.0,
+        CALL_TRANSCRIBE_CACHE_MAX_AGE_DAYS=30.0,
+        CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS=0.0,
+        CALL_TRANSCRIBE_RSS_BUDGET_MB=0.0,
+        CALL_TRANSCRIBE_TUNING_FILE=None,
+        CALL_TRANSCRIBE_FAST_MODEL='',
+        CALL_TRANSCRIBE_FAST_BEAM_SIZE=1,
+        CALL_TRANSCRIBE_FAST_BACKLOG=0,
+        CALL_TRANSCRIBE_FAST_LONG_SECONDS=0.0,
+        CALL_TRANSCRIBE_FULL_QUALITY_RERUN=False,
     )
 
 
-def main() -> int:
-    args = parse_args()
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == 'bench':
+        from integrations.transcription.bench import main as bench_main
+
+        return bench_main(argv[1:])
+    if argv and argv[0] == 'batch':
+        from integrations.transcription.batch import main as batch_main
+
+        return batch_main(argv[1:])
+    if argv and argv[0] == 'autotune':
+        from integrations.transcription.autotune import main as autotune_main
+
+        return autotune_main(argv[1:])
+
+    args = parse_args(argv)
     input_wav = Path(args.input_wav).expanduser()
     if not input_wav.exists():
         print(f'Input file not found: {input_wav}', file=sys.stderr)
@@ -1,7 +1,12 @@
 from __future__ import annotations
 
+import asyncio
+import hashlib
+import json
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 from threading import Lock
 
@@ -16,6 +21,8 @@ from reportlab.pdfbase.ttfonts import TTFont
 from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
 from xml.sax.saxutils import escape
 
+from integrations.transcription.pdf_stream import render_streaming_pdf
+
 logger = logging.getLogger(__name__)
 
 _FONT_REGISTRY_LOCK = Lock()
@@ -26,15 +33,46 @@ _FONT_CANDIDATES = (
     '/usr/share/fonts/dejavu/DejaVuSans.ttf',
 )
 
+# Меняется вместе с оформлением PDF, чтобы не переиспользовать файлы в старой вёрстке
+_PDF_LAYOUT_VERSION = 1
+
 _BUBBLE_COLORS = {
     'left': HexColor('#f3f4f6'),
     'right': HexColor('#dbeafe'),
 }
 
 
+@dataclass(frozen=True)
+class _PdfStyles:
+    title: ParagraphStyle
+    meta: ParagraphStyle
+    bubble_text: ParagraphStyle
+    bubble_meta_left: ParagraphStyle
+    bubble_meta_right: ParagraphStyle
+    legend: ParagraphStyle
+    bubble_left: TableStyle
+    bubble_right: TableStyle
+    outer_left: TableStyle
+    outer_right: TableStyle
+
+
 class TranscriptionPdfRenderer:
+    """
+    PDF с транскрибацией в виде чата. Рендер выполняется в отдельном потоке (render_for_recording_async),
+    стили и шрифт создаются один раз, а готовый PDF для того же разговора (хэш строк) используется повторно.
+    Разговоры от CALL_TRANSCRIBE_PDF_STREAMING_ROWS фраз рисуются постранично на canvas (pdf_stream)
+    с необязательным ограничением CALL_TRANSCRIBE_PDF_MAX_PAGES.
+    """
+
     def __init__(self, config):
         self.config = config
+        self._styles: _PdfStyles | None = None
+        self._styles_lock = Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='transcription-pdf')
+
+    async def render_for_recording_async(self, recording_path: str | Path, conversation: list[dict] | None) -> tuple[str | None, str | None]:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self.render_for_recording, recording_path, conversation)
 
     def render_for_recording(self, recording_path: str | Path, conversation: list[dict] | None) -> tuple[str | None, str | None]:
         rows = [row for row in (conversation or []) if str(row.get('text') or '').strip()]
@@ -46,14 +84,117 @@ class TranscriptionPdfRenderer:
         target_dir.mkdir(parents=True, exist_ok=True)
 
         pdf_name = f'{source_path.stem}-transcription.pdf'
-        pdf_path = target_dir / pdf_name
-        self._build_pdf(pdf_path, source_path.name, rows)
+        streaming = self._use_streaming(len(rows))
+        max_pages = int(self.config.CALL_TRANSCRIBE_PDF_MAX_PAGES or 0) if streaming else 0
+        digest = _conversation_hash(source_path.name, rows, f'streaming={streaming} max_pages={max_pages}')
+        pdf_path = target_dir / f'{source_path.stem}-transcription-{digest}.pdf'
+        if pdf_path.exists():
+            logger.info('Reusing transcription PDF %s', pdf_path)
+            # mtime — время последнего использования для LRU в workers/housekeeping.py
+            try:
+                os.utime(pdf_path)
+            except OSError:
+                pass
+            return str(pdf_path), pdf_name
+
+        tmp_path = pdf_path.with_name(f'{pdf_path.name}.tmp')
+        if streaming:
+            self._build_streaming_pdf(tmp_path, source_path.name, rows, max_pages)
+        else:
+            self._build_pdf(tmp_path, source_path.name, rows)
+        os.replace(tmp_path, pdf_path)
         return str(pdf_path), pdf_name
 
+    def _use_streaming(self, row_count: int) -> bool:
+        threshold = int(self.config.CALL_TRANSCRIBE_PDF_STREAMING_ROWS or 0)
+        return bool(threshold) and row_count >= threshold
+
+    def _build_streaming_pdf(self, pdf_path: Path, recording_file_name: str, conversation: list[dict], max_pages: int) -> None:
+        json_path = pdf_path.with_name(pdf_path.name.removesuffix('.pdf.tmp') + '.json')
+        result = render_streaming_pdf(
+            pdf_path,
+            recording_file_name,
+            conversation,
+            total_rows=len(conversation),
+            font_name=_ensure_unicode_font(),
+            max_pages=max_pages,
+            trailer_text=f'Показаны {{written}} из {{total}} фраз. Продолжение разговора — в JSON: {json_path.name}',
+        )
+        if result.truncated:
+            # Полный текст остаётся рядом с PDF (и в карточке звонка)
+            json_path.write_text(json.dumps(conversation, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+            logger.info('Transcription PDF truncated at %s pages (%s of %s rows); full text in %s', result.pages, result.rows_written, len(conversation), json_path)
+
+    def _get_styles(self) -> _PdfStyles:
+        with self._styles_lock:
+            if self._styles is None:
+                self._styles = _build_styles(_ensure_unicode_font())
+            return self._styles
+
     def _build_pdf(self, pdf_path: Path, recording_file_name: str, conversation: list[dict]) -> None:
-        font_name = _ensure_unicode_font()
-        styles = getSampleStyleSheet()
-        title_style = ParagraphStyle(
+        styles = self._get_styles()
+        doc = SimpleDocTemplate(
+            str(pdf_path),
+            pagesize=A4,
+            leftMargin=16 * mm,
+            rightMargin=16 * mm,
+            topMargin=16 * mm,
+            bottomMargin=14 * mm,
+            title='Транскрибация звонка',
+            author='sip-bridge-bot',
+            subject='Транскрибация разговора',
+        )
+
+        story = [
+            Paragraph('Транскрибация звонка', styles.title),
+            Paragraph(escape(f'Файл записи: {recording_file_name}'), styles.meta),
+            Spacer(1, 2 * mm),
+        ]
+
+        for row in conversation:
+            story.append(self._build_chat_bubble(row=row, styles=styles))
+            story.append(Spacer(1, 2.3 * mm))
+
+        doc.build(story)
+
+    def _build_chat_bubble(self, *, row: dict, styles: _PdfStyles) -> Table:
+        speaker = str(row.get('speaker') or 'SPEAKER')
+        channel = str(row.get('channel') or 'left')
+        start_hms = str(row.get('start_hms') or '')
+        end_hms = str(row.get('end_hms') or '')
+        text = escape(str(row.get('text') or '').strip())
+        side = 'right' if channel == 'right' else 'left'
+        meta_style = styles.bubble_meta_right if side == 'right' else styles.bubble_meta_left
+        meta = escape(f'{speaker}  {start_hms} - {end_hms}'.strip())
+
+        bubble_inner = Table(
+            [[Paragraph(meta, meta_style)], [Paragraph(text, styles.bubble_text)]],
+            colWidths=[118 * mm],
+        )
+        bubble_inner.setStyle(styles.bubble_right if side == 'right' else styles.bubble_left)
+
+        if side == 'right':
+            outer = Table([[ '', bubble_inner ]], colWidths=[42 * mm, 118 * mm])
+        else:
+            outer = Table([[ bubble_inner, '' ]], colWidths=[118 * mm, 42 * mm])
+
+        outer.setStyle(styles.outer_right if side == 'right' else styles.outer_left)
+        return outer
+
+
+def _conversation_hash(recording_file_name: str, rows: list[dict], layout: str) -> str:
+    digest = hashlib.sha256()
+    digest.update(f'{_PDF_LAYOUT_VERSION}\0{layout}\0{recording_file_name}\0'.encode('utf-8'))
+    for row in rows:
+        digest.update(json.dumps(row, sort_keys=True, ensure_ascii=False).encode('utf-8'))
+        digest.update(b'\n')
+    return digest.hexdigest()[:16]
+
+
+def _build_styles(font_name: str) -> _PdfStyles:
+    styles = getSampleStyleSheet()
+    return _PdfStyles(
+        title=ParagraphStyle(
             'TranscriptionTitle',
             parent=styles['Title'],
             fontName=font_name,
@@ -62,8 +203,8 @@ class TranscriptionPdfRenderer:
             alignment=TA_LEFT,
             textColor=HexColor('#111827'),
             spaceAfter=6,
-        )
-        meta_style = ParagraphStyle(
+        ),
+        meta=ParagraphStyle(
             'TranscriptionMeta',
             parent=styles['BodyText'],
             fontName=font_name,
@@ -71,8 +212,8 @@ class TranscriptionPdfRenderer:
             leading=12,
             textColor=HexColor('#6b7280'),
             spaceAfter=4,
-        )
-        bubble_text_style = ParagraphStyle(
+        ),
+        bubble_text=ParagraphStyle(
             'TranscriptionBubbleText',
             parent=styles['BodyText'],
             fontName=font_name,
@@ -80,8 +221,8 @@ class TranscriptionPdfRenderer:
             leading=14,
             textColor=HexColor('#111827'),
             spaceAfter=0,
-        )
-        bubble_meta_left_style = ParagraphStyle(
+        ),
+        bubble_meta_left=ParagraphStyle(
             'TranscriptionBubbleMetaLeft',
             parent=styles['BodyText'],
             fontName=font_name,
@@ -90,8 +231,8 @@ class TranscriptionPdfRenderer:
             textColor=HexColor('#4b5563'),
             alignment=TA_LEFT,
             spaceAfter=3,
-        )
-        bubble_meta_right_style = ParagraphStyle(
+        ),
+        bubble_meta_right=ParagraphStyle(
             'TranscriptionBubbleMetaRight',
             parent=styles['BodyText'],
             fontName=font_name,
@@ -100,8 +241,8 @@ class TranscriptionPdfRenderer:
             textColor=HexColor('#334155'),
             alignment=TA_RIGHT,
             spaceAfter=3,
-        )
-        legend_style = ParagraphStyle(
+        ),
+        legend=ParagraphStyle(
             'TranscriptionLegend',
             parent=styles['BodyText'],
             fontName=font_name,
@@ -109,94 +250,41 @@ class TranscriptionPdfRenderer:
             leading=11,
             textColor=HexColor('#6b7280'),
             spaceAfter=8,
-        )
+        ),
+        bubble_left=_bubble_table_style('left'),
+        bubble_right=_bubble_table_style('right'),
+        outer_left=_outer_table_style('left'),
+        outer_right=_outer_table_style('right'),
+    )
 
-        doc = SimpleDocTemplate(
-            str(pdf_path),
-            pagesize=A4,
-            leftMargin=16 * mm,
-            rightMargin=16 * mm,
-            topMargin=16 * mm,
-            bottomMargin=14 * mm,
-            title='Транскрибация звонка',
-            author='sip-bridge-bot',
-            subject='Транскрибация разговора',
-        )
 
-        story = [
-            Paragraph('Транскрибация звонка', title_style),
-            Paragraph(escape(f'Файл записи: {recording_file_name}'), meta_style),
-            Spacer(1, 2 * mm),
+def _bubble_table_style(side: str) -> TableStyle:
+    return TableStyle(
+        [
+            ('BACKGROUND', (0, 0), (-1, -1), _BUBBLE_COLORS[side]),
+            ('BOX', (0, 0), (-1, -1), 0.6, colors.white),
+            ('LEFTPADDING', (0, 0), (-1, -1), 10),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 10),
+            ('TOPPADDING', (0, 0), (-1, -1), 7),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT' if side == 'right' else 'LEFT'),
+            ('ROUNDEDCORNERS', [8, 8, 8, 8]),
         ]
+    )
 
-        for row in conversation:
-            bubble = self._build_chat_bubble(
-                row=row,
-                bubble_text_style=bubble_text_style,
-                bubble_meta_left_style=bubble_meta_left_style,
-                bubble_meta_right_style=bubble_meta_right_style,
-            )
-            story.append(bubble)
-            story.append(Spacer(1, 2.3 * mm))
-
-        doc.build(story)
-
-    def _build_chat_bubble(
-        self,
-        *,
-        row: dict,
-        bubble_text_style: ParagraphStyle,
-        bubble_meta_left_style: ParagraphStyle,
-        bubble_meta_right_style: ParagraphStyle,
-    ) -> Table:
-        speaker = str(row.get('speaker') or 'SPEAKER')
-        channel = str(row.get('channel') or 'left')
-        start_hms = str(row.get('start_hms') or '')
-        end_hms = str(row.get('end_hms') or '')
-        text = escape(str(row.get('text') or '').strip())
-        side = 'right' if channel == 'right' else 'left'
-        meta_style = bubble_meta_right_style if side == 'right' else bubble_meta_left_style
-        align = TA_RIGHT if side == 'right' else TA_LEFT
-        meta = escape(f'{speaker}  {start_hms} - {end_hms}'.strip())
-
-        bubble_inner = Table(
-            [[Paragraph(meta, meta_style)], [Paragraph(text, bubble_text_style)]],
-            colWidths=[118 * mm],
-        )
-        bubble_inner.setStyle(
-            TableStyle(
-                [
-                    ('BACKGROUND', (0, 0), (-1, -1), _BUBBLE_COLORS[side]),
-                    ('BOX', (0, 0), (-1, -1), 0.6, colors.white),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 10),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 10),
-                    ('TOPPADDING', (0, 0), (-1, -1), 7),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                    ('ALIGN', (0, 0), (-1, -1), 'RIGHT' if side == 'right' else 'LEFT'),
-                    ('ROUNDEDCORNERS', [8, 8, 8, 8]),
-                ]
-            )
-        )
-
-        if side == 'right':
-            outer = Table([[ '', bubble_inner ]], colWidths=[42 * mm, 118 * mm])
-        else:
-            outer = Table([[ bubble_inner, '' ]], colWidths=[118 * mm, 42 * mm])
 
-        outer.setStyle(
-            TableStyle(
-                [
-                    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-                    ('ALIGN', (0, 0), (-1, -1), 'RIGHT' if side == 'right' else 'LEFT'),
-                    ('LEFTPADDING', (0, 0), (-1, -1), 0),
-                    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
-                    ('TOPPADDING', (0, 0), (-1, -1), 0),
-                    ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
-                ]
-            )
-        )
-        return outer
+def _outer_table_style(side: str) -> TableStyle:
+    return TableStyle(
+        [
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (0, 0), (-1, -1), 'RIGHT' if side == 'right' else 'LEFT'),
+            ('LEFTPADDING', (0, 0), (-1, -1), 0),
+            ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+            ('TOPPADDING', (0, 0), (-1, -1), 0),
+            ('BOTTOMPADDING', (0, 0), (-1, -1), 0),
+        ]
+    )
 
 
 def _ensure_unicode_font() -> str:
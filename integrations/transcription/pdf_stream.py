@@ -0,0 +1,169 @@
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+from dataclasses import dataclass
+from pathlib import Path
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+from reportlab.lib.utils import simpleSplit
+from reportlab.pdfgen.canvas import Canvas
+
+_PAGE_WIDTH, _PAGE_HEIGHT = A4
+_MARGIN_LEFT = 16 * mm
+_MARGIN_TOP = 16 * mm
+_MARGIN_BOTTOM = 14 * mm
+_BUBBLE_WIDTH = 118 * mm
+_RIGHT_BUBBLE_X = _MARGIN_LEFT + 42 * mm
+_BUBBLE_GAP = 2.3 * mm
+_PAD_X = 10
+_PAD_TOP = 7
+_PAD_BOTTOM = 8
+_META_SIZE, _META_LEADING, _META_SPACE = 8.5, 11, 3
+_TEXT_SIZE, _TEXT_LEADING = 10.5, 14
+_TITLE_SIZE, _TITLE_LEADING = 16, 20
+_TRAILER_HEIGHT = 2 * _TEXT_LEADING
+_WRAP_CACHE_SIZE = 4096
+
+_TEXT_COLOR = HexColor('#111827')
+_MUTED_COLOR = HexColor('#6b7280')
+_BUBBLE_COLORS = {'left': HexColor('#f3f4f6'), 'right': HexColor('#dbeafe')}
+_META_COLORS = {'left': HexColor('#4b5563'), 'right': HexColor('#334155')}
+
+
+@dataclass
+class StreamingPdfResult:
+    rows_written: int
+    pages: int
+    truncated: bool
+
+
+class _BubbleMeasurer:
+    """
+    Высота пузыря зависит только от числа строк текста, поэтому кэшируются переносы строк
+    (ограниченный LRU: на длинных звонках часто повторяются одинаковые фразы и IVR-подсказки)
+    и высоты по числу строк.
+    """
+
+    def __init__(self, font_name: str):
+        self.font_name = font_name
+        self._lines: OrderedDict[str, list[str]] = OrderedDict()
+        self._heights: dict[int, float] = {}
+
+    def wrap(self, text: str) -> list[str]:
+        lines = self._lines.get(text)
+        if lines is not None:
+            self._lines.move_to_end(text)
+            return lines
+        lines = simpleSplit(text, self.font_name, _TEXT_SIZE, _BUBBLE_WIDTH - 2 * _PAD_X) or ['']
+        self._lines[text] = lines
+        if len(self._lines) > _WRAP_CACHE_SIZE:
+            self._lines.popitem(last=False)
+        return lines
+
+    def height(self, line_count: int) -> float:
+        height = self._heights.get(line_count)
+        if height is None:
+            height = _PAD_TOP + _META_LEADING + _META_SPACE + line_count * _TEXT_LEADING + _PAD_BOTTOM
+            self._heights[line_count] = height
+        return height
+
+    def lines_fitting(self, space: float) -> int:
+        """Сколько строк текста помещается в пузырь высотой не больше space."""
+        return max(0, int((space - self.height(0)) // _TEXT_LEADING))
+
+
+def render_streaming_pdf(
+    pdf_path: str | Path,
+    recording_file_name: str,
+    rows: Iterable[dict],
+    total_rows: int,
+    font_name: str,
+    max_pages: int = 0,
+    trailer_text: str = '',
+) -> StreamingPdfResult:
+    """
+    Рисует чат сразу на canvas постранично, без дерева flowable-объектов и их разметки.
+    Готовые страницы Canvas держит в памяти до save(), поэтому пик памяти всё же растёт с числом
+    страниц (сжатым содержимым, а не объектами на каждую фразу); ограничивает его max_pages.
+    Пузырь выше страницы делится по строкам между страницами. При max_pages > 0 последняя
+    страница заканчивается пометкой trailer_text о том, что продолжение — в JSON.
+    """
+    canvas = Canvas(str(pdf_path), pagesize=A4, pageCompression=1)
+    canvas.setTitle('Транскрибация звонка')
+    canvas.setAuthor('sip-bridge-bot')
+    canvas.setSubject('Транскрибация разговора')
+    measurer = _BubbleMeasurer(font_name)
+
+    y = _PAGE_HEIGHT - _MARGIN_TOP - _TITLE_LEADING
+    canvas.setFillColor(_TEXT_COLOR)
+    canvas.setFont(font_name, _TITLE_SIZE)
+    canvas.drawString(_MARGIN_LEFT, y, 'Транскрибация звонка')
+    y -= 6 + 12
+    canvas.setFillColor(_MUTED_COLOR)
+    canvas.setFont(font_name, 9)
+    canvas.drawString(_MARGIN_LEFT, y, f'Файл записи: {recording_file_name}')
+    y -= 4 + 2 * mm
+
+    pages = 1
+    written = 0
+    truncated = False
+    for row in rows:
+        lines = measurer.wrap(' '.join(str(row.get('text') or '').split()))
+        while True:
+            height = measurer.height(len(lines))
+            last_page = max_pages and pages >= max_pages
+            bottom = _MARGIN_BOTTOM + (_TRAILER_HEIGHT if last_page else 0)
+            if y - height >= bottom:
+                break
+            # Пузырь выше целой страницы не поместится и на новой: его строки делятся между страницами
+            fit = measurer.lines_fitting(y - bottom) if height > _PAGE_HEIGHT - _MARGIN_TOP - bottom else 0
+            if fit:
+                _draw_bubble(canvas, font_name, row, lines[:fit], y, measurer.height(fit))
+                lines = lines[fit:]
+            if last_page:
+                truncated = True
+                break
+            canvas.showPage()
+            pages += 1
+            y = _PAGE_HEIGHT - _MARGIN_TOP
+        if truncated:
+            break
+        _draw_bubble(canvas, font_name, row, lines, y, height)
+        y -= height + _BUBBLE_GAP
+        written += 1
+
+    if truncated and trailer_text:
+        canvas.setFillColor(_MUTED_COLOR)
+        canvas.setFont(font_name, 9)
+        text = trailer_text.format(written=written, total=total_rows)
+        for line in simpleSplit(text, font_name, 9, _PAGE_WIDTH - 2 * _MARGIN_LEFT):
+            y -= 12
+            canvas.drawString(_MARGIN_LEFT, y, line)
+    canvas.save()
+    return StreamingPdfResult(rows_written=written, pages=pages, truncated=truncated)
+
+
+def _draw_bubble(canvas: Canvas, font_name: str, row: dict, lines: list[str], top: float, height: float) -> None:
+    side = 'right' if str(row.get('channel') or 'left') == 'right' else 'left'
+    x = _RIGHT_BUBBLE_X if side == 'right' else _MARGIN_LEFT
+    canvas.setFillColor(_BUBBLE_COLORS[side])
+    canvas.roundRect(x, top - height, _BUBBLE_WIDTH, height, 8, stroke=0, fill=1)
+
+    meta = f'{row.get("speaker") or "SPEAKER"}  {row.get("start_hms") or ""} - {row.get("end_hms") or ""}'.strip()
+    baseline = top - _PAD_TOP - _META_SIZE
+    canvas.setFillColor(_META_COLORS[side])
+    canvas.setFont(font_name, _META_SIZE)
+    if side == 'right':
+        canvas.drawRightString(x + _BUBBLE_WIDTH - _PAD_X, baseline, meta)
+    else:
+        canvas.drawString(x + _PAD_X, baseline, meta)
+
+    canvas.setFillColor(_TEXT_COLOR)
+    canvas.setFont(font_name, _TEXT_SIZE)
+    baseline = top - _PAD_TOP - _META_LEADING - _META_SPACE - _TEXT_SIZE
+    for line in lines:
+        canvas.drawString(x + _PAD_X, baseline, line)
+        baseline -= _TEXT_LEADING
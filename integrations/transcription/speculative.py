@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_REMEMBERED_CLAIMS = 1000
+_PRUNE_INTERVAL_SECONDS = 60.0
+
+
+@dataclass
+class _SpeculativeJob:
+    wav_path: Path
+    started_at: float
+    task: asyncio.Task | None = None
+    finished_at: float | None = None
+    rows: list[dict[str, Any]] = field(default_factory=list)
+    on_rows: Callable[[list[dict[str, Any]]], None] | None = None
+    on_full_quality: Callable[[dict[str, Any]], Awaitable[None]] | None = None
+    claimed: bool = False
+
+
+class SpeculativeTranscriber:
+    """
+    Обёртка над StereoCallTranscriber: start() начинает распознавать запись, как только Asterisk её закрыл,
+    а transcribe_recording() для той же записи (ключ — uniqueid, имя файла без .wav) подхватывает уже
+    идущее или готовое задание вместо нового. Строки, распознанные до этого, передаются в on_rows разом.
+    Одновременно идёт не больше max_jobs невостребованных заданий: остальные записи распознаются как обычно,
+    когда их заберёт группа CDR. Невостребованные результаты удаляются через ttl_seconds (проверка по таймеру).
+    """
+
+    def __init__(self, transcriber, ttl_seconds: float = 600.0, max_jobs: int = 1):
+        self._transcriber = transcriber
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max(1, int(max_jobs))
+        self._jobs: dict[str, _SpeculativeJob] = {}
+        self._claimed: OrderedDict[str, None] = OrderedDict()
+        self._prune_task: asyncio.Task | None = None
+
+    def is_enabled(self) -> bool:
+        return self._transcriber.is_enabled()
+
+    async def preload(self) -> None:
+        await self._transcriber.preload()
+
+    def set_backlog_source(self, source: Callable[[], int]) -> None:
+        self._transcriber.set_backlog_source(source)
+
+    def start(self, wav_path: str | Path) -> bool:
+        """Запускает распознавание закрытой записи; False, если оно уже идёт или запись уже обработана."""
+        self._prune()
+        path = Path(wav_path)
+        uniqueid = path.stem
+        if not self.is_enabled() or uniqueid in self._jobs or uniqueid in self._claimed:
+            return False
+        if self.active_jobs() >= self.max_jobs:
+            logger.info('Speculative transcription skipped for %s: %s jobs already running', path, self.max_jobs)
+            return False
+        job = _SpeculativeJob(wav_path=path, started_at=time.monotonic())
+        job.task = asyncio.create_task(self._run(job), name=f'speculative-transcription-{uniqueid}')
+        self._jobs[uniqueid] = job
+        if self._prune_task is None:
+            self._prune_task = asyncio.create_task(self._prune_periodically(), name='speculative-transcription-prune')
+        logger.info('Speculative transcription started for %s', path)
+        return True
+
+    async def transcribe_recording(
+        self,
+        wav_path: str | None,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+        on_full_quality: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+    ) -> dict[str, Any] | None:
+        if not wav_path:
+            return await self._transcriber.transcribe_recording(wav_path, on_rows=on_rows, on_full_quality=on_full_quality)
+
+        uniqueid = Path(wav_path).stem
+        job = self._jobs.pop(uniqueid, None)
+        self._remember_claim(uniqueid)
+        if job is None:
+            return await self._transcriber.transcribe_recording(wav_path, on_rows=on_rows, on_full_quality=on_full_quality)
+
+        logger.info(
+            'Using speculative transcription for %s (%s, started %.1fs ago)',
+            uniqueid,
+            'finished' if job.task.done() else 'in progress',
+            time.monotonic() - job.started_at,
+        )
+        job.claimed = True
+        job.on_rows = on_rows
+        job.on_full_quality = on_full_quality
+        if on_rows is not None and job.rows:
+            on_rows(job.rows)
+        job.rows = []
+        return await job.task
+
+    async def _run(self, job: _SpeculativeJob) -> dict[str, Any] | None:
+        def forward_rows(rows: list[dict[str, Any]]) -> None:
+            if job.on_rows is not None:
+                job.on_rows(rows)
+            elif not job.claimed:
+                job.rows.extend(rows)
+
+        async def forward_full_quality(payload: dict[str, Any]) -> None:
+            if job.on_full_quality is not None:
+                await job.on_full_quality(payload)
+
+        try:
+            return await self._transcriber.transcribe_recording(
+                str(job.wav_path),
+                on_rows=forward_rows,
+                on_full_quality=forward_full_quality,
+                speculative=True,
+            )
+        finally:
+            job.finished_at = time.monotonic()
+
+    def active_jobs(self) -> int:
+        """Число невостребованных заданий, которые ещё распознаются."""
+        return sum(1 for job in self._jobs.values() if job.finished_at is None)
+
+    def _remember_claim(self, uniqueid: str) -> None:
+        # Повторное закрытие файла после того, как группа CDR уже обработана, не запускает распознавание снова
+        self._claimed[uniqueid] = None
+        while len(self._claimed) > _REMEMBERED_CLAIMS:
+            self._claimed.popitem(last=False)
+
+    async def _prune_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(min(self.ttl_seconds, _PRUNE_INTERVAL_SECONDS))
+            self._prune()
+
+    def _prune(self) -> None:
+        now = time.monotonic()
+        for uniqueid, job in list(self._jobs.items()):
+            if job.finished_at is not None and now - job.finished_at > self.ttl_seconds:
+                del self._jobs[uniqueid]
+                logger.info('Dropping unclaimed speculative transcription for %s', uniqueid)
@@ -1,21 +1,58 @@
 from __future__ import annotations
 
 import asyncio
+import gc
+import heapq
 import json
 import logging
+import os
+import queue
 import re
 import shutil
 import subprocess
 import tempfile
+import time
+from collections.abc import Awaitable, Callable, Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from dataclasses import dataclass
 from pathlib import Path
-from threading import Lock
+from threading import Lock, Thread
+from types import SimpleNamespace
 from typing import Any
 
-from faster_whisper import WhisperModel
+import numpy as np
+from faster_whisper import BatchedInferencePipeline, WhisperModel
+from faster_whisper.audio import decode_audio
+
+from integrations.transcription.adaptive import (
+    adaptive_quality_enabled,
+    choose_quality_profile,
+    fast_profile_config,
+    full_quality_profile,
+)
+from integrations.transcription.audio import (
+    WHISPER_SAMPLE_RATE,
+    SpeechTimeline,
+    compact_speech,
+    detect_speech_regions,
+    load_stereo_channels,
+    pack_speech_clips,
+    wav_duration_seconds,
+)
+from integrations.transcription.cache import TranscriptionCache
+from integrations.transcription.tuning import apply_tuning_file
+from integrations.transcription.windowed import WindowedChannelPool, plan_windows, vote_language
+from integrations.transcription.worker import TranscriptionWorkerClient
 
 logger = logging.getLogger(__name__)
 
+_MODEL_WATCHDOG_INTERVAL_SECONDS = 15.0
+_FULL_QUALITY_RERUN_QUEUE_SIZE = 100
+_FULL_QUALITY_RERUN_POLL_SECONDS = 10.0
+_SEGMENT_KWARGS = ('channel_name', 'language', 'beam_size', 'vad_filter', 'vad_min_silence_ms', 'silence_trim', 'batch_size')
+# Обрезка тишины применяется, только если сокращает аудио хотя бы на 10%
+_SILENCE_TRIM_MIN_SAVING = 0.9
 _SENTENCE_END_RE = re.compile(r'[.!?…]+["»”)]*$')
 
 
@@ -25,20 +62,65 @@ class ChannelResult:
     channel: str
     detected_language: str | None
     language_probability: float | None
-    segments: list[dict[str, Any]]
+    segments: list[ConversationRow]
+
+
+@dataclass
+class ChannelStream:
+    speaker: str
+    channel: str
+    detected_language: str | None
+    language_probability: float | None
+    rows: Iterator[ConversationRow]
+
+    def collect(self, segments: list[ConversationRow] | None = None) -> ChannelResult:
+        return ChannelResult(
+            speaker=self.speaker,
+            channel=self.channel,
+            detected_language=self.detected_language,
+            language_probability=self.language_probability,
+            segments=list(self.rows) if segments is None else segments,
+        )
 
 
 class StereoCallTranscriber:
     def __init__(self, config):
+        config = apply_tuning_file(config)
         self.config = config
         self._model: WhisperModel | None = None
         self._model_lock = Lock()
+        self._model_users = 0
+        self._model_last_used = 0.0
+        self._model_watchdog: Thread | None = None
         self._transcribe_lock = asyncio.Lock()
+        self._cache = TranscriptionCache.from_config(config)
+        self._worker_client = TranscriptionWorkerClient(config) if config.CALL_TRANSCRIBE_WORKER_PROCESS else None
+        # Оконный режим работает там, где распознаётся запись: в процессе-воркере или здесь, если воркер отключён
+        use_windows = config.CALL_TRANSCRIBE_WINDOW_SECONDS and self._worker_client is None
+        self._window_pool = WindowedChannelPool(config) if use_windows else None
+        self._fast: StereoCallTranscriber | None = None
+        self._backlog_source: Callable[[], int] | None = None
+        self._in_flight = 0
+        self._reruns: asyncio.Queue | None = None
+        self._rerun_task: asyncio.Task | None = None
 
     def is_enabled(self) -> bool:
         return bool(self.config.CALL_TRANSCRIBE_ENABLED)
 
-    async def transcribe_recording(self, wav_path: str | None) -> dict[str, Any] | None:
+    async def transcribe_recording(
+        self,
+        wav_path: str | None,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+        on_full_quality: Callable[[dict[str, Any]], Awaitable[None]] | None = None,
+        speculative: bool = False,
+    ) -> dict[str, Any] | None:
+        """
+        on_rows вызывается в event loop с новыми строками разговора (по времени, обоих каналов)
+        по мере распознавания — для промежуточного показа. Итоговый результат возвращается как раньше.
+        Если при очереди записей выбран быстрый профиль, а CALL_TRANSCRIBE_FULL_QUALITY_RERUN включён,
+        on_full_quality позже получит результат полного качества (когда очередь опустеет).
+        speculative=True — запись ещё не ждёт ни одна группа CDR: она не считается в очереди для выбора профиля.
+        """
         if not self.is_enabled() or not wav_path:
             return None
 
@@ -47,18 +129,174 @@ class StereoCallTranscriber:
             logger.warning('Transcription skipped: file not found: %s', path)
             return None
 
+        if not adaptive_quality_enabled(self.config):
+            return await self._transcribe_serialized(path, on_rows)
+
+        profile = choose_quality_profile(self.config, wav_duration_seconds(path), self.backlog())
+        if profile.is_fast:
+            logger.info('Transcribing %s with the fast profile (%s/beam %s): %s', path, profile.model, profile.beam_size, profile.reason)
+        in_flight = 0 if speculative else 1
+        self._in_flight += in_flight
+        try:
+            payload = await self._transcribe_serialized(path, on_rows, fast=profile.is_fast)
+        finally:
+            self._in_flight -= in_flight
+        if payload is None:
+            return None
+        payload['quality'] = profile.to_dict()
+        if profile.is_fast and on_full_quality is not None and self.config.CALL_TRANSCRIBE_FULL_QUALITY_RERUN:
+            self._schedule_full_quality_rerun(path, on_full_quality)
+        return payload
+
+    def set_backlog_source(self, source: Callable[[], int]) -> None:
+        """source возвращает число записей, ожидающих транскрибации (например, глубину очереди CDR)."""
+        self._backlog_source = source
+
+    def backlog(self) -> int:
+        queued = self._backlog_source() if self._backlog_source is not None else 0
+        return queued + self._in_flight
+
+    async def _transcribe_serialized(
+        self,
+        path: Path,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+        fast: bool = False,
+    ) -> dict[str, Any] | None:
         async with self._transcribe_lock:
             try:
-                return await asyncio.to_thread(self._transcribe_blocking, path)
+                if self._worker_client is not None:
+                    on_event = None
+                    if on_rows is not None:
+                        def on_event(message: dict[str, Any]) -> None:
+                            if message.get('event') == 'rows':
+                                on_rows(message.get('rows') or [])
+                    return await self._worker_client.transcribe(path, on_event=on_event, stream=on_rows is not None, fast=fast)
+                thread_on_rows = None
+                if on_rows is not None:
+                    loop = asyncio.get_running_loop()
+
+                    def thread_on_rows(rows: list[dict[str, Any]]) -> None:
+                        loop.call_soon_threadsafe(on_rows, rows)
+                transcriber = self.profile_transcriber(fast)
+                return await asyncio.to_thread(transcriber._transcribe_blocking, path, thread_on_rows)
             except Exception:
                 logger.exception('Failed to transcribe recording: %s', path)
                 return None
 
+    def profile_transcriber(self, fast: bool) -> StereoCallTranscriber:
+        """
+        Транскрибер профиля качества для очередного задания (в процессе-воркере или здесь, если воркер
+        отключён). Модели обоих профилей одновременно в памяти не держатся: задания идут по одному,
+        и перед заданием модель другого профиля выгружается. Цена — повторная загрузка при смене профиля.
+        """
+        if fast:
+            if self._fast is None:
+                self._fast = StereoCallTranscriber(fast_profile_config(self.config))
+            active, idle = self._fast, self
+        else:
+            active, idle = self, self._fast
+        if idle is not None:
+            idle.unload_model(f'switching to the {"fast" if fast else "full"} quality profile')
+        return active
+
+    def _schedule_full_quality_rerun(self, path: Path, on_full_quality: Callable[[dict[str, Any]], Awaitable[None]]) -> None:
+        if self._reruns is None:
+            self._reruns = asyncio.Queue(maxsize=_FULL_QUALITY_RERUN_QUEUE_SIZE)
+            self._rerun_task = asyncio.create_task(self._run_full_quality_reruns(), name='transcription-full-quality-reruns')
+        try:
+            self._reruns.put_nowait((path, on_full_quality))
+        except asyncio.QueueFull:
+            logger.warning('Full-quality rerun queue is full; keeping the fast transcription of %s', path)
+
+    async def _run_full_quality_reruns(self) -> None:
+        while True:
+            path, on_full_quality = await self._reruns.get()
+            # Повторы идут только в простое: новые звонки важнее
+            while self.backlog():
+                await asyncio.sleep(_FULL_QUALITY_RERUN_POLL_SECONDS)
+            try:
+                payload = await self._transcribe_serialized(path)
+                if payload is None:
+                    continue
+                payload['quality'] = full_quality_profile(self.config, wav_duration_seconds(path), 0, 'rerun').to_dict()
+                await on_full_quality(payload)
+                logger.info('Full-quality rerun delivered for %s', path)
+            except Exception:
+                logger.exception('Full-quality rerun failed for %s', path)
+
+    async def preload(self) -> None:
+        """Загружает модель заранее (например, пока собирается группа CDR), чтобы скрыть время загрузки."""
+        if not self.is_enabled():
+            return
+        # Грузим модель того профиля, который достанется записи при нынешней очереди
+        fast = adaptive_quality_enabled(self.config) and choose_quality_profile(self.config, None, self.backlog()).is_fast
+        try:
+            if self._worker_client is not None:
+                await self._worker_client.request('preload', fast=fast)
+            else:
+                # Под замком: смена профиля не должна выгрузить модель, которой сейчас распознаётся запись
+                async with self._transcribe_lock:
+                    await asyncio.to_thread(self.profile_transcriber(fast)._get_model)
+        except Exception:
+            logger.exception('Failed to preload Whisper model')
+
     def transcribe_to_json_text(self, wav_path: str | Path, indent: int = 2) -> str:
         payload = self._transcribe_blocking(Path(wav_path))
         return json.dumps(payload, ensure_ascii=False, indent=indent)
 
-    def _transcribe_blocking(self, wav_path: Path) -> dict[str, Any]:
+    def _transcribe_blocking(
+        self,
+        wav_path: Path,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> dict[str, Any]:
+        cache_key = None
+        if self._cache is not None:
+            # Кэш проверяется до загрузки модели: повторная обработка записи не трогает Whisper
+            cache_key = self._cache.key_for(wav_path, self._cache_params())
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                logger.info('Transcription cache hit for %s', wav_path)
+                cached['input_file'] = str(wav_path)
+                return cached
+
+        payload = self._transcribe_uncached(wav_path, on_rows)
+        if cache_key is not None:
+            self._cache.put(cache_key, payload)
+        return payload
+
+    def _cache_params(self) -> dict[str, Any]:
+        # Только то, что влияет на текст: потоки, воркеры и параллельность каналов меняют лишь скорость,
+        # поэтому их нет в ключе (бенчмарки и autotune запускаются с --no-cache)
+        return {
+            'model': self.config.CALL_TRANSCRIBE_MODEL,
+            'compute_type': self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
+            'beam_size': self.config.CALL_TRANSCRIBE_BEAM_SIZE,
+            'vad_filter': self.config.CALL_TRANSCRIBE_VAD_FILTER,
+            'vad_min_silence_ms': self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
+            'merge_gap': self.config.CALL_TRANSCRIBE_MERGE_GAP,
+            'split_gap_seconds': self.config.CALL_TRANSCRIBE_SPLIT_GAP_SECONDS,
+            'punctuation_gap_seconds': self.config.CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS,
+            'max_phrase_seconds': self.config.CALL_TRANSCRIBE_MAX_PHRASE_SECONDS,
+            'silence_trim': self.config.CALL_TRANSCRIBE_SILENCE_TRIM,
+            'batched': self.config.CALL_TRANSCRIBE_BATCHED,
+            'batch_size': int(self.config.CALL_TRANSCRIBE_BATCH_SIZE) if self.config.CALL_TRANSCRIBE_BATCHED else 0,
+            'window_seconds': self.config.CALL_TRANSCRIBE_WINDOW_SECONDS,
+            'window_overlap_seconds': self.config.CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS,
+            'left_label': self.config.CALL_TRANSCRIBE_LEFT_LABEL,
+            'right_label': self.config.CALL_TRANSCRIBE_RIGHT_LABEL,
+        }
+
+    def _transcribe_uncached(
+        self,
+        wav_path: Path,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> dict[str, Any]:
+        channels = load_stereo_channels(wav_path)
+        if channels is not None:
+            left_audio, right_audio = channels
+            return self._transcribe_channels(wav_path, left_audio, right_audio, on_rows)
+
+        logger.info('In-process WAV decoding is not supported for %s, falling back to ffmpeg', wav_path)
         ensure_ffmpeg()
 
         with tempfile.TemporaryDirectory(prefix='stereo_transcribe_') as tmp_dir_str:
@@ -68,66 +306,253 @@ class StereoCallTranscriber:
 
             run_ffmpeg_extract_channel(wav_path, left_wav, 0)
             run_ffmpeg_extract_channel(wav_path, right_wav, 1)
+            return self._transcribe_channels(wav_path, left_wav, right_wav, on_rows)
+
+    def _transcribe_channels(
+        self,
+        wav_path: Path,
+        left_audio: Path | np.ndarray,
+        right_audio: Path | np.ndarray,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> dict[str, Any]:
+        if self._should_use_windows(left_audio):
+            return self._transcribe_channels_windowed(wav_path, left_audio, right_audio, on_rows)
+        with self._using_model() as model:
+            return self._transcribe_channels_with_model(model, wav_path, left_audio, right_audio, on_rows)
+
+    def _should_use_windows(self, audio: Path | np.ndarray) -> bool:
+        if self._window_pool is None or not isinstance(audio, np.ndarray):
+            return False
+        # Короткие записи быстрее распознать одной моделью, чем делить на окна
+        return audio.size / WHISPER_SAMPLE_RATE >= float(self.config.CALL_TRANSCRIBE_WINDOW_SECONDS) * 1.5
+
+    def _transcribe_channels_windowed(
+        self,
+        wav_path: Path,
+        left_audio: np.ndarray,
+        right_audio: np.ndarray,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> dict[str, Any]:
+        self._start_model_watchdog()
+        submitted = []
+        for audio, speaker, channel_name in (
+            (left_audio, self.config.CALL_TRANSCRIBE_LEFT_LABEL, 'left'),
+            (right_audio, self.config.CALL_TRANSCRIBE_RIGHT_LABEL, 'right'),
+        ):
+            windows = plan_windows(
+                audio,
+                float(self.config.CALL_TRANSCRIBE_WINDOW_SECONDS),
+                float(self.config.CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS),
+            )
+            kwargs = self._channel_kwargs(None, audio, speaker, channel_name)
+            segment_kwargs = {key: kwargs[key] for key in _SEGMENT_KWARGS}
+            submitted.append((kwargs, windows, self._window_pool.submit_channel(audio, windows, segment_kwargs)))
+        logger.info(
+            'Transcribing %s in %s windows on %s processes',
+            wav_path,
+            sum(len(windows) for _, windows, _ in submitted),
+            self._window_pool.workers,
+        )
 
-            model = self._get_model()
-            left_result = transcribe_channel(
-                model=model,
-                wav_path=left_wav,
-                speaker=self.config.CALL_TRANSCRIBE_LEFT_LABEL,
-                channel_name='left',
-                language='ru',
-                beam_size=self.config.CALL_TRANSCRIBE_BEAM_SIZE,
-                vad_filter=self.config.CALL_TRANSCRIBE_VAD_FILTER,
-                vad_min_silence_ms=self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
-                split_gap_seconds=self.config.CALL_TRANSCRIBE_SPLIT_GAP_SECONDS,
-                punctuation_gap_seconds=self.config.CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS,
-                max_phrase_seconds=self.config.CALL_TRANSCRIBE_MAX_PHRASE_SECONDS,
+        streams = []
+        channel_languages = []
+        for kwargs, windows, futures in submitted:
+            # Язык известен только после всех окон: он выбирается голосованием (vote_language)
+            languages: list[tuple[str | None, float | None]] = []
+            channel_languages.append(languages)
+            streams.append(
+                ChannelStream(
+                    speaker=kwargs['speaker'],
+                    channel=kwargs['channel_name'],
+                    detected_language=None,
+                    language_probability=None,
+                    # Сдвиг на стыке окон не больше перекрытия: строки упорядочиваются с таким запасом
+                    rows=_rows_in_time_order(
+                        segments_to_rows(
+                            self._window_pool.iter_stitched_segments(windows, futures, languages),
+                            speaker=kwargs['speaker'],
+                            channel_name=kwargs['channel_name'],
+                            split_gap_seconds=kwargs['split_gap_seconds'],
+                            punctuation_gap_seconds=kwargs['punctuation_gap_seconds'],
+                            max_phrase_seconds=kwargs['max_phrase_seconds'],
+                        ),
+                        horizon=float(self.config.CALL_TRANSCRIBE_WINDOW_OVERLAP_SECONDS),
+                    ),
+                )
             )
-            right_result = transcribe_channel(
-                model=model,
-                wav_path=right_wav,
-                speaker=self.config.CALL_TRANSCRIBE_RIGHT_LABEL,
-                channel_name='right',
-                language='ru',
-                beam_size=self.config.CALL_TRANSCRIBE_BEAM_SIZE,
-                vad_filter=self.config.CALL_TRANSCRIBE_VAD_FILTER,
-                vad_min_silence_ms=self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
-                split_gap_seconds=self.config.CALL_TRANSCRIBE_SPLIT_GAP_SECONDS,
-                punctuation_gap_seconds=self.config.CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS,
-                max_phrase_seconds=self.config.CALL_TRANSCRIBE_MAX_PHRASE_SECONDS,
+        left_result, right_result = _consume_channel_streams(streams[0], streams[1], on_rows)
+        for result, languages in zip((left_result, right_result), channel_languages):
+            result.detected_language, result.language_probability = vote_language(languages)
+        return self._build_payload(wav_path, left_result, right_result)
+
+    def _transcribe_channels_with_model(
+        self,
+        model: WhisperModel,
+        wav_path: Path,
+        left_audio: Path | np.ndarray,
+        right_audio: Path | np.ndarray,
+        on_rows: Callable[[list[dict[str, Any]]], None] | None = None,
+    ) -> dict[str, Any]:
+        left_kwargs = self._channel_kwargs(model, left_audio, self.config.CALL_TRANSCRIBE_LEFT_LABEL, 'left')
+        right_kwargs = self._channel_kwargs(model, right_audio, self.config.CALL_TRANSCRIBE_RIGHT_LABEL, 'right')
+
+        if self._parallel_channels_enabled():
+            # Каналы независимы: каждый занимает свой воркер CTranslate2 (num_workers >= 2)
+            with ThreadPoolExecutor(max_workers=2, thread_name_prefix='transcribe-channel') as executor:
+                left_stream, right_stream = executor.map(lambda kwargs: stream_channel(**kwargs), (left_kwargs, right_kwargs))
+                left_stream.rows = _rows_in_background(executor, left_stream.rows)
+                right_stream.rows = _rows_in_background(executor, right_stream.rows)
+                left_result, right_result = _consume_channel_streams(left_stream, right_stream, on_rows)
+        else:
+            # Генераторы сегментов ленивые: слияние по времени попеременно продвигает оба канала
+            left_stream = stream_channel(**left_kwargs)
+            right_stream = stream_channel(**right_kwargs)
+            left_result, right_result = _consume_channel_streams(left_stream, right_stream, on_rows)
+
+        return self._build_payload(wav_path, left_result, right_result)
+
+    def _build_payload(self, wav_path: Path, left_result: ChannelResult, right_result: ChannelResult) -> dict[str, Any]:
+        return build_output_json(
+            input_wav=wav_path,
+            model_name=self.config.CALL_TRANSCRIBE_MODEL,
+            device=self.config.CALL_TRANSCRIBE_DEVICE,
+            compute_type=self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
+            language='ru',
+            vad_filter=self.config.CALL_TRANSCRIBE_VAD_FILTER,
+            vad_min_silence_ms=self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
+            merge_gap=self.config.CALL_TRANSCRIBE_MERGE_GAP,
+            left=left_result,
+            right=right_result,
+        )
+
+    def _channel_kwargs(self, model: WhisperModel | None, audio: Path | np.ndarray, speaker: str, channel_name: str) -> dict[str, Any]:
+        return {
+            'model': model,
+            'audio': audio,
+            'speaker': speaker,
+            'channel_name': channel_name,
+            'language': 'ru',
+            'beam_size': self.config.CALL_TRANSCRIBE_BEAM_SIZE,
+            'vad_filter': self.config.CALL_TRANSCRIBE_VAD_FILTER,
+            'vad_min_silence_ms': self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
+            'split_gap_seconds': self.config.CALL_TRANSCRIBE_SPLIT_GAP_SECONDS,
+            'punctuation_gap_seconds': self.config.CALL_TRANSCRIBE_PUNCTUATION_GAP_SECONDS,
+            'max_phrase_seconds': self.config.CALL_TRANSCRIBE_MAX_PHRASE_SECONDS,
+            'silence_trim': self.config.CALL_TRANSCRIBE_SILENCE_TRIM,
+            'batch_size': int(self.config.CALL_TRANSCRIBE_BATCH_SIZE) if self.config.CALL_TRANSCRIBE_BATCHED else 0,
+        }
+
+    def _parallel_channels_enabled(self) -> bool:
+        return bool(self.config.CALL_TRANSCRIBE_PARALLEL_CHANNELS)
+
+    def _model_threading(self) -> tuple[int, int]:
+        cpu_threads = int(self.config.CALL_TRANSCRIBE_CPU_THREADS or 0)
+        num_workers = max(1, int(self.config.CALL_TRANSCRIBE_NUM_WORKERS or 1))
+        if self._parallel_channels_enabled():
+            num_workers = max(2, num_workers)
+            total_threads = cpu_threads or os.cpu_count() or 2
+            # cpu_threads в CTranslate2 задаётся на воркер: делим ядра между каналами
+            cpu_threads = max(1, total_threads // num_workers)
+        return cpu_threads, num_workers
+
+    @contextmanager
+    def _using_model(self):
+        with self._model_lock:
+            model = self._load_model_locked()
+            self._model_users += 1
+        try:
+            yield model
+        finally:
+            with self._model_lock:
+                self._model_users -= 1
+                self._model_last_used = time.monotonic()
+            self.release_model_if_idle()
+
+    def unload_model(self, reason: str) -> bool:
+        """Выгружает модель, если она загружена и сейчас не используется."""
+        with self._model_lock:
+            if self._model is None or self._model_users:
+                return False
+            self._model = None
+        gc.collect()
+        logger.info('Whisper model unloaded: %s', reason)
+        return True
+
+    def release_model_if_idle(self) -> bool:
+        """Выгружает модель, если она простаивает дольше TTL или процесс превысил бюджет RSS."""
+        idle_ttl = float(self.config.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS or 0)
+        rss_budget = int(float(self.config.CALL_TRANSCRIBE_RSS_BUDGET_MB or 0) * 1024 * 1024)
+        with self._model_lock:
+            if self._model is None or self._model_users:
+                return False
+            idle_seconds = time.monotonic() - self._model_last_used
+            rss_bytes = current_rss_bytes() if rss_budget else None
+            if idle_ttl and idle_seconds >= idle_ttl:
+                reason = f'idle for {idle_seconds:.0f}s'
+            elif rss_budget and rss_bytes and rss_bytes > rss_budget:
+                reason = f'RSS {rss_bytes // (1024 * 1024)} MB is over budget {rss_budget // (1024 * 1024)} MB'
+            else:
+                return False
+            self._model = None
+        gc.collect()
+        logger.info('Whisper model unloaded: %s', reason)
+        return True
+
+    def _start_model_watchdog(self) -> None:
+        if self._model_watchdog is not None:
+            return
+        if not self.config.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS and not self.config.CALL_TRANSCRIBE_RSS_BUDGET_MB:
+            return
+        self._model_watchdog = Thread(target=self._watch_model, name='whisper-model-watchdog', daemon=True)
+        self._model_watchdog.start()
+
+    def _watch_model(self) -> None:
+        while True:
+            time.sleep(_MODEL_WATCHDOG_INTERVAL_SECONDS)
+            try:
+                self.release_model_if_idle()
+                if self._window_pool is not None and self.config.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS:
+                    self._window_pool.release_if_idle(float(self.config.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS))
+            except Exception:
+                logger.exception('Whisper model watchdog failed')
+
+    def _get_model(self) -> WhisperModel:
+        with self._model_lock:
+            return self._load_model_locked()
+
+    def _load_model_locked(self) -> WhisperModel:
+        self._model_last_used = time.monotonic()
+        if self._model is None:
+            cpu_threads, num_workers = self._model_threading()
+            logger.info(
+                'Loading Whisper model for call transcription: model=%s device=%s compute_type=%s cpu_threads=%s num_workers=%s',
+                self.config.CALL_TRANSCRIBE_MODEL,
+                self.config.CALL_TRANSCRIBE_DEVICE,
+                self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
+                cpu_threads or 'auto',
+                num_workers,
             )
-            return build_output_json(
-                input_wav=wav_path,
-                model_name=self.config.CALL_TRANSCRIBE_MODEL,
+            self._model = WhisperModel(
+                self.config.CALL_TRANSCRIBE_MODEL,
                 device=self.config.CALL_TRANSCRIBE_DEVICE,
                 compute_type=self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
-                language='ru',
-                vad_filter=self.config.CALL_TRANSCRIBE_VAD_FILTER,
-                vad_min_silence_ms=self.config.CALL_TRANSCRIBE_VAD_MIN_SILENCE_MS,
-                merge_gap=self.config.CALL_TRANSCRIBE_MERGE_GAP,
-                left=left_result,
-                right=right_result,
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
             )
-
-    def _get_model(self) -> WhisperModel:
-        if self._model is not None:
-            return self._model
-        with self._model_lock:
-            if self._model is None:
-                logger.info(
-                    'Loading Whisper model for call transcription: model=%s device=%s compute_type=%s',
-                    self.config.CALL_TRANSCRIBE_MODEL,
-                    self.config.CALL_TRANSCRIBE_DEVICE,
-                    self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
-                )
-                self._model = WhisperModel(
-                    self.config.CALL_TRANSCRIBE_MODEL,
-                    device=self.config.CALL_TRANSCRIBE_DEVICE,
-                    compute_type=self.config.CALL_TRANSCRIBE_COMPUTE_TYPE,
-                )
+            self._start_model_watchdog()
         return self._model
 
 
+def current_rss_bytes() -> int | None:
+    try:
+        for line in Path('/proc/self/status').read_text().splitlines():
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
 def ensure_ffmpeg() -> None:
     if shutil.which('ffmpeg') is None:
         raise RuntimeError('ffmpeg not found in PATH. Install it first, for example: sudo apt install -y ffmpeg')
@@ -166,9 +591,9 @@ def format_ts(seconds: float) -> str:
     return f'{h:02d}:{m:02d}:{s:02d}.{ms:03d}'
 
 
-def transcribe_channel(
+def stream_channel(
     model: WhisperModel,
-    wav_path: Path,
+    audio: Path | np.ndarray,
     speaker: str,
     channel_name: str,
     language: str,
@@ -178,7 +603,102 @@ def transcribe_channel(
     split_gap_seconds: float,
     punctuation_gap_seconds: float,
     max_phrase_seconds: float,
-) -> ChannelResult:
+    silence_trim: bool = False,
+    batch_size: int = 0,
+) -> ChannelStream:
+    """
+    Запускает распознавание канала. Язык определяется сразу, а строки разговора
+    отдаются генератором rows по мере того, как Whisper выдаёт сегменты.
+    """
+    segments, detected_language, language_probability = transcribe_segments(
+        model=model,
+        audio=audio,
+        channel_name=channel_name,
+        language=language,
+        beam_size=beam_size,
+        vad_filter=vad_filter,
+        vad_min_silence_ms=vad_min_silence_ms,
+        silence_trim=silence_trim,
+        batch_size=batch_size,
+    )
+
+    return ChannelStream(
+        speaker=speaker,
+        channel=channel_name,
+        detected_language=detected_language,
+        language_probability=language_probability,
+        rows=segments_to_rows(
+            segments,
+            speaker=speaker,
+            channel_name=channel_name,
+            split_gap_seconds=split_gap_seconds,
+            punctuation_gap_seconds=punctuation_gap_seconds,
+            max_phrase_seconds=max_phrase_seconds,
+        ),
+    )
+
+
+def segments_to_rows(
+    segments: Iterable[Any],
+    *,
+    speaker: str,
+    channel_name: str,
+    split_gap_seconds: float,
+    punctuation_gap_seconds: float,
+    max_phrase_seconds: float,
+) -> Iterator[ConversationRow]:
+    for seg in segments:
+        yield from split_segment_into_phrases(
+            seg=seg,
+            speaker=speaker,
+            channel_name=channel_name,
+            split_gap_seconds=split_gap_seconds,
+            punctuation_gap_seconds=punctuation_gap_seconds,
+            max_phrase_seconds=max_phrase_seconds,
+        )
+
+
+def transcribe_segments(
+    model: WhisperModel,
+    audio: Path | np.ndarray,
+    channel_name: str,
+    language: str,
+    beam_size: int,
+    vad_filter: bool,
+    vad_min_silence_ms: int,
+    silence_trim: bool = False,
+    batch_size: int = 0,
+) -> tuple[Iterator[Any], str | None, float | None]:
+    """
+    Возвращает ленивый итератор сегментов Whisper (время — по исходной записи),
+    определённый язык и его вероятность.
+    silence_trim: в модель уходят только участки речи (по энергии/ZCR), время пересчитывается обратно.
+    batch_size > 0: пакетное распознавание (BatchedInferencePipeline) — отрезки до 30 с декодируются
+    по batch_size за проход; участки речи передаются как clip_timestamps, поэтому время уже исходное.
+    """
+    if batch_size and not isinstance(audio, np.ndarray):
+        audio = decode_audio(str(audio), sampling_rate=WHISPER_SAMPLE_RATE)
+
+    timeline = None
+    regions = None
+    if silence_trim and isinstance(audio, np.ndarray):
+        regions = detect_speech_regions(audio)
+        if len(regions) == 0:
+            logger.info('Channel %s has no speech, skipping inference', channel_name)
+            return iter(()), None, None
+        compact, speech_timeline = compact_speech(audio, regions)
+        if compact.size < audio.size * _SILENCE_TRIM_MIN_SAVING:
+            logger.info(
+                'Channel %s: sending %.1fs of speech out of %.1fs to the model',
+                channel_name,
+                compact.size / WHISPER_SAMPLE_RATE,
+                audio.size / WHISPER_SAMPLE_RATE,
+            )
+            if not batch_size:
+                audio, timeline = compact, speech_timeline
+        else:
+            regions = None
+
     kwargs: dict[str, Any] = {
         'beam_size': beam_size,
         'vad_filter': vad_filter,
@@ -203,36 +723,129 @@ def transcribe_channel(
             'min_silence_duration_ms': vad_min_silence_ms,
         }
 
-    segments_iter, info = model.transcribe(str(wav_path), **kwargs)
-    segments = list(segments_iter)
-
-    rows: list[dict[str, Any]] = []
-    for seg in segments:
-        rows.extend(
-            split_segment_into_phrases(
-                seg=seg,
-                speaker=speaker,
-                channel_name=channel_name,
-                split_gap_seconds=split_gap_seconds,
-                punctuation_gap_seconds=punctuation_gap_seconds,
-                max_phrase_seconds=max_phrase_seconds,
-            )
-        )
+    if batch_size:
+        if not vad_filter:
+            # Без VAD пакетному режиму нужны готовые отрезки: участки речи или вся запись, нарезанная по паузам
+            if regions is None:
+                regions = np.array([[0, audio.size]], dtype=np.int64)
+            kwargs['clip_timestamps'] = pack_speech_clips(audio, regions)
+        segments_iter, info = BatchedInferencePipeline(model).transcribe(audio, batch_size=batch_size, **kwargs)
+    else:
+        # WhisperModel принимает либо путь к файлу, либо float32 16 кГц массив
+        source = audio if isinstance(audio, np.ndarray) else str(audio)
+        segments_iter, info = model.transcribe(source, **kwargs)
+    if timeline is not None:
+        segments_iter = (map_segment_times(seg, timeline.to_original) for seg in segments_iter)
 
     detected_language = getattr(info, 'language', None)
     language_probability = getattr(info, 'language_probability', None)
     if language_probability is not None:
         language_probability = round(float(language_probability), 6)
+    return segments_iter, detected_language, language_probability
 
-    return ChannelResult(
-        speaker=speaker,
-        channel=channel_name,
-        detected_language=detected_language,
-        language_probability=language_probability,
-        segments=rows,
+
+def map_segment_times(seg: Any, convert: Callable[[float], float]) -> SimpleNamespace:
+    """Копия сегмента Whisper (со словами) с временем, пересчитанным функцией convert."""
+    def to_target(value: Any) -> float | None:
+        return None if value is None else convert(float(value))
+
+    words = [
+        SimpleNamespace(word=getattr(word, 'word', ''), start=to_target(getattr(word, 'start', None)), end=to_target(getattr(word, 'end', None)))
+        for word in getattr(seg, 'words', None) or []
+    ]
+    return SimpleNamespace(
+        start=to_target(getattr(seg, 'start', 0.0) or 0.0),
+        end=to_target(getattr(seg, 'end', None)),
+        text=getattr(seg, 'text', ''),
+        words=words,
     )
 
 
+def transcribe_channel(**kwargs: Any) -> ChannelResult:
+    """Распознаёт канал целиком; аргументы те же, что у stream_channel."""
+    return stream_channel(**kwargs).collect()
+
+
+def conversation_sort_key(row: ConversationRow) -> tuple[float, float, str, str]:
+    return row.start, row.end, row.speaker, row.channel
+
+
+def _consume_channel_streams(
+    left: ChannelStream,
+    right: ChannelStream,
+    on_rows: Callable[[list[dict[str, Any]]], None] | None,
+) -> tuple[ChannelResult, ChannelResult]:
+    left_segments: list[ConversationRow] = []
+    right_segments: list[ConversationRow] = []
+    # Каждый канал упорядочен по времени (оконный — через _rows_in_time_order): heapq.merge отдаёт строку, как только известна следующая строка другого канала
+    merged = heapq.merge(_collect_rows(left.rows, left_segments), _collect_rows(right.rows, right_segments), key=conversation_sort_key)
+    for row in merged:
+        if on_rows is not None:
+            try:
+                on_rows([row.to_dict()])
+            except Exception:
+                logger.exception('Transcription progress callback failed')
+    return left.collect(left_segments), right.collect(right_segments)
+
+
+def _collect_rows(rows: Iterable[ConversationRow], sink: list[ConversationRow]) -> Iterator[ConversationRow]:
+    for row in rows:
+        sink.append(row)
+        yield row
+
+
+def _rows_in_time_order(rows: Iterable[ConversationRow], horizon: float) -> Iterator[ConversationRow]:
+    """
+    Упорядочивает строки канала на лету, если строка может начинаться раньше уже пришедших не больше
+    чем на horizon секунд (на стыке окон слово следующего окна начинается раньше хвоста предыдущего).
+    Строка отдаётся, как только пришла строка, начинающаяся на horizon позже неё.
+    """
+    pending: list[tuple[tuple[float, float, str, str], int, ConversationRow]] = []
+    latest_start = float('-inf')
+    for index, row in enumerate(rows):
+        heapq.heappush(pending, (conversation_sort_key(row), index, row))
+        latest_start = max(latest_start, row.start)
+        while pending and pending[0][0][0] <= latest_start - horizon:
+            yield heapq.heappop(pending)[2]
+    while pending:
+        yield heapq.heappop(pending)[2]
+
+
+def _rows_in_background(executor: ThreadPoolExecutor, rows: Iterator[ConversationRow]) -> Iterator[ConversationRow]:
+    """Крутит генератор строк в потоке executor'а, чтобы канал распознавался, пока потребитель ждёт другой."""
+    buffer: queue.SimpleQueue = queue.SimpleQueue()
+
+    def pump() -> None:
+        try:
+            for row in rows:
+                buffer.put(row)
+        except BaseException as exc:
+            buffer.put(_StreamFailure(exc))
+            return
+        buffer.put(_STREAM_END)
+
+    executor.submit(pump)
+
+    def drain() -> Iterator[ConversationRow]:
+        while True:
+            item = buffer.get()
+            if item is _STREAM_END:
+                return
+            if isinstance(item, _StreamFailure):
+                raise item.error
+            yield item
+
+    return drain()
+
+
+class _StreamFailure:
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+_STREAM_END = object()
+
+
 def split_segment_into_phrases(
     *,
     seg: Any,
@@ -241,7 +854,7 @@ def split_segment_into_phrases(
     split_gap_seconds: float,
     punctuation_gap_seconds: float,
     max_phrase_seconds: float,
-) -> list[dict[str, Any]]:
+) -> list[ConversationRow]:
     seg_start = float(getattr(seg, 'start', 0.0) or 0.0)
     seg_end = float(getattr(seg, 'end', seg_start) or seg_start)
     seg_text = normalize_phrase_text(str(getattr(seg, 'text', '') or ''))
@@ -250,7 +863,7 @@ def split_segment_into_phrases(
     if not words:
         if not seg_text:
             return []
-        return [build_conversation_row(speaker, channel_name, seg_start, seg_end, seg_text)]
+        return [ConversationRow(speaker, channel_name, seg_start, seg_end, seg_text)]
 
     if seg_text and _is_word_coverage_too_low(words, seg_text):
         logger.warning(
@@ -260,9 +873,9 @@ def split_segment_into_phrases(
             seg_start,
             seg_end,
         )
-        return [build_conversation_row(speaker, channel_name, seg_start, seg_end, seg_text)]
+        return [ConversationRow(speaker, channel_name, seg_start, seg_end, seg_text)]
 
-    rows: list[dict[str, Any]] = []
+    rows: list[ConversationRow] = []
     bucket: list[dict[str, Any]] = []
 
     for word in words:
@@ -364,7 +977,7 @@ def extract_segment_words(seg: Any, *, seg_start: float, seg_end: float) -> list
     return repaired
 
 
-def build_row_from_words(speaker: str, channel_name: str, words: list[dict[str, Any]]) -> dict[str, Any] | None:
+def build_row_from_words(speaker: str, channel_name: str, words: list[dict[str, Any]]) -> ConversationRow | None:
     if not words:
         return None
 
@@ -372,21 +985,38 @@ def build_row_from_words(speaker: str, channel_name: str, words: list[dict[str,
     if not text:
         return None
 
-    start = round(float(words[0]['start']), 3)
-    end = round(float(words[-1]['end']), 3)
-    return build_conversation_row(speaker, channel_name, start, end, text)
+    return ConversationRow(speaker, channel_name, words[0]['start'], words[-1]['end'], text)
 
 
 def build_conversation_row(speaker: str, channel_name: str, start: float, end: float, text: str) -> dict[str, Any]:
-    return {
-        'speaker': speaker,
-        'channel': channel_name,
-        'start': round(float(start), 3),
-        'end': round(float(end), 3),
-        'start_hms': format_ts(float(start)),
-        'end_hms': format_ts(float(end)),
-        'text': text,
-    }
+    return ConversationRow(speaker, channel_name, start, end, text).to_dict()
+
+
+class ConversationRow:
+    """Фраза разговора. Внутри конвейера — компактный объект, в dict превращается только при выдаче JSON."""
+
+    __slots__ = ('speaker', 'channel', 'start', 'end', 'text')
+
+    def __init__(self, speaker: str, channel: str, start: float, end: float, text: str):
+        self.speaker = speaker
+        self.channel = channel
+        self.start = round(float(start), 3)
+        self.end = round(float(end), 3)
+        self.text = text
+
+    def copy(self) -> ConversationRow:
+        return ConversationRow(self.speaker, self.channel, self.start, self.end, self.text)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            'speaker': self.speaker,
+            'channel': self.channel,
+            'start': self.start,
+            'end': self.end,
+            'start_hms': format_ts(self.start),
+            'end_hms': format_ts(self.end),
+            'text': self.text,
+        }
 
 
 def normalize_phrase_text(text: str) -> str:
@@ -415,6 +1045,36 @@ def _is_word_coverage_too_low(words: list[dict[str, Any]], seg_text: str) -> boo
     return coverage_ratio < 0.82
 
 
+def merge_adjacent_rows(rows: Iterable[ConversationRow], max_gap: float) -> Iterator[ConversationRow]:
+    """Потоковый вариант merge_adjacent_segments: склеивает соседние фразы одного канала за один проход."""
+    effective_gap = min(float(max_gap), 0.2)
+    previous: ConversationRow | None = None
+    previous_is_copy = False
+
+    for row in rows:
+        if (
+            previous is not None
+            and previous.speaker == row.speaker
+            and previous.channel == row.channel
+            and row.start - previous.end <= effective_gap
+            and not _looks_like_sentence_end(previous.text or '')
+        ):
+            # Исходные строки каналов не меняем: копия создаётся при первой склейке
+            if not previous_is_copy:
+                previous = previous.copy()
+                previous_is_copy = True
+            previous.end = row.end
+            previous.text = normalize_phrase_text(f'{previous.text} {row.text}')
+            continue
+        if previous is not None:
+            yield previous
+        previous = row
+        previous_is_copy = False
+
+    if previous is not None:
+        yield previous
+
+
 def merge_adjacent_segments(conversation: list[dict[str, Any]], max_gap: float) -> list[dict[str, Any]]:
     if not conversation:
         return []
@@ -457,9 +1117,14 @@ def build_output_json(
     left: ChannelResult,
     right: ChannelResult,
 ) -> dict[str, Any]:
-    conversation = left.segments + right.segments
-    conversation.sort(key=lambda x: (x['start'], x['end'], x['speaker'], x['channel']))
-    conversation = merge_adjacent_segments(conversation, merge_gap)
+    # heapq.merge требует упорядоченных каналов; на стыке окон соседние фразы могут стоять не по порядку.
+    # Для почти упорядоченного списка сортировка линейна, дальше слияние и склейка — один проход
+    merged = heapq.merge(
+        sorted(left.segments, key=conversation_sort_key),
+        sorted(right.segments, key=conversation_sort_key),
+        key=conversation_sort_key,
+    )
+    conversation = [row.to_dict() for row in merge_adjacent_rows(merged, merge_gap)]
 
     from datetime import datetime, timezone
 
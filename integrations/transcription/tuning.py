@@ -0,0 +1,83 @@
+from __future__ import annotations
+
+import json
+import logging
+import os
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TUNING_FILE = '/opt/sms/var/transcription_tuning.json'
+
+# Параметры, которые подбирает autotune; остальные настройки файл не меняет
+TUNED_SETTINGS = (
+    'CALL_TRANSCRIBE_COMPUTE_TYPE',
+    'CALL_TRANSCRIBE_CPU_THREADS',
+    'CALL_TRANSCRIBE_NUM_WORKERS',
+    'CALL_TRANSCRIBE_PARALLEL_CHANNELS',
+    'CALL_TRANSCRIBE_BEAM_SIZE',
+)
+
+
+def write_tuning_file(path: str | Path, settings: dict[str, Any], **meta: Any) -> Path:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    document = {**meta, 'settings': {name: settings[name] for name in TUNED_SETTINGS}}
+    tmp_path = path.with_name(f'{path.name}.tmp')
+    tmp_path.write_text(json.dumps(document, ensure_ascii=False, indent=2) + '\n', encoding='utf-8')
+    os.replace(tmp_path, path)
+    return path
+
+
+def read_tuning_file(path: str | Path) -> dict[str, Any] | None:
+    try:
+        return json.loads(Path(path).read_text(encoding='utf-8'))
+    except FileNotFoundError:
+        return None
+    except Exception:
+        logger.exception('Failed to read transcription tuning file %s', path)
+        return None
+
+
+def apply_tuning_file(config):
+    """
+    Возвращает копию настроек CALL_TRANSCRIBE_* с параметрами из файла autotune.
+    Файл игнорируется, если он подобран для другой модели, устройства или числа ядер;
+    значения, явно заданные в окружении, имеют приоритет над файлом.
+    """
+    path = config.CALL_TRANSCRIBE_TUNING_FILE
+    if not path:
+        return config
+    document = read_tuning_file(path)
+    if document is None:
+        return config
+
+    expected = {
+        'model': config.CALL_TRANSCRIBE_MODEL,
+        'device': config.CALL_TRANSCRIBE_DEVICE,
+        'cpu_count': os.cpu_count(),
+    }
+    for key, value in expected.items():
+        if document.get(key) != value:
+            logger.warning(
+                'Ignoring transcription tuning file %s: tuned for %s=%s, current %s=%s',
+                path, key, document.get(key), key, value,
+            )
+            return config
+
+    settings = document.get('settings') or {}
+    overrides = {name: settings[name] for name in TUNED_SETTINGS if name in settings and name not in os.environ}
+    values = {name: getattr(config, name) for name in dir(config) if name.startswith('CALL_TRANSCRIBE_')}
+    values.update(overrides)
+    # Файл уже применён: процесс-воркер и пул окон получают готовые значения
+    values['CALL_TRANSCRIBE_TUNING_FILE'] = None
+    if overrides:
+        logger.info(
+            'Using tuned transcription settings from %s (rtf=%s): %s',
+            path,
+            document.get('rtf'),
+            ', '.join(f'{name}={value}' for name, value in overrides.items()),
+        )
+    return SimpleNamespace(**values)
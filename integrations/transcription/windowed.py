@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import logging
+import math
+import multiprocessing
+import os
+import time
+from collections.abc import Iterator
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass
+from threading import Lock
+from types import SimpleNamespace
+from typing import Any
+
+import numpy as np
+
+from integrations.transcription.audio import WHISPER_SAMPLE_RATE, quietest_sample
+from integrations.transcription.worker import deserialize_transcription_config, serialize_transcription_config
+
+logger = logging.getLogger(__name__)
+
+_FRAME_SECONDS = 0.03
+
+_pool_transcriber = None
+
+
+@dataclass
+class Window:
+    """Окно канала: [start, end) в отсчётах с перекрытием; слова с серединой в [keep_start, keep_end) принадлежат этому окну."""
+    start: int
+    end: int
+    keep_start: float
+    keep_end: float
+
+    @property
+    def offset_seconds(self) -> float:
+        return self.start / WHISPER_SAMPLE_RATE
+
+
+def plan_windows(
+    samples: np.ndarray,
+    window_seconds: float,
+    overlap_seconds: float,
+    sample_rate: int = WHISPER_SAMPLE_RATE,
+) -> list[Window]:
+    """
+    Режет канал на окна около window_seconds. Каждая граница сдвигается в самый тихий кадр
+    в пределах четверти окна от номинальной точки, чтобы разрез не приходился на слово.
+    """
+    total = samples.size
+    window = int(window_seconds * sample_rate)
+    half_overlap = int(overlap_seconds * sample_rate / 2)
+    search = window // 4
+    frame = max(1, int(_FRAME_SECONDS * sample_rate))
+
+    cuts: list[int] = []
+    position = window
+    # Последнее окно не короче половины номинального
+    while total - position > window // 2:
+        low = max(position - search, (cuts[-1] if cuts else 0) + window // 2)
+        high = min(position + search, total - window // 2)
+        cut = quietest_sample(samples, low, high, frame) if high > low else position
+        cuts.append(cut)
+        position = cut + window
+
+    bounds = [0, *cuts, total]
+    windows = []
+    for index in range(len(bounds) - 1):
+        keep_start, keep_end = bounds[index], bounds[index + 1]
+        is_last = index == len(bounds) - 2
+        windows.append(
+            Window(
+                start=max(0, keep_start - half_overlap),
+                end=min(total, keep_end + half_overlap),
+                keep_start=keep_start / sample_rate if index else -math.inf,
+                keep_end=math.inf if is_last else keep_end / sample_rate,
+            )
+        )
+    return windows
+
+
+def stitch_window_segments(segments: list[SimpleNamespace], window: Window) -> list[SimpleNamespace]:
+    """Оставляет слова, середина которых попадает в зону окна; так слова из перекрытия не дублируются."""
+    stitched = []
+    for seg in segments:
+        words = seg.words
+        if not words:
+            middle = (seg.start + (seg.end if seg.end is not None else seg.start)) / 2
+            if window.keep_start <= middle < window.keep_end:
+                stitched.append(seg)
+            continue
+        kept = [word for word in words if window.keep_start <= _word_middle(word, seg) < window.keep_end]
+        if not kept:
+            continue
+        if len(kept) == len(words):
+            stitched.append(seg)
+            continue
+        stitched.append(
+            SimpleNamespace(
+                start=kept[0].start if kept[0].start is not None else seg.start,
+                end=kept[-1].end if kept[-1].end is not None else seg.end,
+                text=''.join(word.word for word in kept),
+                words=kept,
+            )
+        )
+    return stitched
+
+
+def vote_language(detections: list[tuple[str | None, float | None]]) -> tuple[str | None, float | None]:
+    """
+    Язык канала по всем окнам: побеждает язык с наибольшей суммой вероятностей, поэтому тихое
+    или шумное окно не решает за весь звонок. Вероятность — эта сумма, делённая на число окон с ответом.
+    """
+    totals: dict[str, float] = {}
+    voted = 0
+    for language, probability in detections:
+        if not language:
+            continue
+        voted += 1
+        totals[language] = totals.get(language, 0.0) + float(probability or 0.0)
+    if not totals:
+        return None, None
+    language = max(totals, key=totals.get)
+    return language, totals[language] / voted
+
+
+def _word_middle(word: SimpleNamespace, seg: SimpleNamespace) -> float:
+    start = word.start if word.start is not None else seg.start
+    end = word.end if word.end is not None else start
+    return (start + end) / 2
+
+
+class WindowedChannelPool:
+    """
+    Пул процессов для оконной транскрибации длинных записей: каждый процесс загружает
+    свою модель один раз, окна обоих каналов распознаются параллельно.
+    """
+
+    def __init__(self, config):
+        self.config = config
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = Lock()
+        self._active = 0
+        self.last_used = 0.0
+
+    @property
+    def workers(self) -> int:
+        return int(self.config.CALL_TRANSCRIBE_WINDOW_WORKERS or 0) or os.cpu_count() or 1
+
+    def submit_channel(self, audio: np.ndarray, windows: list[Window], channel_kwargs: dict[str, Any]) -> list[Future]:
+        executor = self._ensure_executor()
+        return [
+            executor.submit(_transcribe_window, audio[window.start:window.end], window.offset_seconds, channel_kwargs)
+            for window in windows
+        ]
+
+    def iter_stitched_segments(
+        self,
+        windows: list[Window],
+        futures: list[Future],
+        languages: list[tuple[str | None, float | None]] | None = None,
+    ) -> Iterator[SimpleNamespace]:
+        """
+        Отдаёт сегменты канала по порядку окон, как только готово очередное окно.
+        В languages (если передан) добавляются язык и его вероятность по каждому окну — для vote_language.
+        """
+        self._enter()
+        try:
+            for window, future in zip(windows, futures):
+                detected_language, language_probability, segments = future.result()
+                if languages is not None:
+                    languages.append((detected_language, language_probability))
+                yield from stitch_window_segments(segments, window)
+        finally:
+            self._leave()
+            for future in futures:
+                future.cancel()
+
+    def release_if_idle(self, idle_ttl: float) -> bool:
+        with self._lock:
+            if self._executor is None or self._active or time.monotonic() - self.last_used < idle_ttl:
+                return False
+            executor, self._executor = self._executor, None
+        executor.shutdown(wait=False, cancel_futures=True)
+        logger.info('Windowed transcription pool stopped after being idle')
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _enter(self) -> None:
+        with self._lock:
+            self._active += 1
+
+    def _leave(self) -> None:
+        with self._lock:
+            self._active -= 1
+            self.last_used = time.monotonic()
+
+    def _ensure_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            self.last_used = time.monotonic()
+            if self._executor is None:
+                workers = self.workers
+                logger.info('Starting windowed transcription pool: workers=%s', workers)
+                # spawn: процесс бота многопоточный, fork в нём небезопасен
+                self._executor = ProcessPoolExecutor(
+                    max_workers=workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_pool_process,
+                    initargs=(self._process_config(workers),),
+                )
+            return self._executor
+
+    def _process_config(self, workers: int) -> dict[str, Any]:
+        values = serialize_transcription_config(self.config)
+        total_threads = int(self.config.CALL_TRANSCRIBE_CPU_THREADS or 0) or os.cpu_count() or 1
+        values.update(
+            CALL_TRANSCRIBE_CPU_THREADS=max(1, total_threads // workers),
+            CALL_TRANSCRIBE_NUM_WORKERS=1,
+            CALL_TRANSCRIBE_PARALLEL_CHANNELS=False,
+            CALL_TRANSCRIBE_WINDOW_SECONDS=0,
+            CALL_TRANSCRIBE_CACHE_ENABLED=False,
+            CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS=0,
+            CALL_TRANSCRIBE_RSS_BUDGET_MB=0,
+            CALL_TRANSCRIBE_TUNING_FILE=None,
+        )
+        return values
+
+
+def _init_pool_process(config_values: dict[str, Any]) -> None:
+    global _pool_transcriber
+    from integrations.transcription.stereo import StereoCallTranscriber
+
+    _pool_transcriber = StereoCallTranscriber(deserialize_transcription_config(config_values))
+
+
+def _transcribe_window(
+    audio: np.ndarray,
+    offset_seconds: float,
+    channel_kwargs: dict[str, Any],
+) -> tuple[str | None, float | None, list[SimpleNamespace]]:
+    from integrations.transcription.stereo import map_segment_times, transcribe_segments
+
+    with _pool_transcriber._using_model() as model:
+        segments, detected_language, language_probability = transcribe_segments(model=model, audio=audio, **channel_kwargs)
+        shifted = [map_segment_times(seg, lambda value: value + offset_seconds) for seg in segments]
+    return detected_language, language_probability, shifted
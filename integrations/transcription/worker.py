@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Отдельный процесс транскрибации.
+
+Процесс загружает модель Whisper один раз и принимает задания по stdin, отвечая по stdout
+(по одному JSON-объекту на строку). Бот общается с ним через TranscriptionWorkerClient
+и перезапускает процесс, если тот завершился (падение или OOM в CTranslate2).
+
+Протокол:
+    -> {"op": "init", "config": {...CALL_TRANSCRIBE_*...}}
+    -> {"id": 1, "op": "transcribe", "wav_path": "/var/spool/asterisk/monitor/x.wav", "stream": true, "fast": false}
+    <- {"id": 1, "event": "started"}
+    <- {"id": 1, "event": "rows", "rows": [...]}          (только при stream: новые строки разговора по мере распознавания)
+    <- {"id": 1, "event": "result", "payload": {...}}   или   {"id": 1, "event": "error", "message": "..."}
+    -> {"id": 2, "op": "preload", "fast": false}
+    <- {"id": 2, "event": "result", "payload": {}}
+
+"fast": true выбирает быстрый профиль качества (CALL_TRANSCRIBE_FAST_MODEL / _FAST_BEAM_SIZE); обе модели
+живут в этом же процессе, но в памяти одновременно только одна (см. StereoCallTranscriber.profile_transcriber).
+"""
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+from collections.abc import Callable
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+_PACKAGE_ROOT = Path(__file__).resolve().parents[2]
+_STREAM_LIMIT = 64 * 1024 * 1024
+_TERMINAL_EVENTS = {'result', 'error'}
+
+
+class TranscriptionWorkerError(RuntimeError):
+    pass
+
+
+class TranscriptionWorkerClient:
+    """Асинхронный клиент процесса транскрибации; процесс запускается лениво и перезапускается после падения."""
+
+    def __init__(self, config):
+        self.config = config
+        self._process: asyncio.subprocess.Process | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._start_lock = asyncio.Lock()
+        self._write_lock = asyncio.Lock()
+        self._request_ids = itertools.count(1)
+        self._pending: dict[int, asyncio.Future] = {}
+        self._listeners: dict[int, Callable[[dict[str, Any]], None]] = {}
+        self.restarts = 0
+
+    async def transcribe(
+        self,
+        wav_path: str | Path,
+        on_event: Callable[[dict[str, Any]], None] | None = None,
+        stream: bool = False,
+        fast: bool = False,
+    ) -> dict[str, Any]:
+        return await self.request('transcribe', on_event=on_event, wav_path=str(wav_path), stream=stream, fast=fast)
+
+    async def request(self, op: str, on_event: Callable[[dict[str, Any]], None] | None = None, **fields) -> dict[str, Any]:
+        await self._ensure_started()
+        request_id = next(self._request_ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        if on_event:
+            self._listeners[request_id] = on_event
+        try:
+            await self._send({'id': request_id, 'op': op, **fields})
+            message = await future
+        finally:
+            self._pending.pop(request_id, None)
+            self._listeners.pop(request_id, None)
+        if message.get('event') == 'error':
+            raise TranscriptionWorkerError(message.get('message') or 'transcription worker error')
+        return message.get('payload') or {}
+
+    async def close(self) -> None:
+        process = self._process
+        if process is None:
+            return
+        if process.stdin and not process.stdin.is_closing():
+            process.stdin.close()
+        try:
+            await asyncio.wait_for(process.wait(), timeout=10)
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+
+    async def _ensure_started(self) -> None:
+        async with self._start_lock:
+            if self._process is not None and self._process.returncode is None:
+                return
+            if self._process is not None:
+                self.restarts += 1
+                logger.warning('Restarting transcription worker (restart #%s)', self.restarts)
+            self._process = await asyncio.create_subprocess_exec(
+                sys.executable,
+                '-m',
+                'integrations.transcription.worker',
+                stdin=asyncio.subprocess.PIPE,
+                stdout=asyncio.subprocess.PIPE,
+                cwd=str(_PACKAGE_ROOT),
+                limit=_STREAM_LIMIT,
+            )
+            logger.info('Transcription worker started: pid=%s', self._process.pid)
+            self._reader_task = asyncio.create_task(self._read_loop(self._process), name='transcription-worker-reader')
+            await self._send({'op': 'init', 'config': serialize_transcription_config(self.config)})
+
+    async def _send(self, message: dict[str, Any]) -> None:
+        process = self._process
+        if process is None or process.stdin is None:
+            raise TranscriptionWorkerError('transcription worker is not running')
+        async with self._write_lock:
+            process.stdin.write(json.dumps(message, ensure_ascii=False).encode('utf-8') + b'\n')
+            await process.stdin.drain()
+
+    async def _read_loop(self, process: asyncio.subprocess.Process) -> None:
+        try:
+            while True:
+                line = await process.stdout.readline()
+                if not line:
+                    break
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning('Unexpected output from transcription worker: %r', line[:200])
+                    continue
+                self._dispatch(message)
+        except Exception:
+            logger.exception('Transcription worker reader failed')
+        finally:
+            returncode = await process.wait()
+            if self._pending:
+                logger.error('Transcription worker exited with code %s while %s job(s) were running', returncode, len(self._pending))
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(TranscriptionWorkerError(f'transcription worker exited with code {returncode}'))
+
+    def _dispatch(self, message: dict[str, Any]) -> None:
+        request_id = message.get('id')
+        listener = self._listeners.get(request_id)
+        if listener is not None:
+            try:
+                listener(message)
+            except Exception:
+                logger.exception('Transcription worker event listener failed')
+        if message.get('event') in _TERMINAL_EVENTS:
+            future = self._pending.get(request_id)
+            if future is not None and not future.done():
+                future.set_result(message)
+
+
+def serialize_transcription_config(config) -> dict[str, Any]:
+    values = {}
+    for name in dir(config):
+        if not name.startswith('CALL_TRANSCRIBE_'):
+            continue
+        value = getattr(config, name)
+        values[name] = str(value) if isinstance(value, Path) else value
+    return values
+
+
+def deserialize_transcription_config(values: dict[str, Any]) -> SimpleNamespace:
+    config = SimpleNamespace(**values)
+    config.CALL_TRANSCRIBE_ARTIFACTS_DIR = Path(config.CALL_TRANSCRIBE_ARTIFACTS_DIR)
+    # Внутри процесса-воркера распознавание выполняется напрямую
+    config.CALL_TRANSCRIBE_WORKER_PROCESS = False
+    return config
+
+
+def run_worker() -> int:
+    # stdout зарезервирован под протокол: всё, что библиотеки пишут в fd 1, уходит в stderr
+    protocol_out = os.fdopen(os.dup(sys.stdout.fileno()), 'w', encoding='utf-8', buffering=1)
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    logging.basicConfig(
+        level=logging.INFO,
+        stream=sys.stderr,
+        format='%(asctime)s %(levelname)s %(name)s[worker]: %(message)s',
+    )
+
+    from integrations.transcription.stereo import StereoCallTranscriber
+
+    def emit(message: dict[str, Any]) -> None:
+        protocol_out.write(json.dumps(message, ensure_ascii=False))
+        protocol_out.write('\n')
+        protocol_out.flush()
+
+    transcriber = None
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        request: dict[str, Any] = {}
+        try:
+            request = json.loads(line)
+            op = request.get('op')
+            if op == 'init':
+                transcriber = StereoCallTranscriber(deserialize_transcription_config(request['config']))
+                logger.info('Transcription worker initialized')
+                continue
+            if transcriber is None:
+                raise TranscriptionWorkerError('worker is not initialized')
+            if op == 'transcribe':
+                request_id = request.get('id')
+                emit({'id': request_id, 'event': 'started'})
+                on_rows = None
+                if request.get('stream'):
+                    def on_rows(rows: list[dict[str, Any]]) -> None:
+                        emit({'id': request_id, 'event': 'rows', 'rows': rows})
+                target = transcriber.profile_transcriber(bool(request.get('fast')))
+                payload = target._transcribe_blocking(Path(request['wav_path']), on_rows=on_rows)
+                emit({'id': request_id, 'event': 'result', 'payload': payload})
+            elif op == 'preload':
+                transcriber.profile_transcriber(bool(request.get('fast')))._get_model()
+                emit({'id': request.get('id'), 'event': 'result', 'payload': {}})
+            else:
+                raise TranscriptionWorkerError(f'unknown op: {op}')
+        except Exception as exc:
+            logger.exception('Transcription worker job failed')
+            emit({'id': request.get('id'), 'event': 'error', 'message': f'{type(exc).__name__}: {exc}'})
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(run_worker())
@@ -14,11 +14,16 @@ from services.system_ops import (
     git_pull,
     run,
 )
+from workers.housekeeping import Housekeeper
+from workers.job_queue import BoundedJobQueue
 
 
 @dataclass
 class CommandService:
     ys: object
+    housekeeper: Housekeeper | None = None
+    delivery: object | None = None
+    cdr_jobs: BoundedJobQueue | None = None
 
     async def execute(self, raw_command: str) -> CommandResult:
         raw = (raw_command or "").strip()
@@ -41,7 +46,14 @@ class CommandService:
         if cmd == "/start":
             return self._help_result()
         if cmd == "/status":
-            return CommandResult([ResponseItem(kind="text", text=get_status(), parse_mode="Markdown")])
+            text = get_status()
+            if self.housekeeper is not None and self.housekeeper.is_enabled():
+                text += "\n\n" + self.housekeeper.status_text()
+            if self.cdr_jobs is not None:
+                text += "\n\n" + self.cdr_jobs.status_text()
+            if self.delivery is not None:
+                text += "\n\n" + self.delivery.telegram_status_text()
+            return CommandResult([ResponseItem(kind="text", text=text, parse_mode="Markdown")])
         if cmd == "/logs_os":
             return self._logs_result("os", get_os_logs, args)
         if cmd == "/logs_sip":
@@ -1,30 +1,43 @@
 import asyncio
+import functools
 import logging
 import os
 from collections.abc import Iterable
 
-from domain.models import CommandResult, ResponseItem
+from domain.enums import DeliveryPriority
+from domain.models import CommandResult, DeliveryReceipt, ResponseItem
 from integrations.email.smtp_sender import EmailSender
 from integrations.telegram.auth import get_admin_chat_id
-from integrations.telegram.queue_store import append_failed_message, load_failed_queue, store_failed_queue
-from integrations.telegram.sender import send_tg_item_direct
+from integrations.telegram.queue_store import FAILED_TG_QUEUE, TelegramQueueJournal
+from integrations.telegram.rate_limit import TelegramRateLimiter
+from integrations.telegram.sender import edit_tg_text_direct, send_tg_item_direct, telegram_flood_wait_remaining
 from services.formatters.email_html import render_email_html
-from services.retry_policy import is_retryable_telegram_error
+from services.retry_policy import TELEGRAM_LIVE_RETRY_DELAYS, is_retryable_telegram_error, jittered_backoff_delay
+from workers.chat_lanes import ChatLanes, LaneWaitStats
 
 logger = logging.getLogger(__name__)
 
 _EMAIL_ATTACHMENT_DEFAULT = object()
+_QUEUE_MAINTENANCE_INTERVAL_SECONDS = 5.0
 
 
 class DeliveryHub:
     def __init__(self, config):
         self.config = config
         self._telegram_app = None
-        self._telegram_send_lock = asyncio.Lock()
+        # Отправки в один чат идут по одной (ответы на команды — вне очереди), в разные чаты — параллельно,
+        # в пределах лимитов Bot API
+        self._telegram_lanes = ChatLanes('telegram')
+        self._telegram_rate_limiter = TelegramRateLimiter.from_config(config)
+        self._telegram_queue = TelegramQueueJournal(FAILED_TG_QUEUE)
+        self._telegram_queue.load()
+        self._telegram_queue_wakeup = asyncio.Event()
         self._email_sender = EmailSender(config)
 
     def set_telegram_app(self, app) -> None:
         self._telegram_app = app
+        if app is not None:
+            self._telegram_queue_wakeup.set()
 
     def is_email_enabled(self) -> bool:
         return bool(self.config.EMAIL_ENABLED and self.config.EMAIL_SMTP_HOST and self.config.EMAIL_TO_LIST)
@@ -39,10 +52,49 @@ class DeliveryHub:
         )
 
     async def flush_pending_telegram_messages(self) -> None:
-        if not self._telegram_app:
-            return
-        async with self._telegram_send_lock:
-            await self._flush_pending_telegram_messages_locked()
+        """Будит разборщик очереди (run_queue_drainer); сама отправка идёт в его задаче."""
+        self._telegram_queue_wakeup.set()
+
+    async def run_queue_drainer(self) -> None:
+        """
+        Фоновая задача: отправляет сообщения из очереди Telegram, как только они появились или транспорт
+        переподключился. После неудачи ждёт с экспоненциальной задержкой и джиттером, но не меньше общей
+        паузы RetryAfter. Сообщения из очереди встают в очередь своего чата по одному, поэтому живые
+        отправки не ждут разбора всей очереди.
+        """
+        while True:
+            await self._telegram_queue_wakeup.wait()
+            self._telegram_queue_wakeup.clear()
+            attempt = 0
+            while self._telegram_queue and self._telegram_app:
+                try:
+                    drained = await self._drain_pending_telegram_messages()
+                except Exception:
+                    logger.exception('Telegram queue drain failed')
+                    drained = False
+                if drained:
+                    attempt = 0
+                    continue
+                attempt += 1
+                delay = max(jittered_backoff_delay(attempt), telegram_flood_wait_remaining())
+                logger.info(
+                    'Telegram queue drain retry %s in %.1fs, %s item(s) pending',
+                    attempt,
+                    delay,
+                    len(self._telegram_queue),
+                )
+                await asyncio.sleep(delay)
+
+    async def run_queue_maintenance(self) -> None:
+        """Фоновая задача: досбрасывает подтверждения журнала очереди Telegram на диск и сжимает журнал."""
+        while True:
+            await asyncio.sleep(_QUEUE_MAINTENANCE_INTERVAL_SECONDS)
+            try:
+                self._telegram_queue.sync()
+                if self._telegram_queue.needs_compaction():
+                    self._telegram_queue.compact()
+            except Exception:
+                logger.exception('Telegram queue journal maintenance failed')
 
     async def notify_event(
         self,
@@ -63,12 +115,12 @@ class DeliveryHub:
         telegram_followup_attachment_parse_mode: str | None = None,
         telegram_bundle_attachment_path: str | None = None,
         telegram_bundle_attachment_name: str | None = None,
-    ) -> None:
+    ) -> DeliveryReceipt:
         resolved_email_attachment_path = attachment_path if email_attachment_path is _EMAIL_ATTACHMENT_DEFAULT else email_attachment_path
         resolved_email_attachment_name = attachment_name if email_attachment_path is _EMAIL_ATTACHMENT_DEFAULT else email_attachment_name
 
         should_bundle_telegram_files = bool(attachment_path and telegram_bundle_attachment_path)
-        await asyncio.gather(
+        telegram_result, email_result = await asyncio.gather(
             self._notify_telegram(
                 text,
                 attachment_path,
@@ -81,18 +133,127 @@ class DeliveryHub:
             return_exceptions=True,
         )
         if telegram_followup_text:
-            await self._notify_telegram(telegram_followup_text, None, None, parse_mode=telegram_followup_parse_mode)
+            await self._notify_telegram(
+                telegram_followup_text,
+                None,
+                None,
+                parse_mode=telegram_followup_parse_mode,
+                priority=DeliveryPriority.BULK,
+            )
         if telegram_followup_attachment_path and not should_bundle_telegram_files:
             await self._notify_telegram(
                 telegram_followup_attachment_caption or '',
                 telegram_followup_attachment_path,
                 telegram_followup_attachment_name,
                 parse_mode=telegram_followup_attachment_parse_mode,
+                priority=DeliveryPriority.BULK,
+            )
+
+        receipt = DeliveryReceipt(email_subject=subject)
+        if isinstance(telegram_result, tuple):
+            receipt.telegram_chat_id, receipt.telegram_message_id = telegram_result
+        if isinstance(email_result, str):
+            receipt.email_message_id = email_result
+        return receipt
+
+    async def notify_followup(
+        self,
+        receipt: DeliveryReceipt | None,
+        subject: str,
+        text: str | None = None,
+        parse_mode: str | None = None,
+        attachment_path: str | None = None,
+        attachment_name: str | None = None,
+        attachment_caption: str | None = None,
+        email_text: str | None = None,
+        email_html: str | None = None,
+        email_attachment_path: str | None = None,
+        email_attachment_name: str | None = None,
+    ) -> None:
+        receipt = receipt or DeliveryReceipt()
+        reply_to_message_id = receipt.telegram_message_id
+        email_subject = receipt.email_subject or subject
+        if receipt.email_message_id and not email_subject.lower().startswith('re:'):
+            email_subject = f'Re: {email_subject}'
+
+        async def notify_telegram_followup() -> None:
+            if text:
+                await self._notify_telegram(
+                    text,
+                    None,
+                    None,
+                    parse_mode=parse_mode,
+                    reply_to_message_id=reply_to_message_id,
+                    priority=DeliveryPriority.BULK,
+                )
+            if attachment_path:
+                await self._notify_telegram(
+                    attachment_caption or '',
+                    attachment_path,
+                    attachment_name,
+                    reply_to_message_id=reply_to_message_id,
+                    priority=DeliveryPriority.BULK,
+                )
+
+        tasks = [notify_telegram_followup()]
+        if email_text:
+            tasks.append(
+                self._notify_email(
+                    email_subject,
+                    email_text,
+                    email_attachment_path,
+                    email_attachment_name,
+                    email_html,
+                    in_reply_to=receipt.email_message_id,
+                )
             )
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def send_telegram_progress(self, receipt: DeliveryReceipt | None, text: str) -> tuple[int, int] | None:
+        reply_to_message_id = receipt.telegram_message_id if receipt else None
+        result = await self._notify_telegram(text, None, None, reply_to_message_id=reply_to_message_id, priority=DeliveryPriority.BULK)
+        if not result or result[1] is None:
+            return None
+        return result
+
+    async def edit_telegram_text(self, chat_id: int, message_id: int, text: str, parse_mode: str | None = None) -> bool:
+        app = self._telegram_app
+        if not app:
+            return False
+
+        async def edit() -> bool:
+            await self._telegram_rate_limiter.acquire(chat_id)
+            delivered, _ = await edit_tg_text_direct(app, chat_id, message_id, text, parse_mode=parse_mode)
+            return delivered
+
+        return await self._telegram_lanes.run(chat_id, edit, priority=DeliveryPriority.BULK)
 
     async def reply_telegram(self, chat_id: int, result: CommandResult) -> None:
         for item in result.items:
-            await self._deliver_telegram_item(chat_id, item)
+            await self._deliver_telegram_item(chat_id, item, DeliveryPriority.INTERACTIVE)
+
+    def pending_attachment_paths(self) -> set[str]:
+        """Файлы, которые ещё понадобятся сообщениям из очереди Telegram (их нельзя чистить до отправки)."""
+        paths = set()
+        for queued in self._telegram_queue.pending():
+            item = queued.item
+            if item.attachment_path:
+                paths.add(item.attachment_path)
+            paths.update(path for path in (item.attachment_paths or []) if path)
+        return paths
+
+    def telegram_wait_stats(self) -> dict[str, LaneWaitStats]:
+        """Время ожидания отправки в очереди чата по классам срочности."""
+        return {DeliveryPriority(priority).name.lower(): stats for priority, stats in self._telegram_lanes.wait_stats().items()}
+
+    def telegram_status_text(self) -> str:
+        lines = [f'Telegram queue: `{len(self._telegram_queue)} pending, {self._telegram_lanes.depth()} in chat lanes`']
+        for name, stats in self.telegram_wait_stats().items():
+            lines.append(
+                f'  {name}: `{stats.jobs} sent, wait avg {stats.avg_wait_seconds:.2f}s, '
+                f'max {stats.max_wait_seconds:.2f}s, last {stats.last_wait_seconds:.2f}s`'
+            )
+        return '\n'.join(lines)
 
     async def reply_email(self, recipient: str, subject: str, result: CommandResult) -> None:
         if not self.is_email_enabled():
@@ -118,10 +279,12 @@ class DeliveryHub:
         parse_mode: str | None = None,
         bundled_attachment_path: str | None = None,
         bundled_attachment_name: str | None = None,
-    ) -> None:
+        reply_to_message_id: int | None = None,
+        priority: DeliveryPriority | None = None,
+    ) -> tuple[int, int | None] | None:
         chat_id = get_admin_chat_id()
         if not chat_id:
-            return
+            return None
 
         if attachment_path and bundled_attachment_path:
             item = ResponseItem(
@@ -130,6 +293,7 @@ class DeliveryHub:
                 caption=text,
                 attachment_paths=[attachment_path, bundled_attachment_path],
                 attachment_names=[attachment_name, bundled_attachment_name],
+                reply_to_message_id=reply_to_message_id,
             )
         else:
             item = ResponseItem(
@@ -139,55 +303,92 @@ class DeliveryHub:
                 attachment_path=attachment_path,
                 attachment_name=attachment_name,
                 caption=text if attachment_path else None,
+                reply_to_message_id=reply_to_message_id,
             )
-        await self._deliver_telegram_item(chat_id, item)
+        if priority is None:
+            # Текстовое уведомление (SMS, запуск) срочное, записи и PDF могут подождать
+            priority = DeliveryPriority.BULK if attachment_path else DeliveryPriority.ALERT
+        return chat_id, await self._deliver_telegram_item(chat_id, item, priority)
 
-    async def _deliver_telegram_item(self, chat_id: int, item: ResponseItem) -> None:
+    async def _deliver_telegram_item(
+        self,
+        chat_id: int,
+        item: ResponseItem,
+        priority: DeliveryPriority = DeliveryPriority.ALERT,
+    ) -> int | None:
         app = self._telegram_app
         if not app:
-            append_failed_message(chat_id, item, 'telegram transport is unavailable')
-            return
+            self._enqueue_telegram_item(chat_id, item, 'telegram transport is unavailable')
+            return None
         try:
-            async with self._telegram_send_lock:
-                await self._flush_pending_telegram_messages_locked()
-                delivered, last_error = await send_tg_item_direct(app, chat_id, item)
-                if delivered:
-                    return
-                if self._is_retryable_telegram_error(last_error):
-                    append_failed_message(chat_id, item, last_error)
-                    return
-                logger.error('Telegram item is non-retryable for chat_id=%s: %s', chat_id, last_error)
+            sent_message_ids: list[int] = []
+            delivered, last_error = await self._send_in_lane(app, chat_id, item, sent_message_ids, TELEGRAM_LIVE_RETRY_DELAYS, priority)
+            if delivered:
+                return sent_message_ids[0] if sent_message_ids else None
+            if self._is_retryable_telegram_error(last_error):
+                self._enqueue_telegram_item(chat_id, item, last_error)
+                return None
+            logger.error('Telegram item is non-retryable for chat_id=%s: %s', chat_id, last_error)
         except Exception:
             logger.exception('Failed to deliver Telegram item to chat_id=%s', chat_id)
+        return None
 
-    async def _flush_pending_telegram_messages_locked(self) -> None:
-        app = self._telegram_app
-        if not app:
-            return
-        remaining = list(load_failed_queue())
-        if not remaining:
-            return
+    def _enqueue_telegram_item(self, chat_id: int, item: ResponseItem, last_error: str | None) -> None:
+        self._telegram_queue.append(chat_id, item, last_error)
+        self._telegram_queue_wakeup.set()
+
+    async def _send_in_lane(
+        self,
+        app,
+        chat_id: int,
+        item: ResponseItem,
+        sent_message_ids: list[int] | None,
+        retry_delays: list[float],
+        priority: DeliveryPriority,
+    ) -> tuple[bool, str | None]:
+        async def send() -> tuple[bool, str | None]:
+            # Лимит берётся перед каждым вызовом API: части длинного текста уходят в темпе чата, а не пачкой
+            throttle = functools.partial(self._telegram_rate_limiter.acquire, chat_id)
+            return await send_tg_item_direct(app, chat_id, item, sent_message_ids, retry_delays=retry_delays, throttle=throttle)
+
+        return await self._telegram_lanes.run(chat_id, send, priority=priority)
+
+    async def _drain_pending_telegram_messages(self) -> bool:
+        """Один проход по очереди; False — какой-то чат остановился на retryable-ошибке (или пропал транспорт)."""
+        remaining = self._telegram_queue.pending()
         logger.info('Telegram queue flush started: %s item(s)', len(remaining))
-        while remaining:
-            queued = remaining[0]
+        by_chat: dict[int, list] = {}
+        for queued in remaining:
+            by_chat.setdefault(queued.chat_id, []).append(queued)
+        try:
+            results = await asyncio.gather(*(self._drain_chat(items) for items in by_chat.values()))
+        finally:
+            self._telegram_queue.sync()
+        return all(results)
+
+    async def _drain_chat(self, items: list) -> bool:
+        for queued in items:
+            app = self._telegram_app
+            if not app:
+                return False
             delivered, retryable_failure = await self._send_queued_message(app, queued)
             if delivered:
-                remaining.pop(0)
-                store_failed_queue(remaining)
+                self._telegram_queue.ack(queued.entry_id)
                 continue
             if retryable_failure:
                 logger.warning('Telegram queue flush stopped on retryable failure for chat_id=%s', queued.chat_id)
-                break
+                return False
             logger.error(
                 'Telegram queue item dropped as non-retryable for chat_id=%s created_at=%s',
                 queued.chat_id,
                 queued.created_at,
             )
-            remaining.pop(0)
-            store_failed_queue(remaining)
+            self._telegram_queue.ack(queued.entry_id)
+        return True
 
     async def _send_queued_message(self, app, queued) -> tuple[bool, bool]:
-        delivered, last_error = await send_tg_item_direct(app, queued.chat_id, queued.item)
+        # Одна попытка: повторы с задержкой делает run_queue_drainer
+        delivered, last_error = await self._send_in_lane(app, queued.chat_id, queued.item, None, [0], DeliveryPriority.BULK)
         if delivered:
             return True, False
         if self._is_retryable_telegram_error(last_error):
@@ -205,13 +406,21 @@ class DeliveryHub:
         attachment_path: str | None,
         attachment_name: str | None,
         email_html: str | None = None,
-    ) -> None:
+        in_reply_to: str | None = None,
+    ) -> str | None:
         if not self.is_email_enabled():
-            return
+            return None
         attachments = []
         if attachment_path:
             attachments.append((attachment_path, attachment_name or os.path.basename(attachment_path)))
-        await self._send_email(self.config.EMAIL_TO_LIST, subject, text, attachments, body_html=email_html)
+        return await self._send_email(
+            self.config.EMAIL_TO_LIST,
+            subject,
+            text,
+            attachments,
+            body_html=email_html,
+            in_reply_to=in_reply_to,
+        )
 
     async def _send_email(
         self,
@@ -220,11 +429,19 @@ class DeliveryHub:
         body: str,
         attachments: list[tuple[str, str]],
         body_html: str | None = None,
-    ) -> None:
+        in_reply_to: str | None = None,
+    ) -> str | None:
         if not self.is_email_enabled():
-            return
+            return None
         recipient_list = [x for x in recipients if x]
         if not recipient_list:
-            return
+            return None
         resolved_body_html = body_html or render_email_html(body)
-        await self._email_sender.send(recipient_list, subject, body, attachments, body_html=resolved_body_html)
+        return await self._email_sender.send(
+            recipient_list,
+            subject,
+            body,
+            attachments,
+            body_html=resolved_body_html,
+            in_reply_to=in_reply_to,
+        )
@@ -1,23 +1,52 @@
 import asyncio
+import logging
 import time
+from dataclasses import dataclass
 from typing import Any
 
 from domain.events import CdrGroupEvent, SMSReceivedEvent
+from domain.models import DeliveryReceipt
 from integrations.asterisk.cdr_monitor import CDRMonitor
-from integrations.asterisk.recordings import resolve_recording_path
+from integrations.asterisk.recording_watcher import RecordingWatcher
+from integrations.asterisk.recordings import RECORDINGS_DIR, resolve_recording_path
 from integrations.event_store.client import CallStoreResult, EventStoreClient
+from integrations.transcription.speculative import SpeculativeTranscriber
 from services.delivery_service import DeliveryHub
 from services.formatters.cdr import format_cdr_group
 from services.formatters.email_html import render_email_html
 from services.formatters.sms import format_sms
-from services.formatters.transcription import format_transcription
+from services.formatters.transcription import format_transcription, format_transcription_tail
+from workers.job_queue import BoundedJobQueue
+
+logger = logging.getLogger(__name__)
+
+_PROGRESS_TEXT_LIMIT = 3900
+_PROGRESS_PLACEHOLDER = 'Транскрибация: идёт распознавание…'
+
+
+@dataclass
+class _CdrGroupJob:
+    """Группа CDR в очереди обработки; receipt — отправленная карточка, если доставка двухфазная."""
+    rows: list[dict]
+    msg: str
+    attachment_path: str | None
+    attachment_name: str | None
+    two_phase: bool = False
+    receipt: DeliveryReceipt | None = None
 
 
 async def handle_cdr_group_notification(delivery: DeliveryHub, event_store: EventStoreClient, transcriber, transcription_pdf_renderer, rows: list[dict]) -> None:
+    job = await _prepare_cdr_group(delivery, transcriber, rows)
+    if job is not None:
+        await _process_cdr_group(delivery, event_store, transcriber, transcription_pdf_renderer, job)
+
+
+async def _prepare_cdr_group(delivery: DeliveryHub, transcriber, rows: list[dict]) -> _CdrGroupJob | None:
+    """Быстрая часть обработки группы: карточка и, в двухфазном режиме, её отправка без ожидания очереди."""
     event = CdrGroupEvent(rows=rows)
     msg = format_cdr_group(event.rows)
     if not msg:
-        return
+        return None
 
     answered_record = next((record for record in event.rows if record.get('disposition') == 'ANSWERED'), None)
     attachment_path = None
@@ -25,52 +54,309 @@ async def handle_cdr_group_notification(delivery: DeliveryHub, event_store: Even
     if answered_record:
         attachment_path, attachment_name = resolve_recording_path(answered_record.get('uniqueid'))
 
-    transcription_payload = await _transcribe_call_recording(transcriber, attachment_path)
-    transcription_payload = _apply_call_speaker_aliases(event.rows, transcription_payload)
-    transcription_text = format_transcription((transcription_payload or {}).get('conversation'))
-    transcription_text = transcription_text or None
-    transcription_pdf_path, transcription_pdf_name = _build_transcription_pdf(
+    job = _CdrGroupJob(rows=rows, msg=msg, attachment_path=attachment_path, attachment_name=attachment_name)
+    if _should_notify_in_two_phases(delivery, transcriber, attachment_path):
+        job.two_phase = True
+        job.receipt = await _send_cdr_card(delivery, msg, attachment_path, attachment_name)
+    return job
+
+
+async def _process_cdr_group(delivery: DeliveryHub, event_store: EventStoreClient, transcriber, transcription_pdf_renderer, job: _CdrGroupJob) -> None:
+    """Медленная часть (транскрибация, PDF, сохранение звонка) — выполняется воркером очереди групп CDR."""
+    if job.two_phase:
+        await _notify_cdr_followup(delivery, event_store, transcriber, transcription_pdf_renderer, job)
+        return
+
+    transcription_payload, transcription_text = await _transcribe_for_notification(transcriber, job.rows, job.attachment_path)
+    transcription_pdf_path, transcription_pdf_name = await _build_transcription_pdf(
         transcription_pdf_renderer,
-        attachment_path,
+        job.attachment_path,
         transcription_payload,
     )
     call_store_result = await _save_call_event(
         event_store,
-        event.rows,
-        attachment_path,
-        attachment_name,
+        job.rows,
+        job.attachment_path,
+        job.attachment_name,
         (transcription_payload or {}).get('conversation'),
     )
 
-    email_link_label = 'Карточка звонка' if call_store_result.ok else 'Карточка ошибки'
-    email_text = _append_transcription(msg, transcription_text)
-    email_text = _append_event_link(email_text, call_store_result.view_url, email_link_label)
-    if not call_store_result.ok and call_store_result.error_message:
-        email_text = f'{email_text}\n\nОшибка сохранения звонка: {call_store_result.error_message}'
+    email_text = _build_call_email_text(job.msg, transcription_text, call_store_result)
     email_html = render_email_html(email_text)
 
     await delivery.notify_event(
+        subject='SipBridgeBot: CDR событие',
+        text=job.msg,
+        attachment_path=job.attachment_path,
+        attachment_name=job.attachment_name,
+        parse_mode=None,
+        email_text=email_text,
+        email_html=email_html,
+        email_attachment_path=None if call_store_result.ok else job.attachment_path,
+        email_attachment_name=None if call_store_result.ok else job.attachment_name,
+        telegram_bundle_attachment_path=transcription_pdf_path,
+        telegram_bundle_attachment_name=transcription_pdf_name,
+    )
+
+
+async def _send_cdr_card(delivery: DeliveryHub, msg: str, attachment_path: str, attachment_name: str | None) -> DeliveryReceipt:
+    # Фаза 1: карточка звонка с записью уходит сразу после закрытия группы CDR.
+    return await delivery.notify_event(
         subject='SipBridgeBot: CDR событие',
         text=msg,
         attachment_path=attachment_path,
         attachment_name=attachment_name,
         parse_mode=None,
+        email_text=msg,
+        email_html=render_email_html(msg),
+        email_attachment_path=None,
+    )
+
+
+async def _notify_cdr_followup(
+    delivery: DeliveryHub,
+    event_store: EventStoreClient,
+    transcriber,
+    transcription_pdf_renderer,
+    job: _CdrGroupJob,
+) -> None:
+    # Фаза 2: транскрибация, PDF и ссылка на карточку — ответом на то же сообщение и письмо.
+    rows, msg, receipt = job.rows, job.msg, job.receipt
+    attachment_path, attachment_name = job.attachment_path, job.attachment_name
+
+    progress = None
+    if delivery.config.CALL_NOTIFY_PROGRESS_INTERVAL_SECONDS > 0:
+        progress = _TranscriptionProgress(delivery, rows, delivery.config.CALL_NOTIFY_PROGRESS_INTERVAL_SECONDS)
+        await progress.start(receipt)
+    try:
+        transcription_payload, transcription_text = await _transcribe_for_notification(
+            transcriber,
+            rows,
+            attachment_path,
+            on_rows=progress.add_rows if progress else None,
+            on_full_quality=_full_quality_followup(delivery, transcription_pdf_renderer, rows, attachment_path, receipt),
+        )
+    finally:
+        if progress:
+            progress.stop()
+
+    call_store_result = await _save_call_event(
+        event_store,
+        rows,
+        attachment_path,
+        attachment_name,
+        (transcription_payload or {}).get('conversation'),
+    )
+    event_link = _telegram_event_link(call_store_result)
+
+    followup_text = _append_transcription('', transcription_text).strip() or None
+    if progress:
+        if followup_text:
+            final_text = followup_text
+        elif transcription_payload:
+            final_text = 'Транскрибация: речь в записи не распознана.'
+        else:
+            final_text = 'Транскрибация: не удалось распознать запись.'
+        if await progress.finish(_append_line(final_text, event_link)):
+            followup_text = None
+            event_link = None
+    followup_text = _append_line(followup_text, event_link) or None
+    transcription_pdf_path, transcription_pdf_name = await _build_transcription_pdf(
+        transcription_pdf_renderer,
+        attachment_path,
+        transcription_payload,
+    )
+
+    email_text = _build_call_email_text(msg, transcription_text, call_store_result)
+    await delivery.notify_followup(
+        receipt,
+        subject='SipBridgeBot: CDR событие',
+        text=followup_text,
+        attachment_path=transcription_pdf_path,
+        attachment_name=transcription_pdf_name,
+        attachment_caption='Транскрибация звонка (PDF)',
         email_text=email_text,
-        email_html=email_html,
+        email_html=render_email_html(email_text),
         email_attachment_path=None if call_store_result.ok else attachment_path,
         email_attachment_name=None if call_store_result.ok else attachment_name,
-        telegram_bundle_attachment_path=transcription_pdf_path,
-        telegram_bundle_attachment_name=transcription_pdf_name,
     )
 
 
-async def start_cdr_monitor(delivery: DeliveryHub, event_store: EventStoreClient, transcriber, transcription_pdf_renderer):
-    async def cdr_group_callback(group: list):
-        await handle_cdr_group_notification(delivery, event_store, transcriber, transcription_pdf_renderer, group)
+def _should_notify_in_two_phases(delivery: DeliveryHub, transcriber, attachment_path: str | None) -> bool:
+    if not attachment_path or not getattr(delivery.config, 'CALL_NOTIFY_TWO_PHASE', False):
+        return False
+    return transcriber is not None and transcriber.is_enabled()
+
+
+async def _transcribe_for_notification(
+    transcriber,
+    rows: list[dict],
+    attachment_path: str | None,
+    on_rows=None,
+    on_full_quality=None,
+) -> tuple[dict[str, Any] | None, str | None]:
+    transcription_payload = await _transcribe_call_recording(transcriber, attachment_path, on_rows=on_rows, on_full_quality=on_full_quality)
+    transcription_payload = _apply_call_speaker_aliases(rows, transcription_payload)
+    transcription_text = format_transcription((transcription_payload or {}).get('conversation'))
+    return transcription_payload, transcription_text or None
+
+
+def _full_quality_followup(delivery: DeliveryHub, transcription_pdf_renderer, rows: list[dict], attachment_path: str, receipt):
+    """Ответ на карточку звонка с повторной транскрибацией в полном качестве (после быстрого профиля)."""
+    async def deliver(transcription_payload: dict[str, Any]) -> None:
+        transcription_payload = _apply_call_speaker_aliases(rows, transcription_payload)
+        transcription_text = format_transcription((transcription_payload or {}).get('conversation'))
+        if not transcription_text:
+            return
+        transcription_pdf_path, transcription_pdf_name = await _build_transcription_pdf(
+            transcription_pdf_renderer,
+            attachment_path,
+            transcription_payload,
+        )
+        text = f'Транскрибация (полное качество):\n{transcription_text}'
+        await delivery.notify_followup(
+            receipt,
+            subject='SipBridgeBot: CDR событие',
+            text=text,
+            attachment_path=transcription_pdf_path,
+            attachment_name=transcription_pdf_name,
+            attachment_caption='Транскрибация звонка в полном качестве (PDF)',
+            email_text=text,
+            email_html=render_email_html(text),
+        )
+
+    return deliver
+
+
+class _TranscriptionProgress:
+    """Ответ на карточку звонка, который раз в interval секунд дополняется распознанным текстом."""
+
+    def __init__(self, delivery: DeliveryHub, call_rows: list[dict], interval: float):
+        self._delivery = delivery
+        self._call_rows = call_rows
+        self._interval = interval
+        self._conversation: list[dict] = []
+        self._message: tuple[int, int] | None = None
+        self._last_text: str | None = None
+        self._task: asyncio.Task | None = None
+
+    async def start(self, receipt) -> None:
+        self._message = await self._delivery.send_telegram_progress(receipt, _PROGRESS_PLACEHOLDER)
+        self._last_text = _PROGRESS_PLACEHOLDER
+        if self._message:
+            self._task = asyncio.create_task(self._run())
+
+    def add_rows(self, rows: list[dict]) -> None:
+        self._conversation.extend(rows)
+
+    def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            self._task = None
+
+    async def finish(self, text: str) -> bool:
+        """Заменяет промежуточный текст итоговым; False, если итог нужно отправить отдельным сообщением."""
+        self.stop()
+        if not self._message:
+            return False
+        if len(text) > _PROGRESS_TEXT_LIMIT:
+            await self._edit('Транскрибация готова, полный текст — ниже.')
+            return False
+        return await self._edit(text)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self._interval)
+            if not self._conversation:
+                continue
+            try:
+                payload = _apply_call_speaker_aliases(self._call_rows, {'conversation': self._conversation})
+                header = f'{_PROGRESS_PLACEHOLDER}\n\n'
+                body = format_transcription_tail(payload['conversation'], _PROGRESS_TEXT_LIMIT - len(header))
+                await self._edit(header + body)
+            except Exception:
+                logger.exception('Failed to update transcription progress message')
+
+    async def _edit(self, text: str) -> bool:
+        if text == self._last_text:
+            return True
+        chat_id, message_id = self._message
+        edited = await self._delivery.edit_telegram_text(chat_id, message_id, text)
+        if edited:
+            self._last_text = text
+        return edited
+
+
+def _build_call_email_text(msg: str, transcription_text: str | None, call_store_result: CallStoreResult) -> str:
+    email_link_label = 'Карточка звонка' if call_store_result.ok else 'Карточка ошибки'
+    email_text = _append_transcription(msg, transcription_text)
+    email_text = _append_event_link(email_text, call_store_result.view_url, email_link_label)
+    if not call_store_result.ok and call_store_result.error_message:
+        email_text = f'{email_text}\n\nОшибка сохранения звонка: {call_store_result.error_message}'
+    return email_text
+
+
+async def start_cdr_monitor(delivery: DeliveryHub, event_store: EventStoreClient, transcriber, transcription_pdf_renderer) -> BoundedJobQueue:
+    transcription_enabled = transcriber is not None and transcriber.is_enabled()
+    if transcription_enabled and delivery.config.CALL_TRANSCRIBE_SPECULATIVE:
+        # Распознавание стартует при закрытии файла записи, не дожидаясь группы CDR
+        transcriber = SpeculativeTranscriber(transcriber, max_jobs=delivery.config.CALL_TRANSCRIBE_SPECULATIVE_MAX_JOBS)
+        RecordingWatcher(RECORDINGS_DIR, transcriber.start).start()
+
+    async def handle_cdr_group(group: list):
+        # Карточка уходит прямо из колбэка монитора; в очередь встаёт только транскрибация и PDF,
+        # поэтому карточки не ждут распознавания предыдущих звонков, а чтение Master.csv — места в очереди
+        try:
+            job = await _prepare_cdr_group(delivery, transcriber, group)
+        except Exception:
+            logger.exception('Failed to send CDR card')
+            monitor.group_done(group)
+            return
+        if job is None:
+            monitor.group_done(group)
+        elif not job_queue.submit_nowait(job):
+            # Группа остаётся необработанной: контрольная точка не уйдёт дальше неё, после перезапуска её прочитают заново
+            logger.warning('CDR group is not queued for transcription: %s', group[0].get('uniqueid'))
+
+    async def handle_cdr_group_job(job: _CdrGroupJob):
+        try:
+            await _process_cdr_group(delivery, event_store, transcriber, transcription_pdf_renderer, job)
+        except asyncio.CancelledError:
+            # Прерванная при остановке группа останется до контрольной точки и будет прочитана заново
+            raise
+        except Exception:
+            # Ошибку логирует очередь; повтор той же группы после перезапуска её не исправит
+            monitor.group_done(job.rows)
+            raise
+        monitor.group_done(job.rows)
+
+    async def handle_cdr_group_started(row: dict):
+        # Модель грузится, пока группа CDR дособирается (group_timeout), а не после её закрытия
+        if transcription_enabled:
+            await transcriber.preload()
+
+    job_queue = BoundedJobQueue(
+        'cdr-groups',
+        handle_cdr_group_job,
+        maxsize=delivery.config.CDR_JOB_QUEUE_SIZE,
+        workers=delivery.config.CDR_JOB_WORKERS,
+    )
+    job_queue.start()
+    if transcriber is not None:
+        # Глубина очереди групп CDR — сигнал для выбора быстрого профиля транскрибации
+        transcriber.set_backlog_source(job_queue.depth)
 
     cdr_file = '/var/log/asterisk/cdr-csv/Master.csv'
-    monitor = CDRMonitor(cdr_file, cdr_group_callback, check_interval=5.0, group_timeout=30.0)
+    monitor = CDRMonitor(
+        cdr_file,
+        handle_cdr_group,
+        check_interval=5.0,
+        group_timeout=30.0,
+        checkpoint_path=delivery.config.CDR_CHECKPOINT_FILE,
+        on_group_started=handle_cdr_group_started,
+    )
     asyncio.create_task(monitor.start())
+    return job_queue
 
 
 async def handle_sms_notification(delivery: DeliveryHub, event_store: EventStoreClient, sender: str, sim: str, when: str, text: str) -> None:
@@ -120,16 +406,16 @@ async def _save_call_event(
     )
 
 
-async def _transcribe_call_recording(transcriber, attachment_path: str | None) -> dict[str, Any] | None:
+async def _transcribe_call_recording(transcriber, attachment_path: str | None, on_rows=None, on_full_quality=None) -> dict[str, Any] | None:
     if transcriber is None or not attachment_path:
         return None
-    return await transcriber.transcribe_recording(attachment_path)
+    return await transcriber.transcribe_recording(attachment_path, on_rows=on_rows, on_full_quality=on_full_quality)
 
 
-def _build_transcription_pdf(transcription_pdf_renderer, attachment_path: str | None, transcription_payload: dict[str, Any] | None) -> tuple[str | None, str | None]:
+async def _build_transcription_pdf(transcription_pdf_renderer, attachment_path: str | None, transcription_payload: dict[str, Any] | None) -> tuple[str | None, str | None]:
     if transcription_pdf_renderer is None or not attachment_path or not transcription_payload:
         return None, None
-    return transcription_pdf_renderer.render_for_recording(attachment_path, transcription_payload.get('conversation'))
+    return await transcription_pdf_renderer.render_for_recording_async(attachment_path, transcription_payload.get('conversation'))
 
 
 def _build_call_payload(rows: list[dict]) -> dict | None:
@@ -212,6 +498,20 @@ def _append_transcription(text: str, transcription_text: str | None) -> str:
     return f'{text}\n\nТранскрибация:\n{transcription_text}'
 
 
+def _telegram_event_link(call_store_result: CallStoreResult) -> str | None:
+    # Ответ в Telegram отправляется без разметки, поэтому ссылка — обычной строкой
+    if not call_store_result.view_url:
+        return None
+    label = 'Карточка звонка' if call_store_result.ok else 'Карточка ошибки'
+    return f'{label}: {call_store_result.view_url}'
+
+
+def _append_line(text: str | None, line: str | None) -> str | None:
+    if not line:
+        return text
+    return f'{text}\n\n{line}' if text else line
+
+
 def _append_event_link(text: str, view_url: str | None, label: str) -> str:
     if not view_url:
         return text
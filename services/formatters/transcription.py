@@ -12,3 +12,14 @@ def format_transcription(conversation: list[dict] | None) -> str:
             continue
         lines.append(f'[{start_hms} - {end_hms}] {speaker}: {text}')
     return '\n'.join(lines)
+
+
+def format_transcription_tail(conversation: list[dict] | None, limit: int) -> str:
+    text = format_transcription(conversation)
+    if len(text) <= limit:
+        return text
+    tail = text[-limit:]
+    newline = tail.find('\n')
+    if newline != -1:
+        tail = tail[newline + 1:]
+    return f'…\n{tail}'
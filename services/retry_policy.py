@@ -1,7 +1,23 @@
+import random
+
 TELEGRAM_RETRY_DELAYS = [0, 1, 2, 5, 10, 20]
+# Отправка в реальном времени быстро сдаётся и кладёт сообщение в очередь, дальше повторяет фоновый разборщик
+TELEGRAM_LIVE_RETRY_DELAYS = [0, 1, 3]
+TELEGRAM_DRAIN_BACKOFF_BASE_SECONDS = 2.0
+TELEGRAM_DRAIN_BACKOFF_MAX_SECONDS = 300.0
 
 
 def is_retryable_telegram_error(last_error: str | None) -> bool:
     if not last_error:
         return False
     return last_error.startswith("RetryAfter:") or last_error.startswith("TimedOut:") or last_error.startswith("NetworkError:")
+
+
+def jittered_backoff_delay(
+    attempt: int,
+    base: float = TELEGRAM_DRAIN_BACKOFF_BASE_SECONDS,
+    cap: float = TELEGRAM_DRAIN_BACKOFF_MAX_SECONDS,
+) -> float:
+    """Экспоненциальная задержка с джиттером: случайно от половины до целого min(cap, base * 2**(attempt-1))."""
+    ceiling = min(cap, base * (2 ** max(0, attempt - 1)))
+    return random.uniform(ceiling / 2, ceiling)
@@ -0,0 +1,6 @@
+import os
+
+# bootstrap.config читает обязательные переменные при импорте; тестам хватает заглушек
+os.environ.setdefault('BOT_ENV_FILE', os.devnull)
+for _name in ('BOT_TOKEN', 'ADMIN_LOGIN', 'TG_HOST', 'TG_USER', 'TG_PASS'):
+    os.environ.setdefault(_name, 'test')
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from integrations.transcription.adaptive import FAST_PROFILE, FULL_PROFILE, choose_quality_profile, fast_profile_config
+
+
+def _config(**overrides) -> SimpleNamespace:
+    values = {
+        'CALL_TRANSCRIBE_MODEL': 'small',
+        'CALL_TRANSCRIBE_BEAM_SIZE': 5,
+        'CALL_TRANSCRIBE_FAST_MODEL': 'base',
+        'CALL_TRANSCRIBE_FAST_BEAM_SIZE': 1,
+        'CALL_TRANSCRIBE_FAST_BACKLOG': 3,
+        'CALL_TRANSCRIBE_FAST_LONG_SECONDS': 600,
+        'CALL_TRANSCRIBE_WINDOW_SECONDS': 120,
+        'CALL_TRANSCRIBE_TUNING_FILE': '/tmp/tuning.json',
+    }
+    values.update(overrides)
+    return SimpleNamespace(**values)
+
+
+@pytest.mark.parametrize('backlog, duration, expected', [
+    (0, 30.0, FULL_PROFILE),
+    (2, 30.0, FULL_PROFILE),
+    (3, 30.0, FAST_PROFILE),
+    (10, None, FAST_PROFILE),
+    # Длинная запись переходит на быстрый профиль, только если её кто-то ждёт
+    (0, 900.0, FULL_PROFILE),
+    (1, 900.0, FAST_PROFILE),
+    (1, 599.0, FULL_PROFILE),
+    (1, None, FULL_PROFILE),
+])
+def test_profile_thresholds(backlog, duration, expected):
+    profile = choose_quality_profile(_config(), duration, backlog)
+
+    assert profile.name == expected
+    assert profile.backlog == backlog and profile.duration_seconds == duration
+    assert (profile.model, profile.beam_size) == (('base', 1) if expected == FAST_PROFILE else ('small', 5))
+
+
+def test_without_fast_model_profile_is_always_full():
+    profile = choose_quality_profile(_config(CALL_TRANSCRIBE_FAST_MODEL=''), 3600.0, 100)
+    assert profile.name == FULL_PROFILE and not profile.is_fast
+
+
+def test_zero_backlog_threshold_leaves_only_long_recording_rule():
+    config = _config(CALL_TRANSCRIBE_FAST_BACKLOG=0)
+    assert choose_quality_profile(config, 30.0, 100).name == FULL_PROFILE
+    assert choose_quality_profile(config, 900.0, 1).name == FAST_PROFILE
+
+
+def test_zero_long_seconds_leaves_only_backlog_rule():
+    config = _config(CALL_TRANSCRIBE_FAST_LONG_SECONDS=0)
+    assert choose_quality_profile(config, 3600.0, 2).name == FULL_PROFILE
+    assert choose_quality_profile(config, 30.0, 3).name == FAST_PROFILE
+
+
+def test_reason_and_dict_are_reported():
+    profile = choose_quality_profile(_config(), 30.0, 4)
+    assert profile.reason == 'backlog 4 >= 3'
+    assert profile.to_dict()['name'] == FAST_PROFILE
+
+
+def test_fast_profile_config_swaps_model_and_beam():
+    config = fast_profile_config(_config())
+
+    assert (config.CALL_TRANSCRIBE_MODEL, config.CALL_TRANSCRIBE_BEAM_SIZE) == ('base', 1)
+    # Быстрый профиль сам не выбирает профиль, не читает файл autotune и не режет запись на окна
+    assert config.CALL_TRANSCRIBE_FAST_MODEL == ''
+    assert config.CALL_TRANSCRIBE_TUNING_FILE is None
+    assert config.CALL_TRANSCRIBE_WINDOW_SECONDS == 0
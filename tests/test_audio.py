@@ -0,0 +1,55 @@
+import wave
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from integrations.transcription import audio
+from integrations.transcription.audio import load_stereo_channels, resample
+
+
+def _write_stereo_wav(path, sample_rate: int, seconds: float) -> None:
+    frames = np.zeros((int(sample_rate * seconds), 2), dtype='<i2')
+    frames[:, 0] = 1000
+    frames[:, 1] = -1000
+    with wave.open(str(path), 'wb') as wav:
+        wav.setnchannels(2)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(frames.tobytes())
+
+
+def _rms(samples: np.ndarray) -> float:
+    # Края отбрасываем: там сказывается переходный процесс фильтра
+    return float(np.sqrt(np.mean(np.square(samples[1000:-1000]))))
+
+
+def test_load_stereo_channels_splits_and_scales(tmp_path):
+    wav_path = tmp_path / 'call.wav'
+    _write_stereo_wav(wav_path, 8000, 1.0)
+
+    left, right = load_stereo_channels(wav_path)
+
+    assert left.dtype == np.float32 and left.size == 16000
+    assert np.allclose(left, 1000 / 32768) and np.allclose(right, -1000 / 32768)
+
+
+def test_load_stereo_channels_keeps_original_error(tmp_path):
+    wav_path = tmp_path / 'call.wav'
+    _write_stereo_wav(wav_path, 8000, 1.0)
+
+    with mock.patch.object(audio, '_to_float32', side_effect=MemoryError('no memory')):
+        with pytest.raises(MemoryError, match='no memory'):
+            load_stereo_channels(wav_path)
+
+
+def test_fractional_downsampling_does_not_alias():
+    sample_rate = 44100
+    t = np.arange(sample_rate * 2) / sample_rate
+    # 10 кГц выше новой частоты Найквиста (8 кГц) и без фильтра отразился бы в 6 кГц
+    tone = np.sin(2 * np.pi * 10000 * t).astype(np.float32)
+    speech_band = np.sin(2 * np.pi * 1000 * t).astype(np.float32)
+
+    assert _rms(resample(tone, sample_rate, 16000)) < 1e-3
+    assert _rms(resample(speech_band, sample_rate, 16000)) == pytest.approx(1 / np.sqrt(2), rel=0.01)
+    assert resample(tone, sample_rate, 16000).size == 32000
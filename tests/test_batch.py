@@ -0,0 +1,41 @@
+from pathlib import Path
+
+from integrations.transcription.batch import collect_inputs, output_path_for
+
+
+def _touch(path: Path) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'')
+    return path
+
+
+def test_recursive_inputs_keep_subdirectories(tmp_path):
+    _touch(tmp_path / 'a' / 'call.wav')
+    _touch(tmp_path / 'b' / 'call.wav')
+    _touch(tmp_path / 'b' / 'notes.txt')
+
+    inputs = collect_inputs([str(tmp_path)], recursive=True)
+
+    assert [relative for _, relative in inputs] == [Path('a/call.wav'), Path('b/call.wav')]
+    outputs = {output_path_for(tmp_path / 'out', relative) for _, relative in inputs}
+    assert outputs == {tmp_path / 'out' / 'a' / 'call.json', tmp_path / 'out' / 'b' / 'call.json'}
+
+
+def test_flat_directory_and_single_file_use_file_name(tmp_path):
+    wav_path = _touch(tmp_path / 'call.wav')
+    assert collect_inputs([str(tmp_path)]) == [(wav_path.resolve(), Path('call.wav'))]
+    assert collect_inputs([str(wav_path)]) == [(wav_path.resolve(), Path('call.wav'))]
+
+
+def test_glob_is_relative_to_its_fixed_prefix(tmp_path):
+    _touch(tmp_path / '2024' / '01' / 'x.wav')
+    _touch(tmp_path / '2024' / '02' / 'x.wav')
+
+    inputs = collect_inputs([str(tmp_path / '2024' / '*' / '*.wav')])
+
+    assert [relative for _, relative in inputs] == [Path('01/x.wav'), Path('02/x.wav')]
+
+
+def test_same_file_from_two_sources_is_listed_once(tmp_path):
+    wav_path = _touch(tmp_path / 'call.wav')
+    assert len(collect_inputs([str(tmp_path), str(wav_path)])) == 1
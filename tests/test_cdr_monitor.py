@@ -0,0 +1,145 @@
+import asyncio
+import os
+from pathlib import Path
+
+from integrations.asterisk.cdr_monitor import CDRMonitor
+from integrations.asterisk.file_watch import OffsetCheckpointStore
+
+
+def _cdr_line(src: str, dst: str = '100', start: str = '2024-01-01 10:00:00', end: str = '2024-01-01 10:01:00') -> str:
+    fields = ['', src, dst, 'from-trunk', f'"{src}" <{src}>', 'SIP/a', 'SIP/b', 'Dial', '', start, start, end, '60', '55', 'ANSWERED', 'DOCUMENTATION', f'id-{src}', '']
+    return ','.join(fields) + '\n'
+
+
+def _append(path: Path, *lines: str) -> None:
+    with path.open('a', encoding='utf-8') as f:
+        f.write(''.join(lines))
+
+
+class _Harness:
+    """CDRMonitor без фонового цикла: чтение файла запускается вручную через poll()."""
+
+    def __init__(self, cdr_path: Path, checkpoint_path: Path):
+        self.groups: list[list[dict]] = []
+        self.checkpoint = OffsetCheckpointStore(checkpoint_path)
+        self.monitor = CDRMonitor(str(cdr_path), self._collect, checkpoint_path=checkpoint_path)
+
+    async def _collect(self, group: list[dict]) -> None:
+        self.groups.append(group)
+
+    def open(self) -> None:
+        self.monitor._open_file()
+        self.monitor.last_position = self.monitor._resolve_start_position()
+
+    async def poll(self) -> None:
+        await self.monitor._check_new_cdrs()
+
+    def sources(self) -> list[list[str]]:
+        return [[row['src'] for row in group] for group in self.groups]
+
+    def saved_offset(self) -> int:
+        return self.checkpoint.load().offset
+
+
+def test_first_start_skips_existing_records(tmp_path):
+    cdr_path = tmp_path / 'Master.csv'
+    _append(cdr_path, _cdr_line('old'))
+
+    async def scenario():
+        harness = _Harness(cdr_path, tmp_path / 'offset.json')
+        harness.open()
+        _append(cdr_path, _cdr_line('a'), _cdr_line('b'))
+        await harness.poll()
+        return harness.sources()
+
+    assert asyncio.run(scenario()) == [['a']]
+
+
+def test_checkpoint_waits_for_group_done(tmp_path):
+    cdr_path = tmp_path / 'Master.csv'
+    cdr_path.write_text('', encoding='utf-8')
+    first, second, third = _cdr_line('a'), _cdr_line('b'), _cdr_line('c')
+
+    async def scenario():
+        harness = _Harness(cdr_path, tmp_path / 'offset.json')
+        harness.open()
+        _append(cdr_path, first, second, third)
+        await harness.poll()
+        assert harness.sources() == [['a'], ['b']]
+        # Группы переданы в очередь, но не обработаны: точка остаётся на начале первой
+        assert harness.saved_offset() == 0
+        harness.monitor.group_done(harness.groups[1])
+        assert harness.saved_offset() == 0
+        harness.monitor.group_done(harness.groups[0])
+        # Дальше не пускает группа c, которая ещё собирается
+        assert harness.saved_offset() == len(first) + len(second)
+
+    asyncio.run(scenario())
+
+
+def test_restart_rereads_unfinished_groups(tmp_path):
+    cdr_path = tmp_path / 'Master.csv'
+    cdr_path.write_text('', encoding='utf-8')
+    checkpoint_path = tmp_path / 'offset.json'
+
+    async def first_run():
+        harness = _Harness(cdr_path, checkpoint_path)
+        harness.open()
+        _append(cdr_path, _cdr_line('a'), _cdr_line('b'), _cdr_line('c'))
+        await harness.poll()
+        harness.monitor.group_done(harness.groups[0])
+
+    async def second_run():
+        harness = _Harness(cdr_path, checkpoint_path)
+        harness.open()
+        _append(cdr_path, _cdr_line('d'))
+        await harness.poll()
+        return harness.sources()
+
+    asyncio.run(first_run())
+    # Группа b стояла в очереди при остановке, c ещё собиралась
+    assert asyncio.run(second_run()) == [['b'], ['c']]
+
+
+def test_rotation_reads_tail_of_old_file_then_new_file(tmp_path):
+    cdr_path = tmp_path / 'Master.csv'
+    cdr_path.write_text('', encoding='utf-8')
+
+    async def scenario():
+        harness = _Harness(cdr_path, tmp_path / 'offset.json')
+        harness.open()
+        _append(cdr_path, _cdr_line('a'))
+        await harness.poll()
+        _append(cdr_path, _cdr_line('b'))
+        os.rename(cdr_path, tmp_path / 'Master.csv.1')
+        _append(cdr_path, _cdr_line('c'), _cdr_line('d'))
+        await harness.poll()
+        assert harness.sources() == [['a'], ['b'], ['c']]
+        for group in harness.groups:
+            harness.monitor.group_done(group)
+        checkpoint = harness.checkpoint.load()
+        assert checkpoint.inode == os.stat(cdr_path).st_ino
+        # Группы из прежнего файла не удерживают точку в новом
+        assert checkpoint.offset == len(_cdr_line('c'))
+
+    asyncio.run(scenario())
+
+
+def test_truncation_drops_unfinished_group(tmp_path):
+    cdr_path = tmp_path / 'Master.csv'
+    cdr_path.write_text('', encoding='utf-8')
+
+    async def scenario():
+        harness = _Harness(cdr_path, tmp_path / 'offset.json')
+        harness.open()
+        _append(cdr_path, _cdr_line('a'), _cdr_line('b'))
+        await harness.poll()
+        cdr_path.write_text(_cdr_line('c'), encoding='utf-8')
+        await harness.poll()
+        assert harness.monitor._current_group[0]['src'] == 'c'
+        assert harness.monitor._group_start_position == 0
+        _append(cdr_path, _cdr_line('d'))
+        await harness.poll()
+        return harness.sources()
+
+    assert asyncio.run(scenario()) == [['a'], ['c']]
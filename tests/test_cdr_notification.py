@@ -0,0 +1,241 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+
+from domain.models import DeliveryReceipt
+from integrations.email import smtp_sender
+from integrations.email.smtp_sender import EmailSender
+from integrations.event_store.client import CallStoreResult
+from services import delivery_service, event_router
+from services.delivery_service import DeliveryHub
+
+_ROWS = [{
+    'uniqueid': '1700000000.1',
+    'src': '+79990000000',
+    'dst': '100',
+    'dcontext': 'inbound-gsm',
+    'start': '2026-10-18 10:00:00',
+    'duration': '30',
+    'billsec': '25',
+    'disposition': 'ANSWERED',
+}]
+_VIEW_URL = 'https://events.example/calls/1'
+
+
+class _Delivery:
+    """Запоминает карточку, ответы на неё и правки сообщения о ходе распознавания."""
+
+    def __init__(self, progress_interval: float = 0.0):
+        self.config = SimpleNamespace(CALL_NOTIFY_TWO_PHASE=True, CALL_NOTIFY_PROGRESS_INTERVAL_SECONDS=progress_interval)
+        self.cards: list[dict] = []
+        self.followups: list[dict] = []
+        self.edits: list[str] = []
+
+    async def notify_event(self, **kwargs):
+        self.cards.append(kwargs)
+        return DeliveryReceipt(telegram_chat_id=42, telegram_message_id=len(self.cards), email_message_id=f'<card-{len(self.cards)}@example>')
+
+    async def notify_followup(self, receipt, **kwargs):
+        self.followups.append({'receipt': receipt, **kwargs})
+
+    async def send_telegram_progress(self, receipt, text):
+        return 42, 100
+
+    async def edit_telegram_text(self, chat_id, message_id, text, parse_mode=None):
+        self.edits.append(text)
+        return True
+
+
+class _EventStore:
+    async def save_call(self, **kwargs):
+        return CallStoreResult(ok=True, view_url=_VIEW_URL)
+
+
+class _Transcriber:
+    def is_enabled(self):
+        return True
+
+    async def transcribe_recording(self, path, on_rows=None, on_full_quality=None):
+        return {'channels': {}, 'conversation': [
+            {'channel': 'left', 'speaker': 'SPEAKER_1', 'start_hms': '00:00:00', 'end_hms': '00:00:01', 'text': 'Алло'},
+        ]}
+
+
+def _notify(delivery: _Delivery) -> None:
+    with mock.patch.object(event_router, 'resolve_recording_path', return_value=('/rec/call.wav', 'call.wav')):
+        asyncio.run(event_router.handle_cdr_group_notification(delivery, _EventStore(), _Transcriber(), None, _ROWS))
+
+
+def test_followup_replies_to_card_with_event_link():
+    delivery = _Delivery()
+
+    _notify(delivery)
+
+    assert len(delivery.cards) == 1 and len(delivery.followups) == 1
+    followup = delivery.followups[0]
+    assert followup['receipt'].telegram_message_id == 1
+    assert followup['receipt'].email_message_id == '<card-1@example>'
+    assert 'Алло' in followup['text']
+    assert followup['text'].endswith(f'Карточка звонка: {_VIEW_URL}')
+    assert _VIEW_URL in followup['email_text']
+
+
+def test_event_link_goes_into_progress_message_when_it_holds_the_result():
+    delivery = _Delivery(progress_interval=60.0)
+
+    _notify(delivery)
+
+    assert delivery.edits[-1].endswith(f'Карточка звонка: {_VIEW_URL}')
+    assert delivery.followups[0]['text'] is None
+
+
+class _Smtp:
+    sent: list = []
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def ehlo(self):
+        pass
+
+    def send_message(self, msg):
+        _Smtp.sent.append(msg)
+
+
+@pytest.fixture
+def hub(monkeypatch):
+    config = SimpleNamespace(
+        EMAIL_ENABLED=True,
+        EMAIL_SMTP_HOST='smtp.example',
+        EMAIL_SMTP_PORT=25,
+        EMAIL_SMTP_SSL=False,
+        EMAIL_SMTP_STARTTLS=False,
+        EMAIL_SMTP_USER='',
+        EMAIL_FROM='bot@example.com',
+        EMAIL_TO_LIST=['ops@example.com'],
+    )
+    hub = DeliveryHub.__new__(DeliveryHub)
+    hub.config = config
+    hub._email_sender = EmailSender(config)
+    hub.telegram_items = []
+
+    async def deliver(chat_id, item, priority):
+        hub.telegram_items.append(item)
+        return len(hub.telegram_items)
+
+    hub._deliver_telegram_item = deliver
+    monkeypatch.setattr(delivery_service, 'get_admin_chat_id', lambda: 42)
+    monkeypatch.setattr(smtp_sender.smtplib, 'SMTP', _Smtp)
+    _Smtp.sent = []
+    return hub
+
+
+def test_followup_threads_under_card_in_telegram_and_email(hub):
+    async def scenario():
+        receipt = await hub.notify_event(subject='SipBridgeBot: CDR событие', text='карточка', email_text='карточка')
+        await hub.notify_followup(receipt, subject='SipBridgeBot: CDR событие', text='транскрибация', email_text='транскрибация')
+        return receipt
+
+    receipt = asyncio.run(scenario())
+
+    card_mail, followup_mail = _Smtp.sent
+    assert receipt.telegram_message_id == 1
+    assert hub.telegram_items[1].reply_to_message_id == 1
+    assert receipt.email_message_id == card_mail['Message-ID']
+    assert followup_mail['In-Reply-To'] == followup_mail['References'] == card_mail['Message-ID']
+    assert followup_mail['Subject'] == 'Re: SipBridgeBot: CDR событие'
+    assert followup_mail['Message-ID'] != card_mail['Message-ID']
+
+
+class _BlockingTranscriber(_Transcriber):
+    def __init__(self):
+        self.release = asyncio.Event()
+        self.started = 0
+
+    async def preload(self):
+        pass
+
+    def set_backlog_source(self, source):
+        self.backlog = source
+
+    async def transcribe_recording(self, path, on_rows=None, on_full_quality=None):
+        self.started += 1
+        await self.release.wait()
+        return await super().transcribe_recording(path)
+
+
+class _Monitor:
+    """Вместо чтения Master.csv: тест сам вызывает колбэк с группами."""
+    instances: list = []
+
+    def __init__(self, cdr_path, callback, **kwargs):
+        self.callback = callback
+        self.done: list = []
+        _Monitor.instances.append(self)
+
+    async def start(self):
+        pass
+
+    def group_done(self, group):
+        self.done.append(group)
+
+
+async def _until(predicate) -> None:
+    while not predicate():
+        await asyncio.sleep(0.001)
+
+
+def _run_burst(groups: int, queue_size: int):
+    delivery = _Delivery()
+    delivery.config.CALL_TRANSCRIBE_SPECULATIVE = False
+    delivery.config.CDR_JOB_QUEUE_SIZE = queue_size
+    delivery.config.CDR_JOB_WORKERS = 1
+    delivery.config.CDR_CHECKPOINT_FILE = None
+    transcriber = _BlockingTranscriber()
+    _Monitor.instances = []
+
+    async def scenario():
+        jobs = await event_router.start_cdr_monitor(delivery, _EventStore(), transcriber, None)
+        monitor = _Monitor.instances[0]
+        for index in range(groups):
+            group = [dict(_ROWS[0], uniqueid=f'call-{index}')]
+            # Колбэк монитора не ждёт ни распознавания, ни места в очереди
+            await asyncio.wait_for(monitor.callback(group), timeout=1.0)
+        await _until(lambda: transcriber.started)
+        snapshot = (len(delivery.cards), len(delivery.followups), len(monitor.done), transcriber.started)
+
+        transcriber.release.set()
+        expected = groups - jobs.stats().dropped
+        await asyncio.wait_for(_until(lambda: len(monitor.done) == expected), timeout=1.0)
+        await jobs.stop()
+        return snapshot, jobs.stats(), monitor
+
+    with mock.patch.object(event_router, 'CDRMonitor', _Monitor), \
+            mock.patch.object(event_router, 'resolve_recording_path', side_effect=lambda uid: (f'/rec/{uid}.wav', f'{uid}.wav')):
+        return delivery, asyncio.run(scenario())
+
+
+def test_burst_of_groups_gets_cards_while_transcription_runs():
+    delivery, ((cards, followups, done, started), stats, monitor) = _run_burst(groups=5, queue_size=16)
+
+    assert (cards, followups, done, started) == (5, 0, 0, 1)
+    assert stats.dropped == 0 and stats.completed == 5
+    # Каждый ответ привязан к своей карточке
+    assert [followup['receipt'].telegram_message_id for followup in delivery.followups] == [1, 2, 3, 4, 5]
+
+
+def test_full_queue_drops_transcription_but_keeps_group_unfinished():
+    delivery, ((cards, _, _, _), stats, monitor) = _run_burst(groups=5, queue_size=1)
+
+    assert cards == 5
+    assert stats.dropped >= 1 and stats.completed == 5 - stats.dropped
+    # Отброшенные группы не отмечены обработанными: контрольная точка вернёт их после перезапуска
+    assert len(monitor.done) == 5 - stats.dropped
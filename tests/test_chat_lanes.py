@@ -0,0 +1,127 @@
+import asyncio
+
+import pytest
+
+from workers.chat_lanes import ChatLanes
+
+
+def _job(log: list, name: str, gate: asyncio.Event | None = None):
+    async def run():
+        log.append(f'start {name}')
+        if gate is not None:
+            await gate.wait()
+        await asyncio.sleep(0)
+        log.append(f'end {name}')
+        return name
+    return run
+
+
+def test_jobs_of_one_key_run_one_at_a_time():
+    async def scenario():
+        lanes = ChatLanes('test')
+        log = []
+        results = await asyncio.gather(*(lanes.run(1, _job(log, name)) for name in 'abc'))
+        await lanes.stop()
+        return results, log
+
+    results, log = asyncio.run(scenario())
+
+    assert results == ['a', 'b', 'c']
+    assert log == ['start a', 'end a', 'start b', 'end b', 'start c', 'end c']
+
+
+def test_different_keys_run_in_parallel():
+    async def scenario():
+        lanes = ChatLanes('test')
+        log = []
+        gate = asyncio.Event()
+        blocked = asyncio.create_task(lanes.run(1, _job(log, 'slow', gate)))
+        # Задание другого чата не ждёт зависшее задание первого
+        assert await lanes.run(2, _job(log, 'fast')) == 'fast'
+        finished_first = list(log)
+        gate.set()
+        await blocked
+        await lanes.stop()
+        return finished_first
+
+    finished_first = asyncio.run(scenario())
+    assert 'end fast' in finished_first and 'end slow' not in finished_first
+
+
+def test_failed_job_does_not_stop_the_lane():
+    async def scenario():
+        lanes = ChatLanes('test')
+
+        async def fail():
+            raise ValueError('boom')
+
+        async def ok():
+            return 'ok'
+
+        with pytest.raises(ValueError, match='boom'):
+            await lanes.run(1, fail)
+        result = await lanes.run(1, ok)
+        await lanes.stop()
+        return result
+
+    assert asyncio.run(scenario()) == 'ok'
+
+
+def test_idle_lane_is_removed():
+    async def scenario():
+        lanes = ChatLanes('test', idle_seconds=0.01)
+        await lanes.run(1, _job([], 'a'))
+        assert lanes.lanes() == 1
+        await asyncio.sleep(0.05)
+        lanes_left = lanes.lanes()
+        # После простоя ключ снова получает воркер
+        result = await lanes.run(1, _job([], 'b'))
+        await lanes.stop()
+        return lanes_left, result
+
+    assert asyncio.run(scenario()) == (0, 'b')
+
+
+def test_lower_priority_value_runs_first_and_equal_priorities_keep_order():
+    async def scenario():
+        lanes = ChatLanes('test')
+        log = []
+        gate = asyncio.Event()
+        running = asyncio.create_task(lanes.run(1, _job(log, 'running', gate), priority=5))
+        while not log:
+            await asyncio.sleep(0)
+        queued = [
+            asyncio.create_task(lanes.run(1, _job(log, name), priority=priority))
+            for name, priority in [('bulk1', 2), ('alert', 1), ('bulk2', 2), ('reply', 0)]
+        ]
+        await asyncio.sleep(0)
+        gate.set()
+        await asyncio.gather(running, *queued)
+        await lanes.stop()
+        return [entry.removeprefix('start ') for entry in log if entry.startswith('start')]
+
+    # Начатое задание не прерывается, остальные — по priority, при равном — FIFO
+    assert asyncio.run(scenario()) == ['running', 'reply', 'alert', 'bulk1', 'bulk2']
+
+
+def test_wait_stats_are_kept_per_priority():
+    async def scenario():
+        lanes = ChatLanes('test')
+        log = []
+        gate = asyncio.Event()
+        running = asyncio.create_task(lanes.run(1, _job(log, 'running', gate), priority=0))
+        while not log:
+            await asyncio.sleep(0)
+        queued = [asyncio.create_task(lanes.run(1, _job([], str(index)), priority=2)) for index in range(3)]
+        await asyncio.sleep(0.02)
+        gate.set()
+        await asyncio.gather(running, *queued)
+        await lanes.stop()
+        return lanes.wait_stats()
+
+    stats = asyncio.run(scenario())
+
+    assert list(stats) == [0, 2]
+    assert stats[0].jobs == 1 and stats[2].jobs == 3
+    assert stats[2].max_wait_seconds >= 0.02
+    assert stats[2].avg_wait_seconds == pytest.approx(stats[2].total_wait_seconds / 3)
@@ -0,0 +1,158 @@
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from integrations.transcription.stereo import (
+    ChannelResult,
+    ChannelStream,
+    ConversationRow,
+    _consume_channel_streams,
+    _rows_in_time_order,
+    build_output_json,
+    merge_adjacent_segments,
+)
+
+
+def _channel_rows(rows: int, seed: int) -> tuple[list[ConversationRow], list[ConversationRow]]:
+    """
+    Чередующиеся реплики двух каналов; часть пауз короче merge_gap, чтобы склейка тоже срабатывала,
+    а реплики разных каналов иногда перекрываются. Внутри канала строки, как у Whisper, идут по времени.
+    """
+    rng = np.random.default_rng(seed)
+    channels = {
+        'left': ('SPEAKER_1', 'левый', []),
+        'right': ('SPEAKER_2', 'правый', []),
+    }
+    ends = {'left': 0.0, 'right': 0.0}
+    for index in range(rows):
+        channel = 'left' if rng.random() < 0.5 else 'right'
+        speaker, label, target = channels[channel]
+        # Собеседник может заговорить, пока другой ещё не закончил
+        start = max(ends.values()) - float(rng.choice([0.0, 0.0, 0.8]))
+        start = max(start, ends[channel]) + float(rng.choice([0.0, 0.05, 0.1, 0.5, 1.5]))
+        end = start + float(rng.uniform(0.4, 4.0))
+        target.append(ConversationRow(speaker, channel, start, end, f'{label} {index}' + ('.' if rng.random() < 0.3 else '')))
+        ends[channel] = end
+    return channels['left'][2], channels['right'][2]
+
+
+def _sorted_then_merged(left: list[ConversationRow], right: list[ConversationRow], merge_gap: float) -> list[dict]:
+    conversation = [row.to_dict() for row in left + right]
+    conversation.sort(key=lambda x: (x['start'], x['end'], x['speaker'], x['channel']))
+    return merge_adjacent_segments(conversation, merge_gap)
+
+
+def _conversation(left: list[ConversationRow], right: list[ConversationRow], merge_gap: float) -> list[dict]:
+    return build_output_json(
+        input_wav=Path('call.wav'),
+        model_name='test',
+        device='cpu',
+        compute_type='int8',
+        language='ru',
+        vad_filter=False,
+        vad_min_silence_ms=0,
+        merge_gap=merge_gap,
+        left=ChannelResult('SPEAKER_1', 'left', 'ru', 1.0, left),
+        right=ChannelResult('SPEAKER_2', 'right', 'ru', 1.0, right),
+    )['conversation']
+
+
+@pytest.mark.parametrize('seed', range(5))
+@pytest.mark.parametrize('merge_gap', [0.0, 0.1, 0.8])
+def test_heap_merge_matches_sort_and_merge(seed, merge_gap):
+    left, right = _channel_rows(300, seed)
+    assert _conversation(left, right, merge_gap) == _sorted_then_merged(left, right, merge_gap)
+
+
+def test_merge_does_not_modify_channel_rows():
+    left = [ConversationRow('SPEAKER_1', 'left', 0.0, 1.0, 'раз'), ConversationRow('SPEAKER_1', 'left', 1.1, 2.0, 'два')]
+
+    conversation = _conversation(left, [], merge_gap=0.8)
+
+    assert [(row['start'], row['end'], row['text']) for row in conversation] == [(0.0, 2.0, 'раз два')]
+    assert [(row.end, row.text) for row in left] == [(1.0, 'раз'), (2.0, 'два')]
+
+
+def test_consume_streams_emits_rows_in_time_order_while_channels_are_read():
+    left, right = _channel_rows(50, seed=1)
+    events = []
+
+    def rows(channel_rows):
+        for row in channel_rows:
+            events.append(('read', row.channel))
+            yield row
+
+    emitted = []
+
+    def on_rows(batch):
+        events.append(('emit', batch[0]['channel']))
+        emitted.extend(batch)
+
+    left_result, right_result = _consume_channel_streams(
+        ChannelStream('SPEAKER_1', 'left', 'ru', 1.0, rows(left)),
+        ChannelStream('SPEAKER_2', 'right', 'ru', 1.0, rows(right)),
+        on_rows,
+    )
+
+    assert [row['start'] for row in emitted] == sorted(row['start'] for row in emitted)
+    assert len(emitted) == len(left) + len(right)
+    assert left_result.segments == left and right_result.segments == right
+    # Первая строка уходит потребителю задолго до того, как каналы прочитаны до конца
+    assert [kind for kind, _ in events].index('emit') < 5
+
+
+def test_consume_streams_survives_failing_progress_callback():
+    left, right = _channel_rows(10, seed=2)
+
+    def on_rows(batch):
+        raise RuntimeError('telegram is down')
+
+    left_result, right_result = _consume_channel_streams(
+        ChannelStream('SPEAKER_1', 'left', 'ru', 1.0, iter(left)),
+        ChannelStream('SPEAKER_2', 'right', 'ru', 1.0, iter(right)),
+        on_rows,
+    )
+
+    assert len(left_result.segments) + len(right_result.segments) == 10
+
+
+def _row(start: float, channel: str = 'left') -> ConversationRow:
+    return ConversationRow('SPEAKER_1' if channel == 'left' else 'SPEAKER_2', channel, start, start + 0.5, f'{channel} {start}')
+
+
+def test_output_is_ordered_when_window_seam_reorders_a_channel():
+    # Первое слово следующего окна (9.8) начинается раньше последней фразы предыдущего (9.9)
+    left = ChannelResult('SPEAKER_1', 'left', 'ru', 1.0, [_row(1.0), _row(9.9), _row(9.8), _row(15.0)])
+    right = ChannelResult('SPEAKER_2', 'right', 'ru', 1.0, [_row(9.85, 'right')])
+
+    payload = build_output_json(
+        input_wav=Path('call.wav'),
+        model_name='small',
+        device='cpu',
+        compute_type='int8',
+        language='ru',
+        vad_filter=True,
+        vad_min_silence_ms=500,
+        merge_gap=0.0,
+        left=left,
+        right=right,
+    )
+
+    assert [row['start'] for row in payload['conversation']] == [1.0, 9.8, 9.85, 9.9, 15.0]
+
+
+def test_rows_in_time_order_reorders_within_horizon_and_streams():
+    consumed = []
+
+    def rows():
+        for start in (1.0, 9.9, 9.8, 15.0, 30.0):
+            consumed.append(start)
+            yield _row(start)
+
+    ordered = _rows_in_time_order(rows(), horizon=4.0)
+
+    assert next(ordered).start == 1.0
+    # 1.0 отдана, как только пришла строка на 4 с позже, не дожидаясь конца канала
+    assert consumed == [1.0, 9.9]
+    assert [row.start for row in ordered] == [9.8, 9.9, 15.0, 30.0]
@@ -0,0 +1,89 @@
+import os
+import time
+from pathlib import Path
+
+from domain.models import ResponseItem
+from integrations.telegram.queue_store import TelegramQueueJournal
+from services.delivery_service import DeliveryHub
+from workers.housekeeping import Housekeeper, RetentionRule
+
+_DAY = 86400
+
+
+def _file(path: Path, size: int, age_seconds: float) -> Path:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b'x' * size)
+    mtime = time.time() - age_seconds
+    os.utime(path, (mtime, mtime))
+    return path
+
+
+def _housekeeper(directory: Path, in_use=None, **budget) -> Housekeeper:
+    rule = RetentionRule(name='artifacts', directory=directory, patterns=('*.pdf', '*.json'), **budget)
+    return Housekeeper([rule], in_use=in_use)
+
+
+def test_files_older_than_max_age_are_removed(tmp_path):
+    old = _file(tmp_path / 'old.pdf', 10, 3 * _DAY)
+    fresh = _file(tmp_path / 'fresh.pdf', 10, _DAY / 2)
+
+    reclaimed = _housekeeper(tmp_path, max_age_seconds=_DAY).run_once()
+
+    assert reclaimed == 10
+    assert not old.exists() and fresh.exists()
+
+
+def test_budget_evicts_least_recently_used_first(tmp_path):
+    oldest = _file(tmp_path / 'a.pdf', 100, 3 * 3600)
+    middle = _file(tmp_path / 'b.json', 100, 2 * 3600)
+    newest = _file(tmp_path / 'c.pdf', 100, 1 * 3600)
+    housekeeper = _housekeeper(tmp_path, max_bytes=150)
+
+    assert housekeeper.run_once() == 200
+    assert not oldest.exists() and not middle.exists() and newest.exists()
+    assert housekeeper.stats().rules['artifacts'].bytes == 100
+
+
+def test_young_files_survive_age_and_budget(tmp_path):
+    # Файл моложе 10 минут, возможно, ещё отправляется
+    young = _file(tmp_path / 'young.pdf', 1000, 60)
+    housekeeper = _housekeeper(tmp_path, max_bytes=10, max_age_seconds=1)
+
+    assert housekeeper.run_once() == 0
+    assert young.exists()
+    assert housekeeper.stats().rules['artifacts'].files == 1
+
+
+def test_only_matching_files_in_the_rule_directory_are_touched(tmp_path):
+    artifacts = tmp_path / 'artifacts'
+    matching = _file(artifacts / 'call.pdf', 10, 3 * _DAY)
+    other_extension = _file(artifacts / 'call.wav', 10, 3 * _DAY)
+    nested = _file(artifacts / 'cache' / 'entry.json', 10, 3 * _DAY)
+    outside = _file(tmp_path / 'elsewhere.pdf', 10, 3 * _DAY)
+
+    _housekeeper(artifacts, max_age_seconds=_DAY).run_once()
+
+    assert not matching.exists()
+    assert other_extension.exists() and nested.exists() and outside.exists()
+
+
+def test_attachments_of_queued_messages_are_kept(tmp_path):
+    queued = _file(tmp_path / 'queued.pdf', 100, 3 * _DAY)
+    stale = _file(tmp_path / 'stale.pdf', 100, 3 * _DAY)
+    housekeeper = _housekeeper(tmp_path, in_use=lambda: [str(queued)], max_bytes=50, max_age_seconds=_DAY)
+
+    housekeeper.run_once()
+
+    assert queued.exists() and not stale.exists()
+
+
+def test_delivery_hub_reports_attachments_of_pending_items(tmp_path):
+    hub = DeliveryHub.__new__(DeliveryHub)
+    hub._telegram_queue = TelegramQueueJournal(tmp_path / 'queue.jsonl')
+    hub._telegram_queue.load()
+    hub._telegram_queue.append(1, ResponseItem(kind='file', attachment_path='/tmp/os_1.log'), None)
+    hub._telegram_queue.append(1, ResponseItem(kind='file_group', attachment_paths=['/a.pdf', '/a.json']), None)
+    sent = hub._telegram_queue.append(1, ResponseItem(kind='file', attachment_path='/tmp/sip_1.log'), None)
+    hub._telegram_queue.ack(sent.entry_id)
+
+    assert hub.pending_attachment_paths() == {'/tmp/os_1.log', '/a.pdf', '/a.json'}
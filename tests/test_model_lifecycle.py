@@ -0,0 +1,84 @@
+import time
+
+import pytest
+
+from integrations.transcription import stereo
+from integrations.transcription.cli import build_cli_config, parse_args
+from integrations.transcription.stereo import StereoCallTranscriber
+
+
+class _FakeModel:
+    loads = 0
+
+    def __init__(self, *args, **kwargs):
+        type(self).loads += 1
+
+
+@pytest.fixture
+def make_transcriber(monkeypatch, tmp_path):
+    _FakeModel.loads = 0
+    monkeypatch.setattr(stereo, 'WhisperModel', _FakeModel)
+
+    def make(idle_ttl: float = 0.0, rss_budget_mb: float = 0.0) -> StereoCallTranscriber:
+        config = build_cli_config(parse_args(['call.wav', '--cache-dir', str(tmp_path), '--no-cache']))
+        config.CALL_TRANSCRIBE_MODEL_IDLE_TTL_SECONDS = idle_ttl
+        config.CALL_TRANSCRIBE_RSS_BUDGET_MB = rss_budget_mb
+        transcriber = StereoCallTranscriber(config)
+        # Фоновый поток не нужен: release_model_if_idle вызывается из теста
+        transcriber._start_model_watchdog = lambda: None
+        return transcriber
+
+    return make
+
+
+def _use(transcriber: StereoCallTranscriber):
+    with transcriber._using_model() as model:
+        return model
+
+
+def test_model_is_kept_while_recently_used(make_transcriber):
+    transcriber = make_transcriber(idle_ttl=60)
+
+    first = _use(transcriber)
+
+    assert not transcriber.release_model_if_idle()
+    assert _use(transcriber) is first and _FakeModel.loads == 1
+
+
+def test_idle_model_is_unloaded_and_loaded_again_on_demand(make_transcriber):
+    transcriber = make_transcriber(idle_ttl=60)
+    first = _use(transcriber)
+    transcriber._model_last_used = time.monotonic() - 61
+
+    assert transcriber.release_model_if_idle()
+    assert transcriber._model is None
+    assert _use(transcriber) is not first and _FakeModel.loads == 2
+
+
+def test_model_in_use_is_never_unloaded(make_transcriber, monkeypatch):
+    transcriber = make_transcriber(idle_ttl=60, rss_budget_mb=1)
+    monkeypatch.setattr(stereo, 'current_rss_bytes', lambda: 10 * 1024 * 1024)
+
+    with transcriber._using_model():
+        transcriber._model_last_used = time.monotonic() - 600
+        assert not transcriber.release_model_if_idle()
+        assert transcriber._model is not None
+
+
+@pytest.mark.parametrize('rss_mb, unloaded', [(300, True), (100, False)])
+def test_model_is_unloaded_after_use_when_rss_is_over_budget(make_transcriber, monkeypatch, rss_mb, unloaded):
+    transcriber = make_transcriber(rss_budget_mb=200)
+    monkeypatch.setattr(stereo, 'current_rss_bytes', lambda: rss_mb * 1024 * 1024)
+
+    _use(transcriber)
+
+    assert (transcriber._model is None) is unloaded
+
+
+def test_without_ttl_and_budget_model_stays_loaded(make_transcriber):
+    transcriber = make_transcriber()
+    _use(transcriber)
+    transcriber._model_last_used = time.monotonic() - 10 ** 6
+
+    assert not transcriber.release_model_if_idle()
+    assert transcriber._model is not None
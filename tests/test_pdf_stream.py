@@ -0,0 +1,57 @@
+from unittest import mock
+
+import pytest
+
+from integrations.transcription import pdf_stream
+from integrations.transcription.pdf_stream import render_streaming_pdf
+
+
+def _rows(count: int, words: int = 5) -> list[dict]:
+    return [
+        {'channel': 'left' if index % 2 else 'right', 'speaker': 'SPEAKER', 'text': ' '.join(['word'] * words)}
+        for index in range(count)
+    ]
+
+
+def _render(tmp_path, rows: list[dict], **kwargs):
+    drawn = []
+    original = pdf_stream._draw_bubble
+
+    def record(canvas, font_name, row, lines, top, height):
+        drawn.append((row, len(lines), top, height))
+        original(canvas, font_name, row, lines, top, height)
+
+    with mock.patch.object(pdf_stream, '_draw_bubble', side_effect=record):
+        result = render_streaming_pdf(tmp_path / 'chat.pdf', 'call.wav', rows, total_rows=len(rows), font_name='Helvetica', **kwargs)
+    return result, drawn
+
+
+def test_every_bubble_stays_above_bottom_margin(tmp_path):
+    result, drawn = _render(tmp_path, _rows(200))
+
+    assert result.rows_written == 200 and not result.truncated and result.pages > 1
+    assert all(top - height >= pdf_stream._MARGIN_BOTTOM for _, _, top, height in drawn)
+
+
+def test_bubble_taller_than_page_is_split_across_pages(tmp_path):
+    rows = _rows(1) + _rows(1, words=3000) + _rows(1)
+    total_lines = len(pdf_stream._BubbleMeasurer('Helvetica').wrap(rows[1]['text']))
+
+    result, drawn = _render(tmp_path, rows)
+
+    parts = [(lines, top, height) for row, lines, top, height in drawn if row is rows[1]]
+    assert len(parts) > 1
+    assert sum(lines for lines, _, _ in parts) == total_lines
+    assert all(top - height >= pdf_stream._MARGIN_BOTTOM for _, top, height in parts)
+    assert result.rows_written == 3 and result.pages >= len(parts)
+    assert (tmp_path / 'chat.pdf').stat().st_size > 0
+
+
+@pytest.mark.parametrize('words', [5, 3000])
+def test_page_cap_truncates_and_leaves_room_for_trailer(tmp_path, words):
+    result, drawn = _render(tmp_path, _rows(300, words=words), max_pages=2, trailer_text='{written} of {total}')
+
+    assert result.truncated and result.pages == 2 and result.rows_written < 300
+    # Последний пузырь не залезает на место пометки о продолжении
+    _, _, top, height = drawn[-1]
+    assert top - height >= pdf_stream._MARGIN_BOTTOM + pdf_stream._TRAILER_HEIGHT
@@ -0,0 +1,119 @@
+import asyncio
+import random
+import time
+from types import SimpleNamespace
+from unittest import mock
+
+import pytest
+from telegram.error import RetryAfter
+
+from integrations.telegram import sender
+from services import delivery_service, retry_policy
+from services.delivery_service import DeliveryHub
+from services.retry_policy import jittered_backoff_delay
+
+
+def _run_drainer(outcomes: list[bool], flood_wait: float = 0.0) -> list[float]:
+    """Прогоняет run_queue_drainer по сценарию исходов разбора и возвращает задержки между попытками."""
+    delays = []
+
+    async def scenario():
+        hub = DeliveryHub.__new__(DeliveryHub)
+        hub._telegram_app = object()
+        hub._telegram_queue = ['item']
+        hub._telegram_queue_wakeup = asyncio.Event()
+        script = iter(outcomes)
+
+        async def drain():
+            outcome = next(script, None)
+            if outcome is None:
+                hub._telegram_queue.clear()
+                return True
+            return outcome
+
+        async def fake_sleep(delay):
+            delays.append(delay)
+            await asyncio.sleep(0)
+
+        hub._drain_pending_telegram_messages = drain
+        with mock.patch.object(delivery_service, 'asyncio', SimpleNamespace(sleep=fake_sleep)), \
+                mock.patch.object(delivery_service, 'telegram_flood_wait_remaining', return_value=flood_wait):
+            task = asyncio.create_task(hub.run_queue_drainer())
+            hub._telegram_queue_wakeup.set()
+            while hub._telegram_queue:
+                await asyncio.sleep(0)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    # Джиттер убран: берётся верхняя граница интервала
+    with mock.patch.object(retry_policy.random, 'uniform', side_effect=lambda low, high: high):
+        asyncio.run(scenario())
+    return delays
+
+
+def test_backoff_doubles_up_to_cap():
+    delays = _run_drainer([False] * 10)
+
+    assert delays == [2.0, 4.0, 8.0, 16.0, 32.0, 64.0, 128.0, 256.0, 300.0, 300.0]
+
+
+def test_backoff_resets_after_successful_drain():
+    delays = _run_drainer([False, False, False, True, False, False])
+
+    assert delays == [2.0, 4.0, 8.0, 2.0, 4.0]
+
+
+def test_backoff_never_shorter_than_flood_wait():
+    delays = _run_drainer([False, False], flood_wait=30.0)
+
+    assert delays == [30.0, 30.0]
+
+
+def test_jitter_stays_within_half_to_full_ceiling():
+    random.seed(1)
+    for attempt in range(1, 12):
+        ceiling = min(300.0, 2.0 * 2 ** (attempt - 1))
+        assert ceiling / 2 <= jittered_backoff_delay(attempt) <= ceiling
+
+
+class _Bot:
+    def __init__(self, errors: list[Exception] | None = None):
+        self.errors = list(errors or [])
+        self.sent = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        if self.errors:
+            raise self.errors.pop(0)
+        self.sent.append((chat_id, text))
+        return SimpleNamespace(message_id=len(self.sent))
+
+
+def test_retry_after_in_one_chat_pauses_all_chats(monkeypatch):
+    monkeypatch.setattr(sender, '_flood_wait_until', 0.0)
+    app = SimpleNamespace(bot=_Bot([RetryAfter(60)]))
+
+    first = asyncio.run(sender.send_tg_text_direct(app, 1, 'one', retry_delays=[0]))
+    second = asyncio.run(sender.send_tg_text_direct(app, 2, 'two', retry_delays=[0]))
+
+    assert not first[0] and first[1].startswith('RetryAfter')
+    # Второй чат не обращается к API, пока действует пауза, и сразу отдаёт retryable-ошибку для очереди
+    assert not second[0] and retry_policy.is_retryable_telegram_error(second[1])
+    assert app.bot.sent == []
+    assert sender.telegram_flood_wait_remaining() > 50
+
+
+def test_short_flood_wait_is_slept_inline(monkeypatch):
+    monkeypatch.setattr(sender, '_flood_wait_until', time.monotonic() + 2.0)
+    slept = []
+
+    async def fake_sleep(delay):
+        slept.append(delay)
+
+    monkeypatch.setattr(sender, 'asyncio', SimpleNamespace(sleep=fake_sleep))
+    app = SimpleNamespace(bot=_Bot())
+
+    delivered, _ = asyncio.run(sender.send_tg_text_direct(app, 2, 'two', retry_delays=[0]))
+
+    assert delivered and app.bot.sent == [(2, 'two')]
+    assert len(slept) == 1 and 0 < slept[0] <= 2.0
@@ -0,0 +1,132 @@
+import json
+
+from domain.models import ResponseItem
+from integrations.telegram.queue_store import TelegramQueueJournal
+
+
+def _text(value: str) -> ResponseItem:
+    return ResponseItem(kind='text', text=value)
+
+
+def _texts(journal: TelegramQueueJournal) -> list[str]:
+    return [queued.item.text for queued in journal.pending()]
+
+
+def test_replay_restores_unacked_items_in_order(tmp_path):
+    path = tmp_path / 'tg.queue'
+    journal = TelegramQueueJournal(path)
+    first = journal.append(1, _text('one'), 'timeout')
+    journal.append(2, _text('two'), None)
+    journal.append(1, _text('three'), None)
+    journal.ack(first.entry_id)
+    journal.close()
+
+    restored = TelegramQueueJournal(path)
+    queue = restored.load()
+
+    assert [(queued.chat_id, queued.item.text) for queued in queue] == [(2, 'two'), (1, 'three')]
+    # Новые записи не переиспользуют номера из журнала
+    assert restored.append(3, _text('four'), None).entry_id == 4
+
+
+def test_torn_last_line_is_skipped_and_next_record_starts_on_new_line(tmp_path):
+    path = tmp_path / 'tg.queue'
+    journal = TelegramQueueJournal(path)
+    journal.append(1, _text('one'), None)
+    journal.close()
+    with path.open('a', encoding='utf-8') as f:
+        f.write('{"op": "enqueue", "id": 2, "chat_')
+
+    restored = TelegramQueueJournal(path)
+    assert [queued.item.text for queued in restored.load()] == ['one']
+    restored.append(1, _text('two'), None)
+    restored.close()
+
+    assert _texts(_loaded(path)) == ['one', 'two']
+
+
+def test_legacy_text_queue_is_converted_to_journal(tmp_path):
+    path = tmp_path / 'tg.queue'
+    path.write_text(
+        '--- 2024-01-01T10:00:00 ---\nchat_id=5\nlast_error=boom\nfirst line\nsecond line\n'
+        '--- 2024-01-01T10:01:00 ---\nchat_id=6\nhello\n',
+        encoding='utf-8',
+    )
+
+    journal = _loaded(path)
+
+    assert [(queued.chat_id, queued.item.text) for queued in journal.pending()] == [(5, 'first line\nsecond line'), (6, 'hello')]
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [(record['op'], record['id']) for record in records] == [('enqueue', 1), ('enqueue', 2)]
+
+
+def test_legacy_json_lines_are_converted_to_journal(tmp_path):
+    path = tmp_path / 'tg.queue'
+    path.write_text(json.dumps({'chat_id': 7, 'item': {'kind': 'text', 'text': 'hi'}}) + '\n', encoding='utf-8')
+
+    journal = _loaded(path)
+
+    assert _texts(journal) == ['hi']
+    assert json.loads(path.read_text(encoding='utf-8'))['op'] == 'enqueue'
+
+
+def test_compaction_keeps_only_live_items(tmp_path):
+    path = tmp_path / 'tg.queue'
+    journal = TelegramQueueJournal(path, compact_min_records=4)
+    queued = [journal.append(1, _text(str(index)), None) for index in range(6)]
+    for item in queued[:5]:
+        journal.ack(item.entry_id)
+
+    # 11 строк журнала: 6 постановок и 5 подтверждений при одной живой записи
+    assert journal.needs_compaction()
+    assert journal.compact() == 10
+    assert not journal.needs_compaction()
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 1
+
+    journal.append(1, _text('6'), None)
+    journal.close()
+    assert _texts(_loaded(path)) == ['5', '6']
+
+
+def test_compaction_waits_for_enough_dead_records(tmp_path):
+    journal = TelegramQueueJournal(tmp_path / 'tg.queue', compact_min_records=4)
+    queued = [journal.append(1, _text(str(index)), None) for index in range(3)]
+    journal.ack(queued[0].entry_id)
+
+    # Мёртвых строк (2) меньше порога и не больше живых
+    assert not journal.needs_compaction()
+    journal.close()
+
+
+def test_acking_everything_removes_file_on_compaction(tmp_path):
+    path = tmp_path / 'tg.queue'
+    journal = TelegramQueueJournal(path)
+    journal.ack(journal.append(1, _text('one'), None).entry_id)
+
+    journal.compact()
+
+    assert not path.exists() and len(journal) == 0
+    assert _loaded(path).pending() == []
+
+
+def _loaded(path) -> TelegramQueueJournal:
+    journal = TelegramQueueJournal(path)
+    journal.load()
+    return journal
+
+
+def test_pending_is_served_from_memory_after_load(tmp_path, monkeypatch):
+    path = tmp_path / 'tg.queue'
+    journal = TelegramQueueJournal(path)
+    first = journal.append(1, _text('one'), None)
+    journal.append(1, _text('two'), None)
+
+    def fail(*args, **kwargs):
+        raise AssertionError('queue file read after load')
+
+    monkeypatch.setattr(type(path), 'read_text', fail)
+    journal.ack(first.entry_id)
+
+    assert len(journal) == 1 and _texts(journal) == ['two']
+    assert [queued.item.text for queued in journal.load()] == ['two']
+    journal.close()
@@ -0,0 +1,103 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from domain.models import ResponseItem
+from integrations.telegram import rate_limit, sender
+from integrations.telegram.rate_limit import TelegramRateLimiter, TokenBucket
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Подменяет часы и asyncio.sleep только в rate_limit: сон сдвигает часы, а не ждёт."""
+    clock = SimpleNamespace(now=1000.0, slept=[])
+
+    async def sleep(seconds):
+        clock.slept.append(seconds)
+        clock.now += seconds
+
+    monkeypatch.setattr(rate_limit, 'time', SimpleNamespace(monotonic=lambda: clock.now))
+    monkeypatch.setattr(rate_limit, 'asyncio', SimpleNamespace(sleep=sleep))
+    return clock
+
+
+def test_burst_up_to_capacity_then_waits_in_turn(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3.0)
+
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Каждый следующий ждёт на 1/rate дольше предыдущего: баланс уходит в минус
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.5, 1.0, 1.5])
+
+
+def test_refill_is_capped_by_capacity(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2.0)
+    bucket.reserve(2.0)
+
+    clock.now += 1.0
+    assert bucket.reserve() == 0.0
+    assert bucket.reserve() == pytest.approx(1.0)
+
+    clock.now += 100.0
+    assert [bucket.reserve() for _ in range(3)] == pytest.approx([0.0, 0.0, 1.0])
+
+
+def test_acquire_sleeps_for_reserved_wait(clock):
+    bucket = TokenBucket(rate=4.0, capacity=1.0)
+
+    async def scenario():
+        return [await bucket.acquire() for _ in range(3)]
+
+    # Сон сдвигает часы, поэтому каждый следующий ждёт ровно 1/rate
+    assert asyncio.run(scenario()) == pytest.approx([0.0, 0.25, 0.25])
+    assert clock.slept == pytest.approx([0.25, 0.25])
+
+
+@pytest.mark.parametrize('chat_id, expected_wait', [(42, 1.0), (-100, 3.0)])
+def test_limiter_uses_group_rate_for_negative_chat_ids(clock, chat_id, expected_wait):
+    limiter = TelegramRateLimiter(global_rate=1000.0, chat_rate=1.0, group_rate_per_minute=20.0)
+
+    async def waits() -> list[float]:
+        return [await limiter.acquire(chat_id) for _ in range(4)]
+
+    # Всплеск из трёх сообщений бесплатный, четвёртое ждёт 1 с в личном чате и 3 с в группе
+    assert asyncio.run(waits()) == pytest.approx([0.0, 0.0, 0.0, expected_wait])
+
+
+def test_limiter_global_bucket_is_shared_between_chats(clock):
+    limiter = TelegramRateLimiter(global_rate=2.0, chat_rate=1.0)
+
+    async def waits() -> list[float]:
+        return [await limiter.acquire(chat_id) for chat_id in (1, 2, 3)]
+
+    assert asyncio.run(waits()) == pytest.approx([0.0, 0.0, 0.5])
+
+
+def test_cost_above_chat_burst_waits_at_most_for_full_bucket(clock):
+    limiter = TelegramRateLimiter(global_rate=1000.0, chat_rate=1.0)
+
+    async def waits() -> list[float]:
+        return [await limiter.acquire(42, 10), await limiter.acquire(42)]
+
+    # Группа из 10 документов — один вызов API: он не ждёт 7 с, а просто опустошает ведро
+    assert asyncio.run(waits()) == pytest.approx([0.0, 1.0])
+
+
+def test_long_text_takes_one_token_per_chunk(clock, monkeypatch):
+    monkeypatch.setattr(sender, '_flood_wait_until', 0.0)
+    limiter = TelegramRateLimiter(global_rate=1000.0, chat_rate=1.0)
+    sent_at = []
+
+    async def send_message(**kwargs):
+        sent_at.append(clock.now)
+        return SimpleNamespace(message_id=len(sent_at))
+
+    app = SimpleNamespace(bot=SimpleNamespace(send_message=send_message))
+    item = ResponseItem(kind='text', text='\n'.join(['x' * 3000] * 5))
+
+    async def send():
+        return await sender.send_tg_item_direct(app, 42, item, retry_delays=[0], throttle=lambda cost: limiter.acquire(42, cost))
+
+    assert asyncio.run(send()) == (True, None)
+    # Три части уходят всплеском, остальные — по одной в секунду
+    assert [at - 1000.0 for at in sent_at] == pytest.approx([0.0, 0.0, 0.0, 1.0, 2.0])
@@ -0,0 +1,86 @@
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from integrations.transcription.audio import WHISPER_SAMPLE_RATE, compact_speech, detect_speech_regions
+from integrations.transcription.stereo import map_segment_times
+
+SR = WHISPER_SAMPLE_RATE
+
+
+def _recording(parts: list[tuple[str, float]]) -> np.ndarray:
+    """Тихий шум и «речь» — низкочастотные тоны с малым числом переходов через ноль."""
+    rng = np.random.default_rng(0)
+    chunks = []
+    for kind, seconds in parts:
+        t = np.arange(int(seconds * SR)) / SR
+        if kind == 'speech':
+            chunks.append(0.3 * np.sin(2 * np.pi * 220 * t) + 0.2 * np.sin(2 * np.pi * 470 * t))
+        else:
+            chunks.append(rng.standard_normal(t.size) * 1e-4)
+    return np.concatenate(chunks).astype(np.float32)
+
+
+def test_detects_speech_regions_with_padding():
+    samples = _recording([('silence', 2.0), ('speech', 1.0), ('silence', 3.0), ('speech', 1.5), ('silence', 2.0)])
+
+    regions = detect_speech_regions(samples) / SR
+
+    assert regions.shape == (2, 2)
+    # Границы расширены примерно на 300 мс в обе стороны
+    assert regions[0] == pytest.approx([1.7, 3.3], abs=0.05)
+    assert regions[1] == pytest.approx([6.0 - 0.3, 7.5 + 0.3], abs=0.05)
+
+
+def test_short_pause_does_not_split_a_region():
+    samples = _recording([('silence', 2.0), ('speech', 1.0), ('silence', 0.5), ('speech', 1.0), ('silence', 2.0)])
+    assert len(detect_speech_regions(samples)) == 1
+
+
+def test_silence_only_has_no_regions():
+    assert detect_speech_regions(_recording([('silence', 5.0)])).shape == (0, 2)
+
+
+def test_compact_speech_keeps_regions_and_inserts_separators():
+    samples = np.arange(10 * SR, dtype=np.float32)
+    regions = np.array([[1 * SR, 2 * SR], [5 * SR, 7 * SR]])
+
+    compact, timeline = compact_speech(samples, regions, separator_ms=400)
+
+    separator = int(0.4 * SR)
+    assert compact.size == 3 * SR + separator
+    assert np.array_equal(compact[:SR], samples[SR:2 * SR])
+    assert not compact[SR:SR + separator].any()
+    assert np.array_equal(compact[SR + separator:], samples[5 * SR:7 * SR])
+    assert timeline.speech_seconds == pytest.approx(3.0)
+
+
+@pytest.mark.parametrize('compact_seconds, original_seconds', [
+    (0.0, 1.0),
+    (0.5, 1.5),
+    # Внутри вставленной паузы время прижимается к концу участка
+    (1.2, 2.0),
+    (1.4, 5.0),
+    (2.4, 6.0),
+])
+def test_timeline_maps_compact_time_to_original(compact_seconds, original_seconds):
+    regions = np.array([[1 * SR, 2 * SR], [5 * SR, 7 * SR]])
+    _, timeline = compact_speech(np.zeros(10 * SR, dtype=np.float32), regions, separator_ms=400)
+
+    assert timeline.to_original(compact_seconds) == pytest.approx(original_seconds)
+
+
+def test_segment_and_word_times_are_remapped_to_original_recording():
+    regions = np.array([[1 * SR, 2 * SR], [5 * SR, 7 * SR]])
+    _, timeline = compact_speech(np.zeros(10 * SR, dtype=np.float32), regions, separator_ms=400)
+    words = [SimpleNamespace(word=' да', start=0.2, end=0.6), SimpleNamespace(word=' нет', start=1.5, end=2.0)]
+    segment = SimpleNamespace(start=0.2, end=2.0, text=' да нет', words=words)
+
+    remapped = map_segment_times(segment, timeline.to_original)
+
+    assert (remapped.start, remapped.end, remapped.text) == (pytest.approx(1.2), pytest.approx(5.6), ' да нет')
+    assert [(word.start, word.end) for word in remapped.words] == [
+        (pytest.approx(1.2), pytest.approx(1.6)),
+        (pytest.approx(5.1), pytest.approx(5.6)),
+    ]
@@ -0,0 +1,124 @@
+import asyncio
+from types import SimpleNamespace
+
+from integrations.transcription.speculative import SpeculativeTranscriber
+from integrations.transcription.stereo import StereoCallTranscriber
+
+
+class _Inner:
+    """Распознаёт запись по команде теста: строки и окончание выдаются через события."""
+
+    def __init__(self):
+        self.calls: list[str] = []
+        self.speculative: list[bool] = []
+        self.emit: dict[str, object] = {}
+        self.release: dict[str, asyncio.Event] = {}
+
+    def is_enabled(self):
+        return True
+
+    async def transcribe_recording(self, wav_path, on_rows=None, on_full_quality=None, speculative=False):
+        self.calls.append(wav_path)
+        self.speculative.append(speculative)
+        self.emit[wav_path] = on_rows
+        release = self.release.setdefault(wav_path, asyncio.Event())
+        await release.wait()
+        return {'path': wav_path}
+
+
+async def _settle() -> None:
+    for _ in range(5):
+        await asyncio.sleep(0)
+
+
+def test_claim_replays_early_rows_and_forwards_later_ones():
+    async def scenario():
+        inner = _Inner()
+        speculative = SpeculativeTranscriber(inner)
+        assert speculative.start('/rec/call-1.wav')
+        await _settle()
+        inner.emit['/rec/call-1.wav']([{'text': 'раз'}])
+
+        received = []
+        claim = asyncio.create_task(speculative.transcribe_recording('/rec/call-1.wav', on_rows=received.extend))
+        await _settle()
+        inner.emit['/rec/call-1.wav']([{'text': 'два'}])
+        inner.release['/rec/call-1.wav'].set()
+        result = await claim
+        return inner, speculative, received, result
+
+    inner, speculative, received, result = asyncio.run(scenario())
+
+    assert result == {'path': '/rec/call-1.wav'}
+    assert received == [{'text': 'раз'}, {'text': 'два'}]
+    assert inner.calls == ['/rec/call-1.wav'] and inner.speculative == [True]
+    # Повторное закрытие уже обработанной записи не запускает распознавание снова
+    assert not speculative.start('/rec/call-1.wav')
+
+
+def test_unclaimed_result_expires_by_timer():
+    async def scenario():
+        inner = _Inner()
+        speculative = SpeculativeTranscriber(inner, ttl_seconds=0.01)
+        speculative.start('/rec/call-1.wav')
+        await _settle()
+        inner.release['/rec/call-1.wav'].set()
+        await asyncio.sleep(0.1)
+        expired = not speculative._jobs
+        await speculative.transcribe_recording('/rec/call-1.wav')
+        return inner, expired
+
+    inner, expired = asyncio.run(scenario())
+
+    assert expired
+    # Просроченный результат не используется: запись распознаётся заново, уже не спекулятивно
+    assert inner.speculative == [True, False]
+
+
+def test_concurrent_speculative_jobs_are_capped():
+    async def scenario():
+        inner = _Inner()
+        speculative = SpeculativeTranscriber(inner, max_jobs=2)
+        started = [speculative.start(f'/rec/call-{index}.wav') for index in range(3)]
+        await _settle()
+        inner.release['/rec/call-0.wav'].set()
+        await _settle()
+        started.append(speculative.start('/rec/call-2.wav'))
+        return started
+
+    assert asyncio.run(scenario()) == [True, True, False, True]
+
+
+def test_speculative_work_is_not_counted_as_backlog(tmp_path):
+    wav = tmp_path / 'call.wav'
+    wav.write_bytes(b'')
+    transcriber = StereoCallTranscriber.__new__(StereoCallTranscriber)
+    transcriber.config = SimpleNamespace(
+        CALL_TRANSCRIBE_ENABLED=True,
+        CALL_TRANSCRIBE_FAST_MODEL='base',
+        CALL_TRANSCRIBE_FAST_BEAM_SIZE=1,
+        CALL_TRANSCRIBE_FAST_BACKLOG=1,
+        CALL_TRANSCRIBE_FAST_LONG_SECONDS=0,
+        CALL_TRANSCRIBE_MODEL='small',
+        CALL_TRANSCRIBE_BEAM_SIZE=5,
+        CALL_TRANSCRIBE_FULL_QUALITY_RERUN=False,
+    )
+    transcriber._backlog_source = None
+    transcriber._in_flight = 0
+    seen = []
+
+    async def transcribe_serialized(path, on_rows=None, fast=False):
+        seen.append(transcriber.backlog())
+        return {}
+
+    transcriber._transcribe_serialized = transcribe_serialized
+
+    async def scenario():
+        speculative = await transcriber.transcribe_recording(str(wav), speculative=True)
+        regular = await transcriber.transcribe_recording(str(wav))
+        return speculative, regular
+
+    speculative, regular = asyncio.run(scenario())
+
+    assert seen == [0, 1]
+    assert speculative['quality']['name'] == regular['quality']['name'] == 'full'
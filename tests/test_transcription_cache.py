@@ -0,0 +1,84 @@
+import os
+from pathlib import Path
+
+import pytest
+
+from integrations.transcription.bench import write_synthetic_stereo_wav
+from integrations.transcription.cache import TranscriptionCache
+from integrations.transcription.cli import build_cli_config, parse_args
+from integrations.transcription.stereo import StereoCallTranscriber
+
+
+def _config(tmp_path: Path, *extra: str):
+    return build_cli_config(parse_args(['call.wav', '--cache-dir', str(tmp_path), *extra]))
+
+
+@pytest.fixture
+def wav_path(tmp_path: Path) -> Path:
+    return write_synthetic_stereo_wav(tmp_path / 'call.wav', 2.0)
+
+
+def _key(tmp_path: Path, wav_path: Path, *extra: str) -> str:
+    transcriber = StereoCallTranscriber(_config(tmp_path, *extra))
+    return transcriber._cache.key_for(wav_path, transcriber._cache_params())
+
+
+def test_key_is_stable_for_identical_settings(tmp_path, wav_path):
+    assert _key(tmp_path, wav_path) == _key(tmp_path, wav_path)
+
+
+@pytest.mark.parametrize('extra', [
+    ('--model', 'tiny'),
+    ('--beam-size', '1'),
+    ('--compute-type', 'float32'),
+    ('--silence-trim',),
+    ('--batched',),
+    ('--window-seconds', '60'),
+    ('--left-label', 'CALLER'),
+])
+def test_key_changes_with_settings(tmp_path, wav_path, extra):
+    assert _key(tmp_path, wav_path) != _key(tmp_path, wav_path, *extra)
+
+
+@pytest.mark.parametrize('extra', [
+    ('--cpu-threads', '2'),
+    ('--num-workers', '2'),
+    ('--parallel-channels',),
+    ('--window-workers', '2'),
+])
+def test_key_ignores_scheduling_settings(tmp_path, wav_path, extra):
+    assert _key(tmp_path, wav_path) == _key(tmp_path, wav_path, *extra)
+
+
+def test_cli_cache_dir_defaults_to_bot_artifacts_dir():
+    from bootstrap.config import CONFIG
+
+    assert Path(parse_args(['call.wav']).cache_dir) == CONFIG.CALL_TRANSCRIBE_ARTIFACTS_DIR
+
+
+def test_key_changes_with_batch_size_only_when_batched(tmp_path, wav_path):
+    assert _key(tmp_path, wav_path, '--batched', '--batch-size', '4') != _key(tmp_path, wav_path, '--batched', '--batch-size', '16')
+    assert _key(tmp_path, wav_path, '--batch-size', '4') == _key(tmp_path, wav_path, '--batch-size', '16')
+
+
+def test_key_changes_with_recording_content(tmp_path, wav_path):
+    other = write_synthetic_stereo_wav(tmp_path / 'other.wav', 3.0)
+    assert _key(tmp_path, wav_path) != _key(tmp_path, other)
+
+
+def test_no_cache_disables_cache(tmp_path):
+    assert StereoCallTranscriber(_config(tmp_path, '--no-cache'))._cache is None
+
+
+def test_put_get_and_lru_eviction(tmp_path):
+    cache = TranscriptionCache(tmp_path / 'cache', max_bytes=300)
+    cache.put('a' * 64, {'conversation': ['x' * 100]})
+    cache.put('b' * 64, {'conversation': ['y' * 100]})
+    os.utime(cache._path_for('a' * 64), (1000, 1000))
+    os.utime(cache._path_for('b' * 64), (2000, 2000))
+    # Чтение обновляет mtime: теперь давно использованной становится b
+    assert cache.get('a' * 64) == {'conversation': ['x' * 100]}
+    cache.put('c' * 64, {'conversation': ['z' * 100]})
+    assert cache.get('b' * 64) is None
+    assert cache.get('a' * 64) is not None
+    assert cache.get('c' * 64) is not None
@@ -0,0 +1,60 @@
+import asyncio
+from types import SimpleNamespace
+from unittest import mock
+
+from integrations.transcription.pdf import TranscriptionPdfRenderer
+
+
+def _renderer(tmp_path) -> TranscriptionPdfRenderer:
+    config = SimpleNamespace(
+        CALL_TRANSCRIBE_ARTIFACTS_DIR=str(tmp_path / 'artifacts'),
+        CALL_TRANSCRIBE_PDF_STREAMING_ROWS=0,
+        CALL_TRANSCRIBE_PDF_MAX_PAGES=0,
+    )
+    return TranscriptionPdfRenderer(config)
+
+
+def _conversation(*texts: str) -> list[dict]:
+    return [
+        {'channel': 'left' if index % 2 else 'right', 'speaker': 'SPEAKER', 'start_hms': '00:00:00', 'end_hms': '00:00:01', 'text': text}
+        for index, text in enumerate(texts)
+    ]
+
+
+def test_same_conversation_reuses_hash_named_pdf(tmp_path):
+    renderer = _renderer(tmp_path)
+    conversation = _conversation('Алло', 'Добрый день')
+
+    pdf_path, pdf_name = renderer.render_for_recording('/rec/call-1.wav', conversation)
+    with mock.patch.object(renderer, '_build_pdf') as build:
+        again_path, again_name = renderer.render_for_recording('/rec/call-1.wav', conversation)
+
+    build.assert_not_called()
+    assert again_path == pdf_path and again_name == pdf_name == 'call-1-transcription.pdf'
+    assert pdf_path.startswith(str(tmp_path / 'artifacts' / 'call-1-transcription-'))
+
+
+def test_changed_conversation_gets_new_pdf(tmp_path):
+    renderer = _renderer(tmp_path)
+
+    first, _ = renderer.render_for_recording('/rec/call-1.wav', _conversation('Алло'))
+    second, _ = renderer.render_for_recording('/rec/call-1.wav', _conversation('Алло', 'Слушаю'))
+
+    assert first != second
+    assert sorted(p.name for p in (tmp_path / 'artifacts').iterdir()) == sorted([first.rsplit('/', 1)[1], second.rsplit('/', 1)[1]])
+
+
+def test_empty_conversation_renders_nothing(tmp_path):
+    renderer = _renderer(tmp_path)
+
+    assert renderer.render_for_recording('/rec/call-1.wav', _conversation('', '   ')) == (None, None)
+    assert renderer.render_for_recording('/rec/call-1.wav', None) == (None, None)
+
+
+def test_async_render_matches_sync(tmp_path):
+    renderer = _renderer(tmp_path)
+    conversation = _conversation('Алло')
+
+    async_result = asyncio.run(renderer.render_for_recording_async('/rec/call-1.wav', conversation))
+
+    assert async_result == renderer.render_for_recording('/rec/call-1.wav', conversation)
@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+from services.event_router import _PROGRESS_PLACEHOLDER, _PROGRESS_TEXT_LIMIT, _TranscriptionProgress
+
+
+class _Delivery:
+    def __init__(self, message=(1, 10)):
+        self.message = message
+        self.edits: list[str] = []
+
+    async def send_telegram_progress(self, receipt, text):
+        return self.message
+
+    async def edit_telegram_text(self, chat_id, message_id, text):
+        self.edits.append(text)
+        return True
+
+
+def _row(index: int) -> dict:
+    return {
+        'speaker': 'SPEAKER_1',
+        'channel': 'left',
+        'start_hms': f'00:00:{index:02d}.000',
+        'end_hms': f'00:00:{index:02d}.500',
+        'text': f'фраза {index}',
+    }
+
+
+def test_edits_are_throttled_to_one_per_interval():
+    delivery = _Delivery()
+    interval = 0.05
+
+    async def scenario():
+        progress = _TranscriptionProgress(delivery, [], interval)
+        await progress.start(receipt=None)
+        started = time.monotonic()
+        for index in range(40):
+            progress.add_rows([_row(index)])
+            await asyncio.sleep(0.005)
+        elapsed = time.monotonic() - started
+        progress.stop()
+        return elapsed
+
+    elapsed = asyncio.run(scenario())
+
+    # 40 пачек строк, но правок сообщения — не больше одной за интервал
+    assert 1 <= len(delivery.edits) <= elapsed / interval + 1
+    assert all(edit.startswith(_PROGRESS_PLACEHOLDER) for edit in delivery.edits)
+    assert 'фраза 0' in delivery.edits[-1]
+
+
+def test_unchanged_text_is_not_edited_again():
+    delivery = _Delivery()
+
+    async def scenario():
+        progress = _TranscriptionProgress(delivery, [], 0.01)
+        await progress.start(receipt=None)
+        progress.add_rows([_row(0)])
+        await asyncio.sleep(0.1)
+        progress.stop()
+
+    asyncio.run(scenario())
+
+    assert len(delivery.edits) == 1
+
+
+def test_finish_replaces_progress_with_final_text():
+    delivery = _Delivery()
+
+    async def scenario():
+        progress = _TranscriptionProgress(delivery, [], 60)
+        await progress.start(receipt=None)
+        short = await progress.finish('итог')
+        long = await progress.finish('x' * (_PROGRESS_TEXT_LIMIT + 1))
+        return short, long
+
+    short, long = asyncio.run(scenario())
+
+    assert short is True and long is False
+    # Длинный итог не помещается в правку: сообщение указывает на отдельное сообщение с текстом
+    assert delivery.edits[0] == 'итог' and 'ниже' in delivery.edits[1]
+
+
+def test_without_progress_message_final_text_is_sent_separately():
+    delivery = _Delivery(message=None)
+
+    async def scenario():
+        progress = _TranscriptionProgress(delivery, [], 0.01)
+        await progress.start(receipt=None)
+        progress.add_rows([_row(0)])
+        await asyncio.sleep(0.05)
+        return await progress.finish('итог')
+
+    assert asyncio.run(scenario()) is False
+    assert delivery.edits == []
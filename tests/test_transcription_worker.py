@@ -0,0 +1,78 @@
+import asyncio
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from integrations.transcription import worker
+from integrations.transcription.worker import TranscriptionWorkerClient, TranscriptionWorkerError
+
+# Процесс с тем же протоколом, что и run_worker, но без модели: "crash" роняет процесс,
+# "hang" не отвечает, остальное возвращает pid процесса
+_FAKE_WORKER = '''
+import json, os, sys
+for line in sys.stdin:
+    request = json.loads(line)
+    if request.get('op') == 'init':
+        continue
+    if request.get('wav_path') == 'crash':
+        os._exit(3)
+    if request.get('wav_path') == 'hang':
+        continue
+    print(json.dumps({'id': request['id'], 'event': 'started'}), flush=True)
+    print(json.dumps({'id': request['id'], 'event': 'result', 'payload': {'pid': os.getpid()}}), flush=True)
+'''
+
+
+@pytest.fixture
+def client(monkeypatch, tmp_path):
+    real_exec = asyncio.create_subprocess_exec
+
+    async def fake_exec(*args, **kwargs):
+        return await real_exec(sys.executable, '-c', _FAKE_WORKER, **kwargs)
+
+    monkeypatch.setattr(worker.asyncio, 'create_subprocess_exec', fake_exec)
+    return TranscriptionWorkerClient(SimpleNamespace(CALL_TRANSCRIBE_ARTIFACTS_DIR=tmp_path))
+
+
+def test_worker_is_restarted_after_crash(client):
+    async def scenario():
+        first = await client.request('transcribe', wav_path='a.wav')
+        with pytest.raises(TranscriptionWorkerError, match='exited with code 3'):
+            await client.request('transcribe', wav_path='crash')
+        second = await client.request('transcribe', wav_path='b.wav')
+        await client.close()
+        return first['pid'], second['pid']
+
+    first_pid, second_pid = asyncio.run(scenario())
+
+    assert first_pid != second_pid
+    assert client.restarts == 1
+
+
+def test_crash_fails_every_pending_request(client):
+    async def scenario():
+        waiting = asyncio.create_task(client.request('transcribe', wav_path='hang'))
+        await asyncio.sleep(0.1)
+        with pytest.raises(TranscriptionWorkerError):
+            await client.request('transcribe', wav_path='crash')
+        # Задание, отправленное до падения, не зависает навсегда
+        with pytest.raises(TranscriptionWorkerError, match='exited with code 3'):
+            await asyncio.wait_for(waiting, timeout=5)
+        await client.close()
+
+    asyncio.run(scenario())
+
+
+def test_events_before_result_reach_listener(client):
+    events = []
+
+    async def scenario():
+        payload = await client.request('transcribe', on_event=events.append, wav_path='a.wav')
+        await client.close()
+        return payload
+
+    payload = asyncio.run(scenario())
+
+    assert [event['event'] for event in events] == ['started', 'result']
+    assert payload == events[-1]['payload']
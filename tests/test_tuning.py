@@ -0,0 +1,84 @@
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from integrations.transcription.tuning import TUNED_SETTINGS, apply_tuning_file, read_tuning_file, write_tuning_file
+
+_TUNED = {
+    'CALL_TRANSCRIBE_COMPUTE_TYPE': 'int8_float32',
+    'CALL_TRANSCRIBE_CPU_THREADS': 3,
+    'CALL_TRANSCRIBE_NUM_WORKERS': 2,
+    'CALL_TRANSCRIBE_PARALLEL_CHANNELS': True,
+    'CALL_TRANSCRIBE_BEAM_SIZE': 2,
+}
+
+
+@pytest.fixture(autouse=True)
+def clean_env(monkeypatch):
+    for name in TUNED_SETTINGS:
+        monkeypatch.delenv(name, raising=False)
+
+
+def _config(tuning_file) -> SimpleNamespace:
+    return SimpleNamespace(
+        CALL_TRANSCRIBE_TUNING_FILE=tuning_file,
+        CALL_TRANSCRIBE_MODEL='small',
+        CALL_TRANSCRIBE_DEVICE='cpu',
+        CALL_TRANSCRIBE_COMPUTE_TYPE='int8',
+        CALL_TRANSCRIBE_CPU_THREADS=0,
+        CALL_TRANSCRIBE_NUM_WORKERS=1,
+        CALL_TRANSCRIBE_PARALLEL_CHANNELS=False,
+        CALL_TRANSCRIBE_BEAM_SIZE=5,
+        CALL_TRANSCRIBE_VAD_FILTER=True,
+    )
+
+
+def _write(path, **meta):
+    values = {'model': 'small', 'device': 'cpu', 'cpu_count': os.cpu_count(), 'rtf': 0.2, **meta}
+    return write_tuning_file(path, _TUNED, **values)
+
+
+def test_matching_file_overrides_tuned_settings_only(tmp_path):
+    path = _write(tmp_path / 'tuning.json')
+
+    config = apply_tuning_file(_config(path))
+
+    assert {name: getattr(config, name) for name in TUNED_SETTINGS} == _TUNED
+    assert config.CALL_TRANSCRIBE_VAD_FILTER is True and config.CALL_TRANSCRIBE_MODEL == 'small'
+    # Процесс-воркер и пул окон получают уже применённые значения и файл не перечитывают
+    assert config.CALL_TRANSCRIBE_TUNING_FILE is None
+
+
+@pytest.mark.parametrize('meta', [{'model': 'medium'}, {'device': 'cuda'}, {'cpu_count': (os.cpu_count() or 1) + 1}])
+def test_file_tuned_for_other_machine_or_model_is_ignored(tmp_path, meta):
+    original = _config(_write(tmp_path / 'tuning.json', **meta))
+    assert apply_tuning_file(original) is original
+
+
+def test_explicit_environment_wins_over_file(tmp_path, monkeypatch):
+    monkeypatch.setenv('CALL_TRANSCRIBE_BEAM_SIZE', '5')
+
+    config = apply_tuning_file(_config(_write(tmp_path / 'tuning.json')))
+
+    assert config.CALL_TRANSCRIBE_BEAM_SIZE == 5
+    assert config.CALL_TRANSCRIBE_CPU_THREADS == 3
+
+
+def test_missing_or_broken_file_keeps_config(tmp_path):
+    broken = tmp_path / 'broken.json'
+    broken.write_text('{not json', encoding='utf-8')
+
+    for path in (tmp_path / 'missing.json', broken, None):
+        original = _config(path)
+        assert apply_tuning_file(original) is original
+    assert read_tuning_file(broken) is None
+
+
+def test_written_file_keeps_only_tuned_settings(tmp_path):
+    path = write_tuning_file(tmp_path / 'nested' / 'tuning.json', {**_TUNED, 'CALL_TRANSCRIBE_MODEL': 'tiny'}, model='small')
+
+    document = read_tuning_file(path)
+
+    assert document['model'] == 'small'
+    assert document['settings'] == _TUNED
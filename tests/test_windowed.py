@@ -0,0 +1,97 @@
+import math
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+from integrations.transcription.audio import WHISPER_SAMPLE_RATE
+from integrations.transcription.windowed import Window, plan_windows, stitch_window_segments, vote_language
+
+
+def _speech_with_pauses(seconds: float, pauses: list[float]) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    samples = (rng.standard_normal(int(seconds * WHISPER_SAMPLE_RATE)) * 0.3).astype(np.float32)
+    for pause in pauses:
+        start = int(pause * WHISPER_SAMPLE_RATE)
+        samples[start:start + WHISPER_SAMPLE_RATE // 2] = 0.0
+    return samples
+
+
+def _word(text: str, start: float, end: float) -> SimpleNamespace:
+    return SimpleNamespace(word=text, start=start, end=end)
+
+
+def _segment(*words: SimpleNamespace) -> SimpleNamespace:
+    return SimpleNamespace(start=words[0].start, end=words[-1].end, text=''.join(word.word for word in words), words=list(words))
+
+
+def test_plan_windows_covers_channel_with_overlap():
+    samples = _speech_with_pauses(250.0, [])
+    windows = plan_windows(samples, window_seconds=60.0, overlap_seconds=4.0)
+
+    assert windows[0].start == 0 and windows[-1].end == samples.size
+    assert windows[0].keep_start == -math.inf and windows[-1].keep_end == math.inf
+    for previous, current in zip(windows, windows[1:]):
+        # Зоны окон стыкуются без зазора, а сами окна перекрываются
+        assert previous.keep_end == current.keep_start
+        assert previous.end - current.start == 4 * WHISPER_SAMPLE_RATE
+    # Последнее окно не короче половины номинального
+    assert (windows[-1].end - windows[-2].keep_end * WHISPER_SAMPLE_RATE) >= 30 * WHISPER_SAMPLE_RATE
+
+
+def test_plan_windows_cuts_in_pauses():
+    samples = _speech_with_pauses(130.0, [55.0, 118.0])
+    windows = plan_windows(samples, window_seconds=60.0, overlap_seconds=2.0)
+
+    assert len(windows) == 2
+    assert 55.0 <= windows[0].keep_end <= 55.5
+
+
+def test_plan_windows_keeps_short_channel_in_one_window():
+    windows = plan_windows(_speech_with_pauses(80.0, []), window_seconds=60.0, overlap_seconds=4.0)
+    assert len(windows) == 1
+
+
+def test_stitch_keeps_words_whose_middle_is_in_window_zone():
+    window = Window(start=0, end=0, keep_start=10.0, keep_end=20.0)
+    inside = _segment(_word(' раз', 11.0, 11.5), _word(' два', 12.0, 12.5))
+    across = _segment(_word(' три', 19.0, 19.6), _word(' четыре', 19.8, 20.6))
+    outside = _segment(_word(' пять', 20.5, 21.0))
+
+    stitched = stitch_window_segments([inside, across, outside], window)
+
+    assert stitched[0] is inside
+    assert [word.word for word in stitched[1].words] == [' три']
+    assert (stitched[1].text, stitched[1].start, stitched[1].end) == (' три', 19.0, 19.6)
+    assert len(stitched) == 2
+
+
+def test_stitch_does_not_duplicate_overlap_between_windows():
+    words = [_word(f' w{index}', index * 1.0, index * 1.0 + 0.5) for index in range(10)]
+    first = Window(start=0, end=0, keep_start=-math.inf, keep_end=5.0)
+    second = Window(start=0, end=0, keep_start=5.0, keep_end=math.inf)
+    # Оба окна распознали перекрытие 3–7 с
+    first_segments = [_segment(*words[:7])]
+    second_segments = [_segment(*words[3:])]
+
+    stitched = stitch_window_segments(first_segments, first) + stitch_window_segments(second_segments, second)
+
+    assert [word.word for seg in stitched for word in seg.words] == [word.word for word in words]
+
+
+def test_stitch_segment_without_words_uses_its_middle():
+    window = Window(start=0, end=0, keep_start=0.0, keep_end=10.0)
+    kept = SimpleNamespace(start=8.0, end=11.0, text=' да', words=None)
+    dropped = SimpleNamespace(start=9.0, end=12.0, text=' нет', words=None)
+    assert stitch_window_segments([kept, dropped], window) == [kept]
+
+
+def test_vote_language_ignores_a_noisy_first_window():
+    language, probability = vote_language([(None, None), ('en', 0.4), ('ru', 0.9), ('ru', 0.95)])
+    assert language == 'ru'
+    assert probability == pytest.approx((0.9 + 0.95) / 3)
+
+
+def test_vote_language_without_detections():
+    assert vote_language([(None, None)]) == (None, None)
+    assert vote_language([]) == (None, None)
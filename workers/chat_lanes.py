@@ -0,0 +1,116 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections.abc import Awaitable, Callable, Hashable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _LaneJob:
+    factory: Callable[[], Awaitable[Any]]
+    future: asyncio.Future
+    priority: int
+    enqueued_at: float
+
+
+@dataclass
+class LaneWaitStats:
+    jobs: int = 0
+    total_wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    last_wait_seconds: float = 0.0
+
+    @property
+    def avg_wait_seconds(self) -> float:
+        return self.total_wait_seconds / self.jobs if self.jobs else 0.0
+
+
+class ChatLanes:
+    """
+    Очереди заданий по ключу (чату): задания одного ключа выполняются по одному, разных ключей —
+    параллельно. Внутри ключа первым берётся задание с меньшим priority, при равном — более раннее (FIFO);
+    начатое задание не прерывается. Время ожидания в очереди копится по priority (wait_stats).
+    Воркер ключа создаётся при первом задании и завершается после idle_seconds простоя.
+    """
+
+    def __init__(self, name: str, idle_seconds: float = 60.0):
+        self.name = name
+        self.idle_seconds = idle_seconds
+        self._queues: dict[Hashable, asyncio.PriorityQueue[tuple[int, int, _LaneJob]]] = {}
+        self._tasks: dict[Hashable, asyncio.Task] = {}
+        self._sequence = itertools.count()
+        self._wait_stats: dict[int, LaneWaitStats] = {}
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]], priority: int = 0) -> Any:
+        """Ставит factory() в очередь ключа и ждёт результата."""
+        future = asyncio.get_running_loop().create_future()
+        queue = self._queues.get(key)
+        if queue is None:
+            queue = asyncio.PriorityQueue()
+            self._queues[key] = queue
+            self._tasks[key] = asyncio.create_task(self._worker(key, queue), name=f'{self.name}-lane-{key}')
+        job = _LaneJob(factory=factory, future=future, priority=int(priority), enqueued_at=time.monotonic())
+        queue.put_nowait((job.priority, next(self._sequence), job))
+        return await future
+
+    def wait_stats(self) -> dict[int, LaneWaitStats]:
+        return dict(sorted(self._wait_stats.items()))
+
+    def depth(self) -> int:
+        return sum(queue.qsize() for queue in self._queues.values())
+
+    def lanes(self) -> int:
+        return len(self._queues)
+
+    async def stop(self) -> None:
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._tasks.clear()
+        self._queues.clear()
+
+    async def _worker(self, key: Hashable, queue: asyncio.PriorityQueue[tuple[int, int, _LaneJob]]) -> None:
+        try:
+            while True:
+                try:
+                    _, _, job = await asyncio.wait_for(queue.get(), self.idle_seconds)
+                except asyncio.TimeoutError:
+                    if queue.empty():
+                        return
+                    continue
+                if job.future.cancelled():
+                    continue
+                self._record_wait(job)
+                try:
+                    result = await job.factory()
+                except asyncio.CancelledError:
+                    job.future.cancel()
+                    raise
+                except Exception as exc:
+                    if not job.future.cancelled():
+                        job.future.set_exception(exc)
+                    continue
+                if not job.future.cancelled():
+                    job.future.set_result(result)
+        finally:
+            # Между проверкой пустой очереди и удалением нет await, поэтому новое задание не потеряется
+            if self._queues.get(key) is queue:
+                del self._queues[key]
+                del self._tasks[key]
+            while not queue.empty():
+                _, _, job = queue.get_nowait()
+                if not job.future.done():
+                    job.future.cancel()
+
+    def _record_wait(self, job: _LaneJob) -> None:
+        wait_seconds = time.monotonic() - job.enqueued_at
+        stats = self._wait_stats.setdefault(job.priority, LaneWaitStats())
+        stats.jobs += 1
+        stats.total_wait_seconds += wait_seconds
+        stats.last_wait_seconds = wait_seconds
+        stats.max_wait_seconds = max(stats.max_wait_seconds, wait_seconds)
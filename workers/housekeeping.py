@@ -1 +1,215 @@
-"""Housekeeping hooks (cleanup temp files, rotate local artifacts) can be added here."""
+import asyncio
+import logging
+import os
+import stat as stat_module
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from services.system_ops import bytes2hr
+
+logger = logging.getLogger(__name__)
+
+# Файлы моложе этого возраста не удаляются даже при превышении бюджета: их могут ещё отправлять
+_MIN_AGE_SECONDS = 600.0
+
+
+@dataclass
+class RetentionRule:
+    """
+    Бюджет для файлов каталога (без подкаталогов), подходящих под patterns: сначала удаляются файлы
+    старше max_age_seconds, затем самые давно использованные (по mtime), пока сумма не уложится
+    в max_bytes. Нулевой бюджет не ограничивает.
+    """
+    name: str
+    directory: Path
+    patterns: tuple[str, ...]
+    max_bytes: int = 0
+    max_age_seconds: float = 0.0
+
+
+@dataclass
+class RetentionStats:
+    files: int = 0
+    bytes: int = 0
+    removed_files: int = 0
+    reclaimed_bytes: int = 0
+    last_reclaimed_bytes: int = 0
+    errors: int = 0
+
+
+@dataclass
+class HousekeepingStats:
+    runs: int = 0
+    last_run_at: float | None = None
+    last_run_seconds: float = 0.0
+    rules: dict[str, RetentionStats] = field(default_factory=dict)
+
+    @property
+    def reclaimed_bytes(self) -> int:
+        return sum(stats.reclaimed_bytes for stats in self.rules.values())
+
+
+class Housekeeper:
+    """
+    Периодическая очистка локальных артефактов (PDF и JSON транскрибаций, логи команд в /tmp),
+    чтобы занятое место на SD-карте оставалось ограниченным. Кэш транскрибаций
+    (CALL_TRANSCRIBE_ARTIFACTS_DIR/cache) вытесняется самим TranscriptionCache и здесь не трогается.
+    in_use возвращает пути, которые ещё нужны (вложения сообщений в очереди Telegram): они не удаляются
+    ни по возрасту, ни по бюджету.
+    """
+
+    def __init__(
+        self,
+        rules: list[RetentionRule],
+        interval_seconds: float = 3600.0,
+        min_age_seconds: float = _MIN_AGE_SECONDS,
+        in_use: Callable[[], Iterable[str]] | None = None,
+    ):
+        self.rules = rules
+        self.interval_seconds = interval_seconds
+        self.min_age_seconds = min_age_seconds
+        self.in_use = in_use
+        self._stats = HousekeepingStats(rules={rule.name: RetentionStats() for rule in rules})
+
+    @classmethod
+    def from_config(cls, config, in_use: Callable[[], Iterable[str]] | None = None) -> 'Housekeeper':
+        return cls(
+            [
+                RetentionRule(
+                    name='transcriptions',
+                    directory=Path(config.CALL_TRANSCRIBE_ARTIFACTS_DIR),
+                    patterns=('*.pdf', '*.json', '*.tmp'),
+                    max_bytes=int(config.HOUSEKEEPING_ARTIFACTS_MAX_MB * 1024 * 1024),
+                    max_age_seconds=config.HOUSEKEEPING_ARTIFACTS_MAX_AGE_DAYS * 86400,
+                ),
+                RetentionRule(
+                    name='tmp logs',
+                    directory=Path('/tmp'),
+                    # Имена файлов, которые пишет services.system_ops._write_tmp для /logs_os, /logs_sip и /update
+                    patterns=('os_*.log', 'sip_*.log', 'update_*.log'),
+                    max_bytes=int(config.HOUSEKEEPING_TMP_LOGS_MAX_MB * 1024 * 1024),
+                    max_age_seconds=config.HOUSEKEEPING_TMP_LOGS_MAX_AGE_DAYS * 86400,
+                ),
+            ],
+            interval_seconds=config.HOUSEKEEPING_INTERVAL_SECONDS,
+            in_use=in_use,
+        )
+
+    def is_enabled(self) -> bool:
+        return self.interval_seconds > 0
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                # Список нужных файлов собирается в цикле событий: очередь Telegram живёт в нём
+                await asyncio.to_thread(self.run_once, self._paths_in_use())
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception('Housekeeping pass failed')
+            await asyncio.sleep(self.interval_seconds)
+
+    def run_once(self, in_use: set[Path] | None = None) -> int:
+        """Применяет все правила; возвращает число освобождённых байт. Файлы из in_use не удаляются."""
+        started = time.monotonic()
+        in_use = self._paths_in_use() if in_use is None else in_use
+        reclaimed = sum(self._apply(rule, in_use) for rule in self.rules)
+        self._stats.runs += 1
+        self._stats.last_run_at = time.time()
+        self._stats.last_run_seconds = round(time.monotonic() - started, 3)
+        if reclaimed:
+            logger.info('Housekeeping reclaimed %s bytes in %.2fs', reclaimed, self._stats.last_run_seconds)
+        return reclaimed
+
+    def stats(self) -> HousekeepingStats:
+        return self._stats
+
+    def status_text(self) -> str:
+        stats = self._stats
+        if not stats.runs:
+            return 'Housekeeping: `not run yet`'
+        lines = [f'Housekeeping: `{bytes2hr(stats.reclaimed_bytes)} reclaimed since start`']
+        for rule in self.rules:
+            rule_stats = stats.rules[rule.name]
+            budget = bytes2hr(rule.max_bytes) if rule.max_bytes else 'no limit'
+            lines.append(
+                f'  {rule.name}: `{rule_stats.files} files, {bytes2hr(rule_stats.bytes)}/{budget}, '
+                f'{rule_stats.removed_files} removed ({bytes2hr(rule_stats.reclaimed_bytes)})`'
+            )
+        return '\n'.join(lines)
+
+    def _paths_in_use(self) -> set[Path]:
+        if self.in_use is None:
+            return set()
+        return {Path(path) for path in self.in_use() if path}
+
+    def _apply(self, rule: RetentionRule, in_use: set[Path]) -> int:
+        rule_stats = self._stats.rules[rule.name]
+        entries = [(path, stat) for path, stat in self._scan(rule) if path not in in_use]
+        now = time.time()
+        reclaimed = 0
+        removed = 0
+        alive = []
+        for path, stat in entries:
+            age = now - stat.st_mtime
+            if rule.max_age_seconds and age > max(rule.max_age_seconds, self.min_age_seconds):
+                if self._remove(path, rule_stats):
+                    reclaimed += stat.st_size
+                    removed += 1
+                    continue
+            alive.append((path, stat))
+
+        total = sum(stat.st_size for _, stat in alive)
+        if rule.max_bytes and total > rule.max_bytes:
+            # LRU: mtime обновляется при повторном использовании файла (см. TranscriptionPdfRenderer)
+            survivors = []
+            for path, stat in sorted(alive, key=lambda item: item[1].st_mtime):
+                if total > rule.max_bytes and now - stat.st_mtime > self.min_age_seconds and self._remove(path, rule_stats):
+                    total -= stat.st_size
+                    reclaimed += stat.st_size
+                    removed += 1
+                else:
+                    survivors.append((path, stat))
+            alive = survivors
+
+        rule_stats.files = len(alive)
+        rule_stats.bytes = total
+        rule_stats.removed_files += removed
+        rule_stats.reclaimed_bytes += reclaimed
+        rule_stats.last_reclaimed_bytes = reclaimed
+        if removed:
+            logger.info('Housekeeping %s: removed %s files (%s bytes) in %s', rule.name, removed, reclaimed, rule.directory)
+        if rule.max_bytes and total > rule.max_bytes:
+            logger.warning('Housekeeping %s: %s bytes in %s still exceed the %s byte budget', rule.name, total, rule.directory, rule.max_bytes)
+        return reclaimed
+
+    @staticmethod
+    def _scan(rule: RetentionRule) -> list[tuple[Path, os.stat_result]]:
+        entries = {}
+        for pattern in rule.patterns:
+            try:
+                paths = list(rule.directory.glob(pattern))
+            except OSError:
+                continue
+            for path in paths:
+                try:
+                    stat = path.lstat()
+                except FileNotFoundError:
+                    continue
+                if stat_module.S_ISREG(stat.st_mode):
+                    entries[path] = stat
+        return list(entries.items())
+
+    @staticmethod
+    def _remove(path: Path, rule_stats: RetentionStats) -> bool:
+        try:
+            path.unlink()
+            return True
+        except FileNotFoundError:
+            return False
+        except OSError:
+            rule_stats.errors += 1
+            logger.exception('Housekeeping failed to remove %s', path)
+            return False
@@ -0,0 +1,126 @@
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Job:
+    payload: Any
+    enqueued_at: float
+
+
+@dataclass
+class JobQueueStats:
+    depth: int
+    maxsize: int
+    workers: int
+    busy_workers: int
+    submitted: int
+    dropped: int
+    completed: int
+    failed: int
+    last_wait_seconds: float
+    max_wait_seconds: float
+    avg_wait_seconds: float
+
+
+class BoundedJobQueue:
+    """
+    Ограниченная очередь заданий с пулом asyncio-воркеров.
+    submit_nowait() не ждёт: при заполненной очереди задание отбрасывается с предупреждением в лог,
+    поэтому продюсер (например, чтение Master.csv) никогда не блокируется и не выполняет обработчик сам.
+    """
+
+    def __init__(self, name: str, handler: Callable[[Any], Awaitable[None]], maxsize: int = 16, workers: int = 1):
+        self.name = name
+        self.handler = handler
+        self.maxsize = max(1, int(maxsize))
+        self.workers = max(1, int(workers))
+        self._queue: asyncio.Queue[_Job] = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks: list[asyncio.Task] = []
+        self._busy = 0
+        self._submitted = 0
+        self._dropped = 0
+        self._started = 0
+        self._completed = 0
+        self._failed = 0
+        self._wait_total = 0.0
+        self._wait_last = 0.0
+        self._wait_max = 0.0
+
+    def start(self) -> None:
+        if self._tasks:
+            return
+        for index in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(), name=f'{self.name}-worker-{index + 1}'))
+        logger.info('Job queue %s started: workers=%s maxsize=%s', self.name, self.workers, self.maxsize)
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def submit_nowait(self, payload: Any) -> bool:
+        """Ставит задание в очередь; False, если очередь заполнена и задание отброшено."""
+        try:
+            self._queue.put_nowait(_Job(payload=payload, enqueued_at=time.monotonic()))
+        except asyncio.QueueFull:
+            self._dropped += 1
+            logger.warning('Job queue %s is full (%s); job dropped', self.name, self.maxsize)
+            return False
+        self._submitted += 1
+        return True
+
+    def depth(self) -> int:
+        return self._queue.qsize()
+
+    def stats(self) -> JobQueueStats:
+        return JobQueueStats(
+            depth=self._queue.qsize(),
+            maxsize=self.maxsize,
+            workers=self.workers,
+            busy_workers=self._busy,
+            submitted=self._submitted,
+            dropped=self._dropped,
+            completed=self._completed,
+            failed=self._failed,
+            last_wait_seconds=round(self._wait_last, 3),
+            max_wait_seconds=round(self._wait_max, 3),
+            avg_wait_seconds=round(self._wait_total / self._started, 3) if self._started else 0.0,
+        )
+
+    def status_text(self) -> str:
+        stats = self.stats()
+        return (
+            f'Job queue {self.name}: `{stats.depth}/{stats.maxsize} queued, {stats.busy_workers}/{stats.workers} busy, '
+            f'{stats.completed} done, {stats.failed} failed, {stats.dropped} dropped`\n'
+            f'  wait: `avg {stats.avg_wait_seconds:.2f}s, max {stats.max_wait_seconds:.2f}s, last {stats.last_wait_seconds:.2f}s`'
+        )
+
+    async def _worker(self) -> None:
+        while True:
+            job = await self._queue.get()
+            wait_seconds = time.monotonic() - job.enqueued_at
+            self._wait_last = wait_seconds
+            self._wait_max = max(self._wait_max, wait_seconds)
+            self._wait_total += wait_seconds
+            self._started += 1
+            self._busy += 1
+            logger.info('Job queue %s: job started after %.2fs wait, depth=%s', self.name, wait_seconds, self._queue.qsize())
+            try:
+                await self.handler(job.payload)
+                self._completed += 1
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._failed += 1
+                logger.exception('Job queue %s: job failed', self.name)
+            finally:
+                self._busy -= 1
+                self._queue.task_done()